@@ -25,6 +25,9 @@
 from DLLM.DLLMEval.DLLMWrapper import DLLMWrapper
 from copy import deepcopy
 import multiprocessing 
+import threading
+import Queue
+import logging
 import json
 import numpy
 import string
@@ -35,7 +38,11 @@ class DLLMMP():
     ERROR_MSG = 'ERROR in DLLMMP.'
     WARNING_MSG = 'WARNING in DLLMMP.'
     POS_FMT = ['list','numpy']
-    MP_KEYS = ['nb_conditions','condition_name']
+    POS_BACKEND = ['process','thread']
+    MP_KEYS = ['nb_conditions','condition_name','nb_workers','backend','timeout']
+    # period of the workers liveness checks while waiting for results, in seconds
+    POLL_TIME = 1.
+    RUN_METHODS = {'analysis':'run', 'analysis_grad':'run_grad', 'analysis_and_grad':'run_and_grad'}
     
     #-- Constructor
     def __init__(self, tag, verbose = 0):
@@ -57,6 +64,23 @@ class DLLMMP():
         
         self.__AoA_id_list    = None
         
+        #-- Persistent pool of workers, started at the first evaluation
+        self.__backend        = 'process'
+        self.__loggers        = None
+        self.__thread_data    = None # per thread copies of the wrappers for batch evaluations
+        self.__nb_workers     = None
+        self.__worker_list    = None
+        self.__task_queue     = None
+        self.__result_queue   = None
+        self.__timeout        = None
+        self.__x              = None
+        
+        #-- Shared memory buffers, allocated at configure time and inherited by the workers
+        self.__F_offsets      = None # rows of each condition in the functions and gradients buffers
+        self.__x_shared       = None
+        self.__F_shared       = None
+        self.__F_grad_shared  = None
+        
     #-- Accessors
     def get_tags_x0_and_bounds(self):
         tags=[]
@@ -108,6 +132,32 @@ class DLLMMP():
             format='list'
         self.__grad_format = format
         
+    def set_nb_workers(self, nb_workers):
+        """
+        Set the number of workers of the pool, None for one per condition within the number of cores
+        """
+        self.close()
+        self.__nb_workers = nb_workers
+        
+    def set_backend(self, backend):
+        """
+        Set the workers backend: processes with their own copy of the wrappers, or threads of this process
+        sharing the wrappers and their airfoil data. The tasks of both are traced in the <condition>.log files,
+        the prints of the solvers stay on the stdout of the workers.
+        """
+        WARNING_MSG=self.WARNING_MSG+'set_backend: '
+        if backend not in self.POS_BACKEND:
+            print WARNING_MSG+'backend = '+str(backend)+' not in '+str(self.POS_BACKEND)+'. Set to default backend = process'
+            backend='process'
+        self.close()
+        self.__backend = backend
+        
+    def set_timeout(self, timeout):
+        """
+        Set the maximum time to wait for a result of the workers in seconds, None to wait as long as the workers are alive
+        """
+        self.__timeout = timeout
+        
     #-- Public methods
     def config_from_file(self, filename):
         # Open file
@@ -122,195 +172,370 @@ class DLLMMP():
         self.configure(config_dict)
         
     def configure(self, config_dict):
+        # the workers hold copies of the previous wrappers
+        self.close()
+        self.__x           = None
         self.__config_dict = config_dict
         self.__init_configure()
         self.__set_list_config_dict()
         self.__configure_wrapper_list()
+        self.__init_shared_buffers()
         
     def run(self, x):
-        process_list=[]
-        # Launch all sub-processes 
-        for i in xrange(self.__nb_cond):
-            process_list.append(multiprocessing.Process(target=self.__wrap_run, args=(i,x)))
-            process_list[-1].start()
-        # wait for all processes
-        for i in xrange(self.__nb_cond):
-            process_list[i].join()
-        # import results
-        self.__import_results()
+        self.__run_tasks('run', x)
         # Gather information
         MP_F_list=self.__build_MP_F_list()
         return MP_F_list
     
-    def __wrap_run(self, i, x):
-        std_sys=sys.stdout
-        cond_name = self.__cond_name+str(i+1)
-        sys.stdout = open(cond_name+'.log','a')
-        print 'PID=',os.getpid()
-        self.__wrapper_list[i].run(x)
-        self.__wrapper_list[i].export_results()
-        sys.stdout.close()
-        sys.stdout=std_sys
-    
     def run_grad(self, x):
-        process_list=[]
-        # Launch all sub-processes 
-        for i in xrange(self.__nb_cond):
-            process_list.append(multiprocessing.Process(target=self.__wrap_run_grad, args=(i,x)))
-            process_list[-1].start()
-        # wait for all processes
-        for i in xrange(self.__nb_cond):
-            process_list[i].join()
-        # import results
-        self.__import_results()
+        self.__run_tasks('run_grad', x)
         # Gather information
         MP_F_list_grad=self.__build_MP_F_list_grad()
         return MP_F_list_grad
     
-    def __wrap_run_grad(self, i, x):
-        std_sys=sys.stdout
-        cond_name = self.__cond_name+str(i+1)
-        sys.stdout = open(cond_name+'.log','a')
-        print 'PID=',os.getpid()
-        self.__wrapper_list[i].run_grad(x)
-        self.__wrapper_list[i].export_results()
-        sys.stdout.close()
-        sys.stdout=std_sys
-    
     def run_and_grad(self, x):
-        process_list=[]
-        # Launch all sub-processes 
-        for i in xrange(self.__nb_cond):
-            process_list.append(multiprocessing.Process(target=self.__wrap_run_and_grad, args=(i,x)))
-            process_list[-1].start()
-        # wait for all processes
-        for i in xrange(self.__nb_cond):
-            process_list[i].join()
-        # import results
-        self.__import_results()
+        self.__run_tasks('run_and_grad', x)
         # Gather information
         MP_F_list,MP_F_list_grad=self.__build_MP_F_list_and_grad()
         return MP_F_list, MP_F_list_grad
-    
-    def __wrap_run_and_grad(self, i, x):
-        std_sys=sys.stdout
-        cond_name = self.__cond_name+str(i+1)
-        sys.stdout = open(cond_name+'.log','a')
-        print 'PID=',os.getpid()
-        self.__wrapper_list[i].run_and_grad(x)
-        self.__wrapper_list[i].export_results()
-        sys.stdout.close()
-        sys.stdout=std_sys
 
     def analysis(self):
-        process_list=[]
-        # Launch all sub-processes 
-        for i in xrange(self.__nb_cond):
-            process_list.append(multiprocessing.Process(target=self.__wrap_analysis, args=(i,)))
-            process_list[-1].start()
-        # wait for all processes
-        for i in xrange(self.__nb_cond):
-            process_list[i].join()
-        # import results
-        self.__import_results()
+        self.__run_tasks('analysis')
         # Gather information
         MP_F_list=self.__build_MP_F_list()
         return MP_F_list
     
-    def __wrap_analysis(self, i):
-        std_sys=sys.stdout
-        cond_name = self.__cond_name+str(i+1)
-        sys.stdout = open(cond_name+'.log','a')
-        print 'PID=',os.getpid()
-        self.__wrapper_list[i].analysis()
-        self.__wrapper_list[i].export_results()
-        sys.stdout.close()
-        sys.stdout=std_sys
-    
     def analysis_grad(self):
-        process_list=[]
-        # Launch all sub-processes 
-        for i in xrange(self.__nb_cond):
-            process_list.append(multiprocessing.Process(target=self.__wrap_analysis_grad, args=(i,)))
-            process_list[-1].start()
-        # wait for all processes
-        for i in xrange(self.__nb_cond):
-            process_list[i].join()
-        # import results
-        self.__import_results()
+        self.__run_tasks('analysis_grad')
         # Gather information
         MP_F_list_grad=self.__build_MP_F_list_grad()
         return MP_F_list_grad
     
-    def __wrap_analysis_grad(self, i):
-        std_sys=sys.stdout
-        cond_name = self.__cond_name+str(i+1)
-        sys.stdout = open(cond_name+'.log','a')
-        print 'PID=',os.getpid()
-        self.__wrapper_list[i].analysis_grad()
-        self.__wrapper_list[i].export_results()
-        sys.stdout.close()
-        sys.stdout=std_sys
-    
     def analysis_and_grad(self):
-        process_list=[]
-        # Launch all sub-processes 
-        for i in xrange(self.__nb_cond):
-            process_list.append(multiprocessing.Process(target=self.__wrap_analysis_and_grad, args=(i,)))
-            process_list[-1].start()
-        # wait for all processes
-        for i in xrange(self.__nb_cond):
-            process_list[i].join()
-        # import results
-        self.__import_results()
+        self.__run_tasks('analysis_and_grad')
         # Gather information
         MP_F_list,MP_F_list_grad=self.__build_MP_F_list_and_grad()
         return MP_F_list, MP_F_list_grad
     
-    def __wrap_analysis_and_grad(self, i):
-        std_sys=sys.stdout
-        cond_name = self.__cond_name+str(i+1)
-        sys.stdout = open(cond_name+'.log','a')
-        print 'PID=',os.getpid()
-        self.__wrapper_list[i].analysis_and_grad()
-        self.__wrapper_list[i].export_results()
-        sys.stdout.close()
-        sys.stdout=std_sys
+    #-- Batch methods
+    def run_batch(self, X):
+        """
+        Evaluate the functions of all conditions for each design vector of X, shape (n_designs, ndv).
+        Return an array of shape (n_designs, nF).
+        """
+        X = numpy.atleast_2d(X)
+        MP_F_array = numpy.zeros((X.shape[0], self.__F_offsets[-1]))
+        for j, MP_F_list in self.iter_run_batch(X):
+            MP_F_array[j,:] = MP_F_list
+        return MP_F_array
+    
+    def run_and_grad_batch(self, X):
+        """
+        Evaluate the functions and gradients of all conditions for each design vector of X, shape (n_designs, ndv).
+        Return arrays of shape (n_designs, nF) and (n_designs, nF, ndv).
+        """
+        X = numpy.atleast_2d(X)
+        MP_F_array      = numpy.zeros((X.shape[0], self.__F_offsets[-1]))
+        MP_F_grad_array = numpy.zeros((X.shape[0], self.__F_offsets[-1], X.shape[1]))
+        for j, MP_F_list, MP_F_list_grad in self.iter_run_and_grad_batch(X):
+            MP_F_array[j,:]        = MP_F_list
+            MP_F_grad_array[j,:,:] = MP_F_list_grad
+        return MP_F_array, MP_F_grad_array
+    
+    def iter_run_batch(self, X):
+        """
+        Generator of (j, MP_F_list) for the design vectors X[j], in completion order
+        """
+        for j, MP_F_list, MP_F_list_grad in self.__iter_batch('run', X):
+            yield j, MP_F_list
+    
+    def iter_run_and_grad_batch(self, X):
+        """
+        Generator of (j, MP_F_list, MP_F_list_grad) for the design vectors X[j], in completion order
+        """
+        return self.__iter_batch('run_and_grad', X)
+    
+    def close(self):
+        """
+        Stop the workers of the pool
+        """
+        if self.__worker_list is None:
+            return
+        for worker in self.__worker_list:
+            self.__task_queue.put(None)
+        for worker in self.__worker_list:
+            worker.join()
+        self.__worker_list  = None
+        self.__task_queue   = None
+        self.__result_queue = None
+        self.__thread_data  = None
+        if self.__loggers is not None:
+            for logger in self.__loggers:
+                for handler in logger.handlers[:]:
+                    handler.close()
+                    logger.removeHandler(handler)
+            self.__loggers = None
+    
+    def __abort_workers(self):
+        """
+        Drop a pool that lost a worker or timed out: the tasks in flight are lost, process workers are terminated
+        and a new pool is started by the next evaluation
+        """
+        if self.__backend != 'thread':
+            for worker in self.__worker_list:
+                if worker.is_alive():
+                    worker.terminate()
+                worker.join()
+        else:
+            # threads cannot be stopped: the pending tasks are dropped and they exit after their current task
+            try:
+                while True:
+                    self.__task_queue.get_nowait()
+            except Queue.Empty:
+                pass
+            for worker in self.__worker_list:
+                self.__task_queue.put(None)
+        self.__worker_list = []
+        self.close()
+    
+    #-- Worker pool methods
+    def __start_workers(self):
+        """
+        Start the pool of workers. Process workers are forked once the wrappers are configured and keep their own copy of them,
+        thread workers share the wrappers of this process. Both log their tasks in a per condition logger.
+        """
+        nb_workers = self.__nb_workers
+        if nb_workers is None:
+            nb_workers = min(self.__nb_cond, multiprocessing.cpu_count())
+        # private copies of the wrappers for the batch tasks, built by each worker
+        self.__thread_data  = threading.local()
+        if self.__backend == 'thread':
+            self.__task_queue   = Queue.Queue()
+            self.__result_queue = Queue.Queue()
+        else:
+            self.__task_queue   = multiprocessing.Queue()
+            self.__result_queue = multiprocessing.Queue()
+        # created before the fork so that process workers inherit them
+        self.__init_loggers()
+        self.__worker_list  = []
+        for k in xrange(nb_workers):
+            # the queues are given to the workers, an aborted pool keeps its own ones
+            args = (self.__task_queue, self.__result_queue)
+            name = 'worker'+str(k)
+            if self.__backend == 'thread':
+                worker = threading.Thread(target=self.__worker_loop, args=args, name=name)
+            else:
+                worker = multiprocessing.Process(target=self.__worker_loop, args=args, name=name)
+            worker.daemon = True
+            worker.start()
+            self.__worker_list.append(worker)
+    
+    def __init_loggers(self):
+        self.__loggers = []
+        for i in xrange(self.__nb_cond):
+            cond_name = self.__cond_name+str(i+1)
+            logger = logging.getLogger(self.__tag+'.'+cond_name)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            handler = logging.FileHandler(cond_name+'.log')
+            handler.setFormatter(logging.Formatter('%(asctime)s %(processName)s %(threadName)s %(message)s'))
+            logger.addHandler(handler)
+            self.__loggers.append(logger)
+    
+    def __worker_loop(self, task_queue, result_queue):
+        while True:
+            task = task_queue.get()
+            if task is None:
+                for wrapper in getattr(self.__thread_data, 'wrapper_list', []):
+                    wrapper.flush_sink()
+                break
+            i, method, use_x, j, x = task
+            try:
+                F_list, F_list_grad = self.__wrap_task(i, method, use_x, x)
+                result_queue.put((i, None, j, F_list, F_list_grad))
+            except BaseException, e:
+                # SystemExit raised by the geometry checks included: the parent always gets an answer
+                result_queue.put((i, e.__class__.__name__+': '+str(e), j, None, None))
+                if not isinstance(e, (Exception, SystemExit)):
+                    raise
+    
+    def __get_result(self, ERROR_MSG):
+        """
+        Wait for the next result of the pool, checking that the workers are still alive
+        """
+        waited = 0.
+        while True:
+            try:
+                return self.__result_queue.get(timeout=self.POLL_TIME)
+            except Queue.Empty:
+                waited += self.POLL_TIME
+            nb_dead = len([worker for worker in self.__worker_list if not worker.is_alive()])
+            if nb_dead > 0:
+                self.__abort_workers()
+                raise Exception(ERROR_MSG+str(nb_dead)+' worker(s) died, the pool is restarted at the next evaluation')
+            if self.__timeout is not None and waited >= self.__timeout:
+                self.__abort_workers()
+                raise Exception(ERROR_MSG+'no result after '+str(self.__timeout)+' s, the pool is restarted at the next evaluation')
+    
+    def __run_tasks(self, method, x=None):
+        """
+        Send one task per condition to the pool and wait for all of them
+        """
+        ERROR_MSG=self.ERROR_MSG+'__run_tasks: '
+        if self.__worker_list is None:
+            self.__start_workers()
+        if x is None:
+            # any worker may hold a condition: analyses are done at the last design vector sent to the pool
+            if self.__x is not None:
+                method = self.RUN_METHODS[method]
+                x      = self.__x
+        if x is not None:
+            self.__x_shared[:] = x
+        for i in xrange(self.__nb_cond):
+            self.__task_queue.put((i, method, x is not None, None, None))
+        errors = []
+        for k in xrange(self.__nb_cond):
+            i, error, j, F_list, F_list_grad = self.__get_result(ERROR_MSG)
+            if error is not None:
+                errors.append(self.__cond_name+str(i+1)+': '+error)
+        if len(errors) > 0:
+            raise Exception(ERROR_MSG+method+' failed for '+string.join(errors,', '))
+        if x is not None:
+            self.__x = self.__x_shared.copy()
+    
+    def __iter_batch(self, method, X):
+        """
+        Spread the (design, condition) tasks over the pool and yield the results of each design once all its
+        conditions are done. Only a window of designs is in flight so that results are never accumulated.
+        """
+        ERROR_MSG=self.ERROR_MSG+'__iter_batch: '
+        if self.__worker_list is None:
+            self.__start_workers()
+        X          = numpy.atleast_2d(X)
+        n_designs  = X.shape[0]
+        window     = max(2, 2*len(self.__worker_list)/self.__nb_cond)
+        pending    = {}
+        submitted  = 0
+        received   = 0
+        try:
+            while submitted < min(n_designs, window):
+                self.__submit_design(method, X, submitted)
+                submitted += 1
+            completed = 0
+            while completed < n_designs:
+                i, error, j, F_list, F_list_grad = self.__get_result(ERROR_MSG)
+                received += 1
+                if error is not None:
+                    raise Exception(ERROR_MSG+method+' failed for design '+str(j)+', '+self.__cond_name+str(i+1)+': '+error)
+                if j not in pending:
+                    pending[j] = [[None]*self.__nb_cond, [None]*self.__nb_cond, 0]
+                pending[j][0][i] = F_list
+                pending[j][1][i] = F_list_grad
+                pending[j][2]   += 1
+                if pending[j][2] < self.__nb_cond:
+                    continue
+                design_F_list, design_F_list_grad, count = pending.pop(j)
+                completed += 1
+                if submitted < n_designs:
+                    self.__submit_design(method, X, submitted)
+                    submitted += 1
+                MP_F_list = numpy.concatenate(design_F_list)
+                if 'grad' in method:
+                    yield j, MP_F_list, numpy.vstack(design_F_list_grad)
+                else:
+                    yield j, MP_F_list, None
+        finally:
+            # results still in flight would be read by the next evaluation, an aborted pool is dropped with them
+            if self.__worker_list is not None:
+                for k in xrange(submitted*self.__nb_cond-received):
+                    self.__get_result(ERROR_MSG)
+    
+    def __submit_design(self, method, X, j):
+        for i in xrange(self.__nb_cond):
+            self.__task_queue.put((i, method, True, j, X[j]))
+    
+    def __wrap_task(self, i, method, use_x, x=None):
+        """
+        Run method of the wrapper of condition i, at the shared design vector if use_x.
+        Batch tasks give their own design vector x and get their functions and gradients back,
+        the other tasks write them in the shared buffers.
+        """
+        batch = x is not None
+        if batch:
+            wrapper = self.__get_batch_wrapper(i)
+        else:
+            wrapper = self.__wrapper_list[i]
+            if use_x:
+                x = self.__x_shared
+        self.__wrap_logged_task(self.__loggers[i], wrapper, method, x)
+        F_list = wrapper.get_F_list()
+        F_list_grad = None
+        if 'grad' in method:
+            F_list_grad = wrapper.get_F_list_grad()
+        if batch:
+            return F_list, F_list_grad
+        start, end = self.__F_offsets[i], self.__F_offsets[i+1]
+        self.__F_shared[start:end] = F_list
+        if F_list_grad is not None:
+            self.__F_grad_shared[start:end,:] = F_list_grad
+        return None, None
+        
+    def __wrap_logged_task(self, logger, wrapper, method, x):
+        # sys.stdout is never redirected: it is shared by the threads, the task is traced in the logger of its condition
+        logger.info('start '+method+' PID='+str(os.getpid()))
+        try:
+            self.__call_wrapper(wrapper, method, x)
+        except BaseException:
+            logger.exception('failed '+method)
+            raise
+        logger.info('end '+method)
+    
+    def __call_wrapper(self, wrapper, method, x):
+        if x is None:
+            getattr(wrapper, method)()
+        else:
+            getattr(wrapper, method)(x)
+    
+    def __get_batch_wrapper(self, i):
+        """
+        Wrapper of condition i for batch tasks: each worker uses a private copy of the wrappers, tagged with its name,
+        so that one condition can be evaluated by several workers at once without overwriting each other's files.
+        Only the solver state is copied, the read-only polar data is shared with the original wrappers.
+        """
+        if not hasattr(self.__thread_data, 'wrapper_list'):
+            memo = {}
+            for wrapper in self.__wrapper_list:
+                for data in wrapper.get_shared_data():
+                    memo[id(data)] = data
+            wrapper_list = deepcopy(self.__wrapper_list, memo)
+            if self.__backend == 'thread':
+                worker_name = threading.current_thread().name
+            else:
+                worker_name = multiprocessing.current_process().name
+            for wrapper in wrapper_list:
+                wrapper.set_worker(worker_name)
+            self.__thread_data.wrapper_list = wrapper_list
+        return self.__thread_data.wrapper_list[i]
         
     #-- Private methods
-    def __import_results(self):
-        for i in xrange(self.__nb_cond):
-            self.__wrapper_list[i].import_results()
-            
     def __build_MP_F_list(self):
-        MP_F_list=[]
-        for i in xrange(self.__nb_cond):
-            F_list=self.__wrapper_list[i].get_F_list()
-            MP_F_list+=F_list
-        if self.__out_format == 'numpy':
-            MP_F_list=numpy.array(MP_F_list)
+        # the shared buffer is overwritten by the next evaluation
+        if self.__out_format == 'list':
+            MP_F_list=self.__F_shared.tolist()
+        else:
+            MP_F_list=self.__F_shared.copy()
         return MP_F_list
     
     def __build_MP_F_list_grad(self):
-        MP_F_list_grad=[]
-        for i in xrange(self.__nb_cond):
-            F_list_grad=self.__wrapper_list[i].get_F_list_grad()
-            MP_F_list_grad+=F_list_grad
-        if self.__grad_format == 'numpy':
-            MP_F_list_grad=numpy.array(MP_F_list_grad)
+        if self.__grad_format == 'list':
+            MP_F_list_grad=self.__F_grad_shared.tolist()
+        else:
+            MP_F_list_grad=self.__F_grad_shared.copy()
         return MP_F_list_grad
     
     def __build_MP_F_list_and_grad(self):
-        MP_F_list=[]
-        MP_F_list_grad=[]
-        for i in xrange(self.__nb_cond):
-            F_list,F_list_grad=self.__wrapper_list[i].get_F_list_and_grad()
-            MP_F_list+=F_list
-            MP_F_list_grad+=F_list_grad
-        if self.__out_format == 'numpy':
-            MP_F_list=numpy.array(MP_F_list)
-        if self.__grad_format == 'numpy':
-            MP_F_list_grad=numpy.array(MP_F_list_grad)
+        MP_F_list=self.__build_MP_F_list()
+        MP_F_list_grad=self.__build_MP_F_list_grad()
         return MP_F_list,MP_F_list_grad
     
     def __configure_wrapper_list(self):
@@ -321,10 +546,25 @@ class DLLMMP():
             if self.__AoA_id_list is not None:
                 AoA_id = self.__AoA_id_list[i]
                 self.__wrapper_list[i].set_AoA_id(AoA_id)
-            self.__wrapper_list[i].set_out_format('list')
-            self.__wrapper_list[i].set_grad_format('list')
+            # results are written as arrays in the shared buffers
+            self.__wrapper_list[i].set_out_format('numpy')
+            self.__wrapper_list[i].set_grad_format('numpy')
             self.__wrapper_list[i].configure(self.__list_config_dict[i])
-
+            
+    def __init_shared_buffers(self):
+        """
+        Allocate the design vector, functions and gradients buffers shared with the workers
+        """
+        ndv = len(self.__wrapper_list[0].get_x())
+        self.__F_offsets = [0]
+        for i in xrange(self.__nb_cond):
+            nF = len(self.__wrapper_list[i].get_F_list_names())
+            self.__F_offsets.append(self.__F_offsets[-1]+nF)
+        nF_tot = self.__F_offsets[-1]
+        
+        self.__x_shared      = numpy.frombuffer(multiprocessing.RawArray('d', ndv))
+        self.__F_shared      = numpy.frombuffer(multiprocessing.RawArray('d', nF_tot))
+        self.__F_grad_shared = numpy.frombuffer(multiprocessing.RawArray('d', nF_tot*ndv)).reshape((nF_tot, ndv))
             
     def __init_configure(self):
         config_keys=sorted(self.__config_dict.keys())
@@ -332,11 +572,19 @@ class DLLMMP():
         self.__cond_name   = self.__config_dict[self.__tag+'.condition_name']
         if self.__tag+'.AoA_id_list' in config_keys:
             self.__AoA_id_list = self.__config_dict[self.__tag+'.AoA_id_list']
+        if self.__tag+'.nb_workers' in config_keys:
+            self.__nb_workers = self.__config_dict[self.__tag+'.nb_workers']
+        if self.__tag+'.backend' in config_keys:
+            self.set_backend(self.__config_dict[self.__tag+'.backend'])
+        if self.__tag+'.timeout' in config_keys:
+            self.set_timeout(self.__config_dict[self.__tag+'.timeout'])
         if self.__verbose > 0:
             print '*** Multi-conditions information ***'
             print '  Number of conditions = ',self.__nb_cond
             print '  Base condition name  = ',self.__cond_name
             print '  AoA_id list          = ',str(self.__AoA_id_list)
+            print '  Number of workers    = ',str(self.__nb_workers)
+            print '  Workers backend      = ',self.__backend
             print '***                              ***'
         
         self.__list_config_dict=[]
@@ -0,0 +1,112 @@
+# -*-mode: python; py-indent-offset: 4; tab-width: 8; coding: iso-8859-1 -*-
+#  DLLM (non-linear Differentiated Lifting Line Model, open source software)
+# 
+#  Copyright (C) 2013-2015 Airbus Group SAS
+# 
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+# 
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+# 
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+#  https://github.com/matthieu-meaux/DLLM.git
+#
+# @author : Matthieu MEAUX
+#
+# - imports -
+import sqlite3
+import hashlib
+import cPickle
+import threading
+import json
+import numpy
+import os
+
+class DLLMStore():
+    """
+    Persistent store of DLLM evaluations in a SQLite database.
+    Entries are keyed by a hash of the physical configuration and of the design vector.
+    Each thread keeps its own connection to the database, reopened in the processes forked after it was opened.
+    """
+    ERROR_MSG = 'ERROR in DLLMStore.'
+    TIMEOUT = 60.
+    # configuration keys that do not change the results, not included in the keys
+    NON_PHYSICAL_KEYS = ['cache_size', 'store_file', 'DLLM.sink', 'DLLM.gamma_file_name',
+                         'nb_workers', 'backend', 'timeout']
+    
+    def __init__(self, filename):
+        self.__filename = filename
+        self.__local    = threading.local()
+        connection = self.__get_connection()
+        connection.execute('CREATE TABLE IF NOT EXISTS evaluations (key TEXT PRIMARY KEY, entry BLOB)')
+        connection.commit()
+            
+    #-- Accessors
+    def get_filename(self):
+        return self.__filename
+    
+    #-- Public methods
+    def get_key(self, config_dict, x):
+        """
+        Key of the design vector x for the configuration config_dict
+        """
+        physical_dict = {}
+        for key, value in config_dict.items():
+            if not any([key.endswith('.'+name) for name in self.NON_PHYSICAL_KEYS]):
+                physical_dict[key] = value
+        config_str = json.dumps(physical_dict, sort_keys=True, default=str)
+        return hashlib.sha1(config_str+numpy.array(x, dtype=float).tostring()).hexdigest()
+    
+    def get(self, key):
+        """
+        Return the entry stored for key, None if not found
+        """
+        row = self.__get_connection().execute('SELECT entry FROM evaluations WHERE key=?', (key,)).fetchone()
+        if row is None:
+            return None
+        return cPickle.loads(str(row[0]))
+    
+    def put(self, key, entry):
+        """
+        Store entry, a dictionary of arrays, for key
+        """
+        blob = sqlite3.Binary(cPickle.dumps(entry, cPickle.HIGHEST_PROTOCOL))
+        connection = self.__get_connection()
+        connection.execute('INSERT OR REPLACE INTO evaluations (key, entry) VALUES (?, ?)', (key, blob))
+        connection.commit()
+        
+    def close(self):
+        """
+        Close the connection of the calling thread
+        """
+        connection = getattr(self.__local, 'connection', None)
+        if connection is not None and self.__local.pid == os.getpid():
+            connection.close()
+        self.__local.connection = None
+        
+    #-- Copy methods: the connections are not copied
+    def __getstate__(self):
+        return {'filename':self.__filename}
+    
+    def __setstate__(self, state):
+        self.__filename = state['filename']
+        self.__local    = threading.local()
+            
+    #-- Private methods
+    def __get_connection(self):
+        connection = getattr(self.__local, 'connection', None)
+        # a connection inherited from the parent process is left to it
+        if connection is None or self.__local.pid != os.getpid():
+            # concurrent writers wait for the database lock up to TIMEOUT seconds
+            connection = sqlite3.connect(self.__filename, timeout=self.TIMEOUT)
+            self.__local.connection = connection
+            self.__local.pid        = os.getpid()
+        return connection
@@ -29,6 +29,11 @@ from DLLM.DLLMGeom.wing_straight import Wing_Straight
 from DLLM.DLLMKernel.DLLMSolver import DLLMSolver
 from DLLM.DLLMKernel.DLLMTargetCl import DLLMTargetCl
 from DLLM.DLLMKernel.DLLMTargetLift import DLLMTargetLift
+from DLLM.DLLMKernel.DLLMSink import DLLMBufferedSink, DLLMTextSink
+from DLLM.DLLMEval.DLLMStore import DLLMStore
+from collections import OrderedDict
+import multiprocessing
+import Queue
 import numpy
 import cPickle
 import json
@@ -38,6 +43,8 @@ class DLLMWrapper():
     WARNING_MSG = 'WARNING in DLLMWrapper.'
     POS_SOLVER = ['Solver','TargetCl','TargetLift']
     POS_FMT = ['list','numpy']
+    # period of the batch workers liveness checks while waiting for results, in seconds
+    POLL_TIME = 1.
 
     def __init__(self, tag, verbose=1):
         """
@@ -59,6 +66,23 @@ class DLLMWrapper():
         
         self.__F_list       = None
         self.__F_list_grad  = None
+        self.__export_sink  = None # legacy text output of the analysis methods, None if a DLLM.sink is configured
+        
+        #-- LRU cache of the evaluations, keyed on the design vector
+        self.__cache_size   = 10
+        self.__cache        = OrderedDict()
+        self.__x_state      = None # key of the design vector of the current solver state
+        self.__solver_stale = False # the last design vector was served by the cache, the solver is recomputed on access
+        
+        #-- Persistent store of the evaluations, shared between runs
+        self.__store        = None
+        self.__OC_in_config = True # the store is keyed on the configuration, only used if the OC comes from it
+        
+        #-- Persistent pool of batch workers, forked at the first batch evaluation with a copy of this wrapper
+        self.__worker_list  = None
+        self.__task_queue   = None
+        self.__result_queue = None
+        self.__timeout      = None
         
     #-- Accessors
     def get_OC(self):
@@ -68,8 +92,23 @@ class DLLMWrapper():
         return self.__wing_param
     
     def get_DLLM_solver(self):
+        if self.__solver_stale:
+            # results of the last design vector came from the cache
+            if not self.__DLLM_solver.is_post_computed():
+                self.__DLLM_solver.run_direct()
+                self.__DLLM_solver.run_post()
+            self.__solver_stale = False
         return self.__DLLM_solver
     
+    def get_shared_data(self):
+        """
+        Read-only data of the wrapper that its copies share: the polar data of the wing and the evaluation store
+        """
+        shared_data = self.__wing_param.get_shared_data()
+        if self.__store is not None:
+            shared_data.append(self.__store)
+        return shared_data
+    
     def get_tags_x0_and_bounds(self):
         tags=self.__wing_param.get_dv_id_list()
         x0=self.__wing_param.get_dv_array()
@@ -121,6 +160,55 @@ class DLLMWrapper():
             print WARNING_MSG+'format = '+str(format)+' not in '+str(self.POS_FMT)+'. Set to default grad format = list'
             format='list'
         self.__grad_format = format
+        
+    def set_cache_size(self, cache_size):
+        """
+        Set the number of design vectors kept in the evaluation cache, 0 to disable the cache
+        """
+        self.__cache_size = cache_size
+        while len(self.__cache) > self.__cache_size:
+            self.__cache.popitem(last=False)
+            
+    def clear_cache(self):
+        self.__cache = OrderedDict()
+        
+    def set_OC(self, OC):
+        """
+        Set the operating condition of the solver. The cached evaluations are dropped and the persistent store,
+        keyed on the configuration dictionary, is not used until the next configure.
+        """
+        self.__OC = OC
+        self.__DLLM_solver.set_OC(OC)
+        self.__OC_in_config = False
+        self.__reset_state()
+        
+    def set_store(self, store):
+        """
+        Set the persistent evaluation store: a DLLMStore, a database file name or None
+        """
+        if store is not None and not isinstance(store, DLLMStore):
+            store = DLLMStore(store)
+        self.__store = store
+        self.close()
+        
+    def set_timeout(self, timeout):
+        """
+        Set the maximum time to wait for a batch result, in seconds. None to wait as long as the workers are alive
+        """
+        self.__timeout = timeout
+        
+    def set_worker(self, worker_name):
+        """
+        Set up a copy of the wrapper run by a batch worker: the output files of the solver are tagged with worker_name
+        and a buffered sink writes its own file, so that parallel workers do not overwrite each other's files
+        """
+        suffix = '.'+worker_name
+        self.__DLLM_solver.set_tag(self.__DLLM_solver.get_tag()+suffix)
+        sink = self.__DLLM_solver.get_sink()
+        if isinstance(sink, DLLMBufferedSink):
+            # the records of the original wrapper are written by the original wrapper
+            sink.clear()
+            self.__DLLM_solver.set_sink(DLLMBufferedSink(sink.get_filename()+suffix, sink.get_buffer_size()))
     
     #-- Public methods
     def config_from_file(self, filename):
@@ -137,26 +225,73 @@ class DLLMWrapper():
         
     def configure(self, config_dict):
         self.__config_dict = config_dict
+        self.__OC_in_config = True
+        self.__reset_state()
+        cache_size_key = self.__tag+'.cache_size'
+        if cache_size_key in config_dict.keys():
+            self.set_cache_size(config_dict[cache_size_key])
+        store_key = self.__tag+'.store_file'
+        if store_key in config_dict.keys():
+            self.set_store(config_dict[store_key])
+        timeout_key = self.__tag+'.timeout'
+        if timeout_key in config_dict.keys():
+            self.set_timeout(config_dict[timeout_key])
         self.__config_OC()
         self.__config_param()
         self.__config_DLLM()
         
     def run(self, x):
-        self.__wing_param.update_from_x_list(x)
-        self.__DLLM_solver.set_geom(self.__wing_param)
+        key   = self.__get_cache_key(x)
+        entry = self.__get_cache_entry(key)
+        if entry is not None:
+            self.__update_x_from_cache(x, key)
+            F_list = self.__format_F_list(entry['F_list'])
+            self.__F_list = F_list
+            return F_list
+        self.__update_x(x, key)
         F_list=self.analysis()
+        self.__store_cache_entry(key)
         return F_list
     
     def run_grad(self, x):
-        self.__wing_param.update_from_x_list(x)
-        self.__DLLM_solver.set_geom(self.__wing_param)
-        F_list_grad=self.analysis_grad()
+        key   = self.__get_cache_key(x)
+        entry = self.__get_cache_entry(key)
+        if entry is not None and entry['F_list_grad'] is not None:
+            self.__update_x_from_cache(x, key)
+            F_list_grad = self.__format_F_list_grad(entry['F_list_grad'])
+            self.__F_list_grad = F_list_grad
+            return F_list_grad
+        if self.__is_current_state(key):
+            # the direct and post-processing are already converged for x, only the adjoint is needed
+            self.__DLLM_solver.run_adjoint()
+            F_list_grad = self.__format_F_list_grad(self.__DLLM_solver.get_dF_list_dchi())
+            self.__F_list_grad = F_list_grad
+        else:
+            self.__update_x(x, key)
+            F_list_grad=self.analysis_grad()
+        self.__store_cache_entry(key, grad=True)
         return F_list_grad
     
     def run_and_grad(self, x):
-        self.__wing_param.update_from_x_list(x)
-        self.__DLLM_solver.set_geom(self.__wing_param)
-        F_list,F_list_grad = self.analysis_and_grad()
+        key   = self.__get_cache_key(x)
+        entry = self.__get_cache_entry(key)
+        if entry is not None and entry['F_list_grad'] is not None:
+            self.__update_x_from_cache(x, key)
+            F_list      = self.__format_F_list(entry['F_list'])
+            F_list_grad = self.__format_F_list_grad(entry['F_list_grad'])
+            self.__F_list      = F_list
+            self.__F_list_grad = F_list_grad
+            return F_list,F_list_grad
+        if self.__is_current_state(key):
+            self.__DLLM_solver.run_adjoint()
+            F_list      = self.__format_F_list(self.__DLLM_solver.get_F_list())
+            F_list_grad = self.__format_F_list_grad(self.__DLLM_solver.get_dF_list_dchi())
+            self.__F_list      = F_list
+            self.__F_list_grad = F_list_grad
+        else:
+            self.__update_x(x, key)
+            F_list,F_list_grad = self.analysis_and_grad()
+        self.__store_cache_entry(key, grad=True)
         return F_list,F_list_grad
     
     def analysis(self):
@@ -164,10 +299,8 @@ class DLLMWrapper():
             print self.__wing_param
         self.__DLLM_solver.run_direct()
         self.__DLLM_solver.run_post()
-        F_list = self.__DLLM_solver.get_F_list()
-        self.__DLLM_solver.export_F_list()
-        if self.__out_format == 'list':
-            F_list=F_list.tolist()
+        self.__export(post=True)
+        F_list = self.__format_F_list(self.__DLLM_solver.get_F_list())
         self.__F_list = F_list
         return F_list
     
@@ -177,10 +310,8 @@ class DLLMWrapper():
         self.__DLLM_solver.run_direct()
         self.__DLLM_solver.run_post()
         self.__DLLM_solver.run_adjoint()
-        F_list_grad=self.__DLLM_solver.get_dF_list_dchi()
-        self.__DLLM_solver.export_dF_list_dchi()
-        if self.__grad_format == 'numpy':
-            F_list_grad=numpy.array(F_list_grad)
+        self.__export(adjoint=True)
+        F_list_grad = self.__format_F_list_grad(self.__DLLM_solver.get_dF_list_dchi())
         self.__F_list_grad = F_list_grad
         return F_list_grad
     
@@ -190,18 +321,81 @@ class DLLMWrapper():
         self.__DLLM_solver.run_direct()
         self.__DLLM_solver.run_post()
         self.__DLLM_solver.run_adjoint()
-        F_list = self.__DLLM_solver.get_F_list()
-        F_list_grad=self.__DLLM_solver.get_dF_list_dchi()
-        self.__DLLM_solver.export_F_list()
-        self.__DLLM_solver.export_dF_list_dchi()
-        if self.__out_format == 'list':
-            F_list=F_list.tolist()
-        if self.__grad_format == 'numpy':
-            F_list_grad=numpy.array(F_list_grad)
+        self.__export(post=True, adjoint=True)
+        F_list      = self.__format_F_list(self.__DLLM_solver.get_F_list())
+        F_list_grad = self.__format_F_list_grad(self.__DLLM_solver.get_dF_list_dchi())
         self.__F_list = F_list
         self.__F_list_grad = F_list_grad
         return F_list,F_list_grad
     
+    def __export(self, post=False, adjoint=False):
+        """
+        Legacy text output of the analysis methods: circulation, and functions or gradients files
+        """
+        if self.__export_sink is None:
+            return
+        self.__export_sink.write_direct(self.__DLLM_solver)
+        if post:
+            self.__export_sink.write_post(self.__DLLM_solver)
+        if adjoint:
+            self.__export_sink.write_adjoint(self.__DLLM_solver)
+    
+    #-- Batch methods
+    def run_batch(self, X, nb_workers=None):
+        """
+        Evaluate the functions for each design vector of X, shape (n_designs, ndv).
+        Return an array of shape (n_designs, nF).
+        """
+        X = numpy.atleast_2d(X)
+        F_array = numpy.zeros((X.shape[0], len(self.get_F_list_names())))
+        for j, F_list in self.iter_run_batch(X, nb_workers=nb_workers):
+            F_array[j,:] = F_list
+        return F_array
+    
+    def run_and_grad_batch(self, X, nb_workers=None):
+        """
+        Evaluate the functions and gradients for each design vector of X, shape (n_designs, ndv).
+        Return arrays of shape (n_designs, nF) and (n_designs, nF, ndv).
+        """
+        X = numpy.atleast_2d(X)
+        nF = len(self.get_F_list_names())
+        F_array      = numpy.zeros((X.shape[0], nF))
+        F_grad_array = numpy.zeros((X.shape[0], nF, X.shape[1]))
+        for j, F_list, F_list_grad in self.iter_run_and_grad_batch(X, nb_workers=nb_workers):
+            F_array[j,:]        = F_list
+            F_grad_array[j,:,:] = F_list_grad
+        return F_array, F_grad_array
+    
+    def iter_run_batch(self, X, nb_workers=None):
+        """
+        Generator of (j, F_list) for the design vectors X[j], in completion order
+        """
+        for j, F_list, F_list_grad in self.__iter_batch('run', X, nb_workers):
+            yield j, F_list
+    
+    def iter_run_and_grad_batch(self, X, nb_workers=None):
+        """
+        Generator of (j, F_list, F_list_grad) for the design vectors X[j], in completion order
+        """
+        return self.__iter_batch('run_and_grad', X, nb_workers)
+    
+    def close(self):
+        """
+        Stop the batch workers, a new pool is forked by the next batch evaluation
+        """
+        if self.__worker_list is None:
+            return
+        for worker in self.__worker_list:
+            self.__task_queue.put(None)
+        for worker in self.__worker_list:
+            worker.join()
+        self.__worker_list  = None
+        self.__task_queue   = None
+        self.__result_queue = None
+        
+    def flush_sink(self):
+        self.__DLLM_solver.flush_sink()
+    
     def export_results(self):
         fid=open(self.__tag+'.res.dat','w')
         res=[self.__F_list,self.__F_list_grad]
@@ -216,6 +410,177 @@ class DLLMWrapper():
         self.__F_list_grad=res[1]
         
     #-- Private methods
+    def __iter_batch(self, method, X, nb_workers):
+        """
+        Evaluate the design vectors of X on the pool of batch workers and yield the results in completion order.
+        Only a window of designs is in flight so that results are never accumulated.
+        """
+        ERROR_MSG=self.ERROR_MSG+'__iter_batch: '
+        X         = numpy.atleast_2d(X)
+        n_designs = X.shape[0]
+        if nb_workers is None:
+            nb_workers = multiprocessing.cpu_count()
+        if self.__worker_list is not None and len(self.__worker_list) != nb_workers:
+            self.close()
+        if self.__worker_list is None:
+            self.__start_workers(nb_workers)
+        window    = 2*nb_workers
+        submitted = 0
+        received  = 0
+        try:
+            while submitted < min(n_designs, window):
+                self.__task_queue.put((submitted, method, X[submitted]))
+                submitted += 1
+            while received < n_designs:
+                j, error, F_list, F_list_grad = self.__get_result(ERROR_MSG)
+                received += 1
+                if error is not None:
+                    raise Exception(ERROR_MSG+method+' failed for design '+str(j)+': '+error)
+                if submitted < n_designs:
+                    self.__task_queue.put((submitted, method, X[submitted]))
+                    submitted += 1
+                yield j, F_list, F_list_grad
+        finally:
+            # results still in flight would be read by the next batch, an aborted pool is dropped with them
+            if self.__worker_list is not None:
+                for k in xrange(submitted-received):
+                    self.__get_result(ERROR_MSG)
+                    
+    def __start_workers(self, nb_workers):
+        self.__task_queue   = multiprocessing.Queue()
+        self.__result_queue = multiprocessing.Queue()
+        self.__worker_list  = []
+        for k in xrange(nb_workers):
+            worker = multiprocessing.Process(target=self.__batch_worker, args=(self.__task_queue, self.__result_queue),
+                                             name='worker'+str(k))
+            worker.daemon = True
+            worker.start()
+            self.__worker_list.append(worker)
+            
+    def __abort_workers(self):
+        """
+        Drop a pool that lost a worker or timed out: the designs in flight are lost
+        """
+        for worker in self.__worker_list:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+        self.__worker_list  = None
+        self.__task_queue   = None
+        self.__result_queue = None
+        
+    def __get_result(self, ERROR_MSG):
+        """
+        Wait for the next batch result, checking that the workers are still alive
+        """
+        waited = 0.
+        while True:
+            try:
+                return self.__result_queue.get(timeout=self.POLL_TIME)
+            except Queue.Empty:
+                waited += self.POLL_TIME
+            nb_dead = len([worker for worker in self.__worker_list if not worker.is_alive()])
+            if nb_dead > 0:
+                self.__abort_workers()
+                raise Exception(ERROR_MSG+str(nb_dead)+' worker(s) died, the pool is restarted at the next batch')
+            if self.__timeout is not None and waited >= self.__timeout:
+                self.__abort_workers()
+                raise Exception(ERROR_MSG+'no result after '+str(self.__timeout)+' s, the pool is restarted at the next batch')
+    
+    def __batch_worker(self, task_queue, result_queue):
+        self.set_worker(multiprocessing.current_process().name)
+        while True:
+            task = task_queue.get()
+            if task is None:
+                self.flush_sink()
+                break
+            j, method, x = task
+            try:
+                if method == 'run_and_grad':
+                    F_list, F_list_grad = self.run_and_grad(x)
+                    F_list_grad = numpy.array(F_list_grad)
+                else:
+                    F_list      = self.run(x)
+                    F_list_grad = None
+                result_queue.put((j, None, numpy.array(F_list), F_list_grad))
+            except BaseException, e:
+                # SystemExit raised by the geometry checks included: the parent always gets an answer
+                result_queue.put((j, e.__class__.__name__+': '+str(e), None, None))
+                if not isinstance(e, (Exception, SystemExit)):
+                    raise
+    
+    def __format_F_list(self, F_list):
+        if self.__out_format == 'list':
+            return F_list.tolist()
+        return F_list.copy()
+    
+    def __format_F_list_grad(self, F_list_grad):
+        if self.__grad_format == 'list':
+            return F_list_grad.tolist()
+        return F_list_grad.copy()
+    
+    def __update_x(self, x, key):
+        self.__wing_param.update_from_x_list(x)
+        self.__DLLM_solver.set_geom(self.__wing_param)
+        self.__x_state      = key
+        self.__solver_stale = False
+        
+    def __update_x_from_cache(self, x, key):
+        """
+        The results for x come from the cache: the geometry follows x and the solver is only recomputed if accessed
+        """
+        if self.__x_state != key:
+            self.__update_x(x, key)
+        self.__solver_stale = not self.__DLLM_solver.is_post_computed()
+    
+    def __reset_state(self):
+        self.clear_cache()
+        self.__x_state      = None
+        self.__solver_stale = False
+        # the batch workers hold a copy of the previous state
+        self.close()
+    
+    def __is_current_state(self, key):
+        return self.__x_state == key and self.__DLLM_solver.is_post_computed()
+    
+    #-- Cache methods
+    def __get_cache_key(self, x):
+        return numpy.array(x, dtype=float).tostring()
+    
+    def __get_cache_entry(self, key):
+        entry = self.__cache.get(key)
+        if entry is not None:
+            # most recently used entries are at the end
+            del self.__cache[key]
+            self.__cache[key] = entry
+        elif self.__store is not None and self.__OC_in_config:
+            entry = self.__store.get(self.__store.get_key(self.__config_dict, numpy.fromstring(key)))
+            if entry is not None and self.__cache_size > 0:
+                self.__cache[key] = entry
+                while len(self.__cache) > self.__cache_size:
+                    self.__cache.popitem(last=False)
+        return entry
+    
+    def __store_cache_entry(self, key, grad=False):
+        """
+        Store the current solver results for the design vector key: functions, gradients if computed and converged iAoA.
+        The results are also written in the persistent store if any.
+        """
+        entry = self.__cache.pop(key, None)
+        if entry is None:
+            entry = {'F_list':None, 'F_list_grad':None, 'iAoA':None}
+        entry['F_list'] = self.__DLLM_solver.get_F_list().copy()
+        entry['iAoA']   = self.__DLLM_solver.get_iAoA().copy()
+        if grad:
+            entry['F_list_grad'] = numpy.array(self.__DLLM_solver.get_dF_list_dchi())
+        if self.__store is not None and self.__OC_in_config:
+            self.__store.put(self.__store.get_key(self.__config_dict, numpy.fromstring(key)), entry)
+        if self.__cache_size <= 0:
+            return
+        self.__cache[key] = entry
+        while len(self.__cache) > self.__cache_size:
+            self.__cache.popitem(last=False)
+    
     def __config_OC(self):
         """
         Set up the 
@@ -298,11 +663,24 @@ class DLLMWrapper():
             max_iterations = self.__config_dict[max_iterations_key]
             self.__DLLM_solver.set_max_iterations(max_iterations)
         
+        F_tolerance_key = self.__tag+'.DLLM.F_tolerance'
+        if F_tolerance_key in input_keys:
+            F_tolerance = self.__config_dict[F_tolerance_key]
+            self.__DLLM_solver.set_F_tolerance(F_tolerance)
+        
         gamma_file_name_key = self.__tag+'.DLLM.gamma_file_name'
         if gamma_file_name_key in input_keys:
             gamma_file_name = self.__config_dict[gamma_file_name_key]
             self.__DLLM_solver.set_gamma_file_name(gamma_file_name)
             
+        sink_key = self.__tag+'.DLLM.sink'
+        if sink_key in input_keys:
+            sink = self.__config_dict[sink_key]
+            self.__DLLM_solver.set_sink(sink)
+            self.__export_sink = None
+        else:
+            self.__export_sink = DLLMTextSink()
+            
         F_list_names_key = self.__tag+'.DLLM.F_list_names'
         if F_list_names_key in input_keys:
             F_list_names = self.__config_dict[F_list_names_key]
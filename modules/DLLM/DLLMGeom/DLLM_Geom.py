@@ -28,6 +28,7 @@ import string
 import numpy as np
 from DLLM.polarManager.analyticAirfoil import AnalyticAirfoil
 from DLLM.polarManager.MetaAirfoil import MetaAirfoil
+from DLLM.DLLMGeom.DLLM_Sections import DLLM_Sections
 from numpy import zeros
 from numpy import pi, sqrt, cos, sin
 from copy import deepcopy
@@ -36,6 +37,8 @@ import matplotlib.pylab as plt
 class DLLM_Geom(object):
     ERROR_MSG = 'ERROR in DLLM_Geom.'
     POS_DISTRIB = ['linear', 'cos_law']
+    # geometric quantities whose changes are tracked, values and gradients together
+    TRACKED_QUANTITIES = ['eta', 'chords', 'rel_thicks', 'sweep', 'twist']
     
     def __init__(self, tag, n_sect=20, grad_active=False):
         """
@@ -98,7 +101,11 @@ class DLLM_Geom(object):
         self.__airfoil_type        = None# for future use in case of meta airfoil with dynamic number of parameters
         self.__ref_airfoil         = None # reference airfoil, only used if the same airfoil is put for all sections
         self.__airfoils            = None # Airfoil list for each section
-        self.__linked_airfoils     = None # Airfoil scaled to the the planform
+        self.__sections            = None # Sections data scaled to the planform, stored as arrays
+        
+        #-- Change tracking: version of each tracked quantity, incremented by the setters when the value changes
+        self.__versions            = dict.fromkeys(self.TRACKED_QUANTITIES, 0)
+        self.__updated_versions    = {} # versions used by the last update
         
     # -- Accessors
     def get_tag(self):
@@ -190,8 +197,32 @@ class DLLM_Geom(object):
     def get_airfoil_type(self):
         return self.__airfoil_type
     
-    def get_linked_airfoils(self):
-        return self.__linked_airfoils
+    def get_sections(self):
+        return self.__sections
+    
+    def get_shared_data(self):
+        """
+        Read-only polar data of the airfoils of the wing, shared by the copies of the wing
+        """
+        airfoils = []
+        if self.__ref_airfoil is not None:
+            airfoils.append(self.__ref_airfoil)
+        if self.__airfoils is not None:
+            airfoils += self.__airfoils
+        if self.__sections is not None:
+            airfoils.append(self.__sections.get_model())
+        shared_data = []
+        for airfoil in airfoils:
+            for data in airfoil.get_shared_data():
+                if not any([data is known for known in shared_data]):
+                    shared_data.append(data)
+        return shared_data
+    
+    def get_version(self, quantity):
+        """
+        Version number of a tracked quantity, it changes each time the quantity or its gradient is set to a different value
+        """
+        return self.__versions[quantity]
     
     #-- Setters
     def set_tag(self, tag):
@@ -229,36 +260,46 @@ class DLLM_Geom(object):
         self.__AoA_grad = AoA_grad
     
     def set_twist(self, twist):
+        self.__track('twist', self.__twist, twist)
         self.__twist = twist
         
     def set_twist_grad(self, twist_grad):
+        self.__track('twist', self.__twist_grad, twist_grad)
         self.__twist_grad = twist_grad
         
     def set_thetaY(self, thetaY):
         self.__thetaY = thetaY
         
     def set_chords_eta(self, chords_eta):
+        self.__track('chords', self.__chords_eta, chords_eta)
         self.__chords_eta = chords_eta
         
     def set_chords_grad_eta(self, chords_grad_eta):
+        self.__track('chords', self.__chords_grad_eta, chords_grad_eta)
         self.__chords_grad_eta = chords_grad_eta
         
     def set_rel_thicks_eta(self, rel_thicks_eta):
+        self.__track('rel_thicks', self.__rel_thicks_eta, rel_thicks_eta)
         self.__rel_thicks_eta = rel_thicks_eta
         
     def set_rel_thicks_grad_eta(self, rel_thicks_grad_eta):
+        self.__track('rel_thicks', self.__rel_thicks_grad_eta, rel_thicks_grad_eta)
         self.__rel_thicks_grad_eta = rel_thicks_grad_eta
         
     def set_sweep_eta(self, sweep_eta):
-        self.__sweep_eta = sweep_eta 
+        self.__track('sweep', self.__sweep_eta, sweep_eta)
+        self.__sweep_eta = sweep_eta
         
     def set_sweep_grad_eta(self, sweep_grad_eta):
+        self.__track('sweep', self.__sweep_grad_eta, sweep_grad_eta)
         self.__sweep_grad_eta = sweep_grad_eta
         
     def set_eta(self, eta):
-        self.__eta = eta 
+        self.__track('eta', self.__eta, eta)
+        self.__eta = eta
         
     def set_eta_grad(self, eta_grad):
+        self.__track('eta', self.__eta_grad, eta_grad)
         self.__eta_grad = eta_grad
         
     def set_airfoil_type(self, airfoil_type):
@@ -274,6 +315,8 @@ class DLLM_Geom(object):
             self.__airfoils = None
         else:
             self.__airfoils = airfoils
+        # sections store is rebuilt for the new airfoils
+        self.__sections = None
 
     #-- Methods     
     def build_r_lists(self, n_sect=None):
@@ -324,11 +367,21 @@ class DLLM_Geom(object):
         return airfoil
     
     def update(self):
+        """
+        Update the sections data, only the quantities that changed since the last update are recomputed
+        """
+        if self.__sections is None:
+            changed = self.TRACKED_QUANTITIES
+        else:
+            changed = [quantity for quantity in self.TRACKED_QUANTITIES
+                       if self.__versions[quantity] != self.__updated_versions.get(quantity)]
         self.__check_thetaY()
-        self.__build_data_from_eta()
+        self.__build_data_from_eta(changed)
         self.__check_airfoils_inputs()
-        self.__link_airfoils_to_geom()
-        self.__compute_Sref_Lref_AR_fuel() 
+        self.__link_airfoils_to_geom(changed)
+        if 'eta' in changed or 'chords' in changed or 'rel_thicks' in changed:
+            self.__compute_Sref_Lref_AR_fuel()
+        self.__updated_versions = dict(self.__versions)
         
     def plot(self, prefix=None):
         N = self.get_n_sect()
@@ -447,51 +500,62 @@ class DLLM_Geom(object):
         if self.__thetaY is None:
             self.__thetaY = zeros(N)
             
-    def __build_data_from_eta(self):
-        N = self.get_n_sect()
-        ndv = self.get_ndv()
-        self.__XYZ      = np.zeros((3,N))
-        self.__chords      = np.zeros(N)
-        self.__rel_thicks      = np.zeros(N)
-        self.__sweep      = np.zeros(N)
-        
-        self.__XYZ[:,:] = 0.5*(self.__eta[:,:-1]+self.__eta[:,1:])
-        self.__chords[:] = 0.5*(self.__chords_eta[:-1]+self.__chords_eta[1:])
-        self.__rel_thicks[:] = 0.5*(self.__rel_thicks_eta[:-1]+self.__rel_thicks_eta[1:])
-        self.__sweep[:]      = 0.5*(self.__sweep_eta[:-1]+self.__sweep_eta[1:])
-        
+    def __build_data_from_eta(self, changed):
         grad_active = self.get_grad_active()
-        if grad_active:
-            ndv = self.get_ndv()
-            self.__XYZ_grad = np.zeros((3,N,ndv))
-            self.__chords_grad = np.zeros((N,ndv))
-            self.__rel_thicks_grad = np.zeros((N,ndv))
-            self.__sweep_grad = np.zeros((N,ndv))
-            self.__XYZ_grad[:,:,:] = 0.5*(self.__eta_grad[:,:-1,:]+self.__eta_grad[:,1:,:])
-            self.__chords_grad[:,:] = 0.5*(self.__chords_grad_eta[:-1,:]+self.__chords_grad_eta[1:,:])
-            self.__rel_thicks_grad[:,:] = 0.5*(self.__rel_thicks_grad_eta[:-1]+self.__rel_thicks_grad_eta[1:]) 
-            self.__sweep_grad[:] = 0.5*(self.__sweep_grad_eta[:-1,:]+self.__sweep_grad_eta[1:,:])
+        # sections data are the mean of the values at the mesh points
+        if 'eta' in changed:
+            self.__XYZ = 0.5*(self.__eta[:,:-1]+self.__eta[:,1:])
+            if grad_active:
+                self.__XYZ_grad = 0.5*(self.__eta_grad[:,:-1,:]+self.__eta_grad[:,1:,:])
+        if 'chords' in changed:
+            self.__chords = 0.5*(self.__chords_eta[:-1]+self.__chords_eta[1:])
+            if grad_active:
+                self.__chords_grad = 0.5*(self.__chords_grad_eta[:-1,:]+self.__chords_grad_eta[1:,:])
+        if 'rel_thicks' in changed:
+            self.__rel_thicks = 0.5*(self.__rel_thicks_eta[:-1]+self.__rel_thicks_eta[1:])
+            if grad_active:
+                self.__rel_thicks_grad = 0.5*(self.__rel_thicks_grad_eta[:-1]+self.__rel_thicks_grad_eta[1:])
+        if 'sweep' in changed:
+            self.__sweep = 0.5*(self.__sweep_eta[:-1]+self.__sweep_eta[1:])
+            if grad_active:
+                self.__sweep_grad = 0.5*(self.__sweep_grad_eta[:-1,:]+self.__sweep_grad_eta[1:,:])
 
-    def __link_airfoils_to_geom(self):
-        ### ---- A modifier pour twist + modif DLLM Direct
+    def __link_airfoils_to_geom(self, changed):
         grad_active = self.get_grad_active()
-        self.__linked_airfoils = []
-        for i in range(self.__n_sect):
-            LLoc, LLoc_grad, SLoc, SLoc_grad = self.__compute_local_info(i)
-            linked_af = self.__airfoils[i].get_scaled_copy(Sref=SLoc, Lref=LLoc)
-            linked_af.set_rel_thick(self.__rel_thicks[i])
-            linked_af.set_sweep(self.__sweep[i])
-            linked_af.set_twist(self.__twist[i])
+        if self.__sections is None:
+            self.__sections = DLLM_Sections(self.__tag, self.__airfoils, grad_active=grad_active)
+        sections = self.__sections
+        if 'eta' in changed or 'chords' in changed:
+            LLoc, LLoc_grad, SLoc, SLoc_grad = self.__compute_local_info()
+            sections.set_chords(self.__chords)
+            sections.set_Lref(LLoc)
+            sections.set_Sref(SLoc)
             if grad_active:
-                linked_af.set_Sref_grad(SLoc_grad)
-                linked_af.set_Lref_grad(LLoc_grad)
-                linked_af.set_rel_thick_grad(self.__rel_thicks_grad[i])
-                linked_af.set_sweep_grad(self.__sweep_grad[i])
-                linked_af.set_twist_grad(self.__twist_grad[i])
-
-            self.__linked_airfoils.append(linked_af)
+                sections.set_chords_grad(self.__chords_grad)
+                sections.set_Lref_grad(LLoc_grad)
+                sections.set_Sref_grad(SLoc_grad)
+        if 'rel_thicks' in changed:
+            sections.set_rel_thicks(self.__rel_thicks)
+            if grad_active:
+                sections.set_rel_thicks_grad(self.__rel_thicks_grad)
+        if 'sweep' in changed:
+            sections.set_sweep(self.__sweep)
+            if grad_active:
+                sections.set_sweep_grad(self.__sweep_grad)
+        if 'twist' in changed:
+            sections.set_twist(self.__twist)
+            if grad_active:
+                sections.set_twist_grad(self.__twist_grad)
             
     #-- Private methods
+    def __track(self, quantity, old, new):
+        """
+        Increment the version of quantity if new differs from old. Arrays set again after an in place modification
+        cannot be compared and are considered as changed.
+        """
+        if old is None or old is new or not np.array_equal(old, new):
+            self.__versions[quantity] += 1
+        
     def __check_airfoils_inputs(self):
         ERROR_MSG = self.ERROR_MSG + \
             '__check_airfoils_inputs: ' + str(self.__tag) + ': '
@@ -506,15 +570,15 @@ class DLLM_Geom(object):
         if not checked:
             sys.exit(1)
 
-    def __compute_local_info(self, i):
-        LLoc = self.__chords[i]
-        SLoc = LLoc * (self.__eta[1, i + 1] - self.__eta[1, i])
+    def __compute_local_info(self):
+        LLoc = self.__chords
+        SLoc = LLoc * (self.__eta[1, 1:] - self.__eta[1, :-1])
             
         grad_active = self.get_grad_active()
         if grad_active:
-            LLoc_grad = self.__chords_grad[i]
-            SLoc_grad = LLoc_grad * (self.__eta[1, i + 1] - self.__eta[1, i]) + \
-                LLoc * (self.__eta_grad[1, i + 1, :] - self.__eta_grad[1, i, :])
+            LLoc_grad = self.__chords_grad
+            SLoc_grad = LLoc_grad * (self.__eta[1, 1:] - self.__eta[1, :-1])[:, np.newaxis] + \
+                LLoc[:, np.newaxis] * (self.__eta_grad[1, 1:, :] - self.__eta_grad[1, :-1, :])
         else:
             LLoc_grad = None
             SLoc_grad = None
@@ -523,41 +587,31 @@ class DLLM_Geom(object):
     
     def __compute_Sref_Lref_AR_fuel(self):
         """
-        Compute Lref and Sref from airfoils information, ToC and AR
+        Compute Lref and Sref from sections information, ToC and AR
         """
         N = self.get_n_sect()
+        SLoc = self.__sections.get_Sref()
+        LLoc = self.__sections.get_Lref()
 
         span      = self.__eta[1,-1]-self.__eta[1,0]
 
-        self.__Sref = 0.
-        self.__Lref = 0.
-        self.__fuel = 0.
-
-        for i, af in enumerate(self.__linked_airfoils):
-            self.__Sref += af.get_Sref()
-            self.__Lref += af.get_Lref()
-            self.__fuel += self.__rel_thicks[i] * \
-                self.__chords[i] * af.get_Sref() * 0.5
-
-        self.__Lref /= N
+        self.__Sref = np.sum(SLoc)
+        self.__Lref = np.sum(LLoc)/N
+        self.__fuel = np.sum(self.__rel_thicks*self.__chords*SLoc)*0.5
         self.__AR = span**2 / self.__Sref
                  
         grad_active = self.get_grad_active()
         if grad_active:
-            ndv=self.get_ndv()
+            SLoc_grad = self.__sections.get_Sref_grad()
+            LLoc_grad = self.__sections.get_Lref_grad()
             span_grad = self.__eta_grad[1,-1,:]-self.__eta_grad[1,0,:]
-            self.__Sref_grad = zeros(ndv)
-            self.__Lref_grad = zeros(ndv)
-            self.__fuel_grad = zeros(ndv)
-            for i, af in enumerate(self.__linked_airfoils):
-                self.__Sref_grad += af.get_Sref_grad()
-                self.__Lref_grad += af.get_Lref_grad()
-                self.__fuel_grad += self.__rel_thicks_grad[i] * self.__chords[i] * af.get_Sref() * 0.5\
-                    + self.__rel_thicks[i] * self.__chords_grad[i] * af.get_Sref() * 0.5\
-                    + self.__rel_thicks[i] * self.__chords[i] * af.get_Sref_grad() * 0.5
-                self.__Lref_grad /= N
-                self.__AR_grad = (2. * span * span_grad *
-                          self.__Sref - span**2 * self.__Sref_grad) / self.__Sref**2
+            self.__Sref_grad = np.sum(SLoc_grad, axis=0)
+            self.__Lref_grad = np.sum(LLoc_grad, axis=0)/N
+            self.__fuel_grad = 0.5*(np.dot(self.__chords*SLoc, self.__rel_thicks_grad)
+                                   +np.dot(self.__rel_thicks*SLoc, self.__chords_grad)
+                                   +np.dot(self.__rel_thicks*self.__chords, SLoc_grad))
+            self.__AR_grad = (2. * span * span_grad *
+                              self.__Sref - span**2 * self.__Sref_grad) / self.__Sref**2
             
     def __repr__(self):
         info_string = '\n*** Wing Geom Information ***'
@@ -0,0 +1,219 @@
+# -*-mode: python; py-indent-offset: 4; tab-width: 8; coding: iso-8859-1 -*-
+#  DLLM (non-linear Differentiated Lifting Line Model, open source software)
+#
+#  Copyright (C) 2013-2015 Airbus Group SAS
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+#  https://github.com/matthieu-meaux/DLLM.git
+#
+# @author : Matthieu MEAUX
+#
+
+# - Local imports -
+import numpy as np
+from numpy import zeros
+
+class DLLM_Sections(object):
+    """
+    Span-wise sections of the wing stored as arrays: planform data of size N, gradients of size (N, ndv)
+    and aerodynamic coefficients of all sections computed at once by a batch airfoil model
+    """
+    ERROR_MSG = 'ERROR in DLLM_Sections.'
+
+    def __init__(self, tag, airfoils, grad_active=False):
+        """
+        Constructor
+        @param airfoils : list of the airfoils of each section, the first one defines the airfoil model
+        """
+        self.__tag         = tag
+        self.__grad_active = grad_active
+        self.__n_sect      = len(airfoils)
+
+        #-- Sections data
+        self.__chords          = None
+        self.__chords_grad     = None
+
+        self.__Lref            = None
+        self.__Lref_grad       = None
+
+        self.__Sref            = None
+        self.__Sref_grad       = None
+
+        self.__rel_thicks      = None
+        self.__rel_thicks_grad = None
+
+        self.__sweep           = None
+        self.__sweep_grad      = None
+
+        self.__twist           = None
+        self.__twist_grad      = None
+
+        #-- Airfoil model used for the evaluation of all sections at once
+        self.__model = airfoils[0].get_batch_copy(airfoils, Sref=zeros(self.__n_sect), Lref=zeros(self.__n_sect))
+
+        #-- Sections aerodynamic coefficients and gradients
+        self.Cl          = None
+        self.dCl_dAoA    = None
+        self.dCl_dchi    = None
+
+        self.Cdw         = None
+        self.dCdw_dAoA   = None
+        self.dCdw_dchi   = None
+
+        self.Cdvp        = None
+        self.dCdvp_dAoA  = None
+        self.dCdvp_dchi  = None
+
+        self.Cdf         = None
+        self.dCdf_dAoA   = None
+        self.dCdf_dchi   = None
+
+        self.pcop        = zeros(self.__n_sect)
+
+        self.gamma       = None
+        self.dgamma_dAoA = None
+        self.dgamma_dchi = None
+
+    #-- Accessors
+    def get_tag(self):
+        return self.__tag
+
+    def get_grad_active(self):
+        return self.__grad_active
+
+    def get_n_sect(self):
+        return self.__n_sect
+
+    def get_model(self):
+        return self.__model
+
+    def get_chords(self):
+        return self.__chords
+
+    def get_chords_grad(self):
+        return self.__chords_grad
+
+    def get_Lref(self):
+        return self.__Lref
+
+    def get_Lref_grad(self):
+        return self.__Lref_grad
+
+    def get_Sref(self):
+        return self.__Sref
+
+    def get_Sref_grad(self):
+        return self.__Sref_grad
+
+    def get_rel_thicks(self):
+        return self.__rel_thicks
+
+    def get_rel_thicks_grad(self):
+        return self.__rel_thicks_grad
+
+    def get_sweep(self):
+        return self.__sweep
+
+    def get_sweep_grad(self):
+        return self.__sweep_grad
+
+    def get_twist(self):
+        return self.__twist
+
+    def get_twist_grad(self):
+        return self.__twist_grad
+
+    #-- Setters: the model shares the arrays of the store, no copy is done
+    def set_chords(self, chords):
+        self.__chords = chords
+
+    def set_chords_grad(self, chords_grad):
+        self.__chords_grad = chords_grad
+
+    def set_Lref(self, Lref):
+        self.__Lref = Lref
+        self.__model.set_Lref(Lref)
+
+    def set_Lref_grad(self, Lref_grad):
+        self.__Lref_grad = Lref_grad
+        self.__model.set_Lref_grad(Lref_grad)
+
+    def set_Sref(self, Sref):
+        self.__Sref = Sref
+        self.__model.set_Sref(Sref)
+
+    def set_Sref_grad(self, Sref_grad):
+        self.__Sref_grad = Sref_grad
+        self.__model.set_Sref_grad(Sref_grad)
+
+    def set_rel_thicks(self, rel_thicks):
+        self.__rel_thicks = rel_thicks
+        self.__model.set_rel_thick(rel_thicks)
+
+    def set_rel_thicks_grad(self, rel_thicks_grad):
+        self.__rel_thicks_grad = rel_thicks_grad
+        self.__model.set_rel_thick_grad(rel_thicks_grad)
+
+    def set_sweep(self, sweep):
+        self.__sweep = sweep
+        self.__model.set_sweep(sweep)
+
+    def set_sweep_grad(self, sweep_grad):
+        self.__sweep_grad = sweep_grad
+        self.__model.set_sweep_grad(sweep_grad)
+
+    def set_twist(self, twist):
+        self.__twist = twist
+        self.__model.set_twist(twist)
+
+    def set_twist_grad(self, twist_grad):
+        self.__twist_grad = twist_grad
+        self.__model.set_twist_grad(twist_grad)
+
+    #-- Methods
+    def compute(self, AoA, Mach):
+        """
+        Compute the aerodynamic coefficients and circulation of all sections
+        @param AoA : array of local angles of attack
+        """
+        model = self.__model
+        model.compute_batch(AoA, Mach)
+
+        self.Cl          = model.Cl
+        self.dCl_dAoA    = model.dCl_dAoA
+        self.Cdw         = model.Cdw
+        self.dCdw_dAoA   = model.dCdw_dAoA
+        self.Cdvp        = model.Cdvp
+        self.dCdvp_dAoA  = model.dCdvp_dAoA
+        self.Cdf         = model.Cdf
+        self.dCdf_dAoA   = model.dCdf_dAoA
+        # pcop is a scalar for models with a constant center of pressure
+        self.pcop[:]     = model.pcop
+        self.gamma       = model.gamma
+        self.dgamma_dAoA = model.dgamma_dAoA
+
+        if self.__grad_active:
+            self.dCl_dchi    = model.dCl_dchi
+            self.dCdw_dchi   = model.dCdw_dchi
+            self.dCdvp_dchi  = model.dCdvp_dchi
+            self.dCdf_dchi   = model.dCdf_dchi
+            self.dgamma_dchi = model.dgamma_dchi
+
+    def __repr__(self):
+        info_string = '\n*** Wing Sections Information ***'
+        info_string += '\n  n_sect       : ' + str(self.get_n_sect())
+        info_string += '\n  model        : ' + str(self.__model.__class__.__name__)
+        return info_string
@@ -82,87 +82,60 @@ class Wing_Broken(DLLM_param):
         tip_height_grad   = tip_height_pt.get_gradient()
         
         #-- Build and set twist arrays
-        twist = np.zeros(N)
-        twist_grad = np.zeros((N, ndv))
-        for i in xrange(N / 2):
-            pt1 = self.BC_manager.get_pt('twist'+str(N / 2 - 1 - i))
-            twist[i] = pt1.get_value()*deg_to_rad
-            twist_grad[i,:] = pt1.get_gradient()*deg_to_rad
-            pt2 = self.BC_manager.get_pt('twist'+str(i))
-            twist[N  / 2 + i] = pt2.get_value()*deg_to_rad
-            twist_grad[N  / 2 + i,:] = pt2.get_gradient()*deg_to_rad 
+        # twist0 is the root section, the left half of the wing is the mirror of the right one
+        twist_pts       = [self.BC_manager.get_pt('twist'+str(i)) for i in xrange(N / 2)]
+        twist_half      = np.array([pt.get_value() for pt in twist_pts])*deg_to_rad
+        twist_grad_half = np.array([pt.get_gradient() for pt in twist_pts]).reshape(N / 2, ndv)*deg_to_rad
+        twist      = np.concatenate((twist_half[::-1], twist_half))
+        twist_grad = np.concatenate((twist_grad_half[::-1], twist_grad_half))
         self.set_twist(twist)
         self.set_twist_grad(twist_grad)
         
         #-- build and set sweep arrays
-        sweep_eta = np.zeros(N+1)
-        sweep_grad_eta = np.zeros((N+1,ndv))
-        sweep_eta[:]      = sweep
-        sweep_grad_eta[:] = sweep_grad
+        sweep_eta      = np.tile(sweep, N+1)
+        sweep_grad_eta = np.tile(sweep_grad, (N+1, 1))
         self.set_sweep_eta(sweep_eta)
         self.set_sweep_grad_eta(sweep_grad_eta)
         
         #-- build and set chords arrays
-        chords_eta         = np.zeros((N + 1))
-        chords_grad_eta    = np.zeros((N+ 1, ndv))
-        p = break_percent / 100.
+        # piecewise linear law between root, break and tip on r = |2.eta_y/span|, coeff is the position in each segment
+        r      = np.abs(2. * r_list_eta)
+        p      = break_percent / 100.
         p_grad = break_percent_grad / 100.
-        for i, r in enumerate(r_list_eta):
-            r = abs(2. * r)
-            if r <= p:
-                coeff = r / p
-                dcoeff = -r * p_grad[:] / p**2
-                chords_eta[i] = (break_chord - root_chord) * coeff + root_chord
-                chords_grad_eta[i, :] = (break_chord_grad[:] - root_chord_grad[:]) * coeff  \
-                    + (break_chord - root_chord) * dcoeff + root_chord_grad[:]
-            else:
-                coeff = (r - p) / (1. - p)
-                dcoeff = (r - 1) * p_grad[:] / (1. - p)**2
-                chords_eta[i] = (tip_chord - break_chord) * coeff + break_chord
-                chords_grad_eta[i, :] = (tip_chord_grad[:] - break_chord_grad[:]) * coeff  \
-                    + (tip_chord - break_chord) * dcoeff  + break_chord_grad[:]
+        inner  = r <= p
+        coeff  = np.where(inner, r / p, (r - p) / (1. - p))
+        dcoeff = np.outer(np.where(inner, -r / p**2, (r - 1.) / (1. - p)**2), p_grad)
+        
+        def piecewise_linear(root_val, root_grad, break_val, break_grad, tip_val, tip_grad):
+            val  = np.where(inner, (break_val - root_val) * coeff + root_val, (tip_val - break_val) * coeff + break_val)
+            grad = np.where(inner[:, np.newaxis],
+                            np.outer(coeff, break_grad - root_grad) + (break_val - root_val) * dcoeff + root_grad,
+                            np.outer(coeff, tip_grad - break_grad) + (tip_val - break_val) * dcoeff + break_grad)
+            return val, grad
+        
+        chords_eta, chords_grad_eta = piecewise_linear(root_chord, root_chord_grad, break_chord, break_chord_grad,
+                                                       tip_chord, tip_chord_grad)
         self.set_chords_eta(chords_eta)
         self.set_chords_grad_eta(chords_grad_eta)
 
         #********* TBC TBC TBC : DEPENDS ON AIRFOILS TYPE UNKNOWN HOW TO DEAL WITH THAT*************
         #-- build and set rel_thicks arrays (TBC: Depends on Airfoils)
-        rel_thicks_eta = np.zeros(N+1)
-        rel_thicks_grad_eta = np.zeros((N+1, ndv))
-        for i, r in enumerate(r_list_eta):
-            p = break_percent / 100.
-            p_grad = break_percent_grad / 100.
-            for i, r in enumerate(r_list_eta):
-                r = abs(2. * r)
-                if r <= p:
-                    coeff = r / p
-                    dcoeff = -r * p_grad / p**2
-                    heights_eta = ((break_height - root_height) * coeff + root_height)
-                    heights_grad_eta = (break_height_grad - root_height_grad) * coeff \
-                        + (break_height - root_height) * dcoeff + root_height_grad
-
-                else:
-                    coeff = (r - p) / (1. - p)
-                    dcoeff = (r - 1) * p_grad / (1. - p)**2
-                    heights_eta = ((tip_height - break_height) * coeff + break_height)
-                    heights_grad_eta = (tip_height_grad - break_height_grad) * coeff \
-                        + (tip_height - break_height) * dcoeff + break_height_grad
-            
-
-                rel_thicks_eta[i] = heights_eta / chords_eta[i]
-                rel_thicks_grad_eta[i] = (heights_grad_eta * chords_eta[i] - heights_eta * chords_grad_eta[i]) / (chords_eta[i])**2         
+        heights_eta, heights_grad_eta = piecewise_linear(root_height, root_height_grad, break_height, break_height_grad,
+                                                         tip_height, tip_height_grad)
+        rel_thicks_eta      = heights_eta / chords_eta
+        rel_thicks_grad_eta = (heights_grad_eta * chords_eta[:, np.newaxis] - heights_eta[:, np.newaxis] * chords_grad_eta) \
+                            / (chords_eta**2)[:, np.newaxis]
         self.set_rel_thicks_eta(rel_thicks_eta)
         self.set_rel_thicks_grad_eta(rel_thicks_grad_eta)   
 
         #-- build and set eta arrays
+        abs_r    = np.abs(r_list_eta)
         eta      = np.zeros((3, N + 1))
         eta_grad = np.zeros((3, N + 1, ndv))
-        for i, r in enumerate(r_list_eta):
-            abs_r = abs(r)
-            eta[0, i] = abs_r * span * np.sin(sweep) + 0.25 * chords_eta[i]
-            eta_grad[0, i, :] = abs_r * span_grad[:] * np.sin(sweep) + abs_r * span * np.cos(sweep) * sweep_grad[:] + 0.25 * chords_grad_eta[i,:]
-
-            eta[1, i] = r * span
-            eta_grad[1, i, :] = r * span_grad[:]
+        eta[0, :] = abs_r * span * np.sin(sweep) + 0.25 * chords_eta
+        eta_grad[0, :, :] = np.outer(abs_r, span_grad * np.sin(sweep) + span * np.cos(sweep) * sweep_grad) + 0.25 * chords_grad_eta
+        eta[1, :] = r_list_eta * span
+        eta_grad[1, :, :] = np.outer(r_list_eta, span_grad)
         
         self.set_eta(eta)
         self.set_eta_grad(eta_grad)
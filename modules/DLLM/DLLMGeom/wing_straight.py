@@ -64,57 +64,45 @@ class Wing_Straight(DLLM_param):
         tip_height_grad  = tip_height_pt.get_gradient()
         
         #-- Build and set twist arrays
-        twist = np.zeros(N)
-        twist_grad = np.zeros((N, ndv))
-        for i in xrange(N / 2):
-            pt1 = self.BC_manager.get_pt('twist'+str(N / 2 - 1 - i))
-            twist[i] = pt1.get_value()*deg_to_rad
-            twist_grad[i,:] = pt1.get_gradient()*deg_to_rad
-            pt2 = self.BC_manager.get_pt('twist'+str(i))
-            twist[N  / 2 + i] = pt2.get_value()*deg_to_rad
-            twist_grad[N  / 2 + i,:] = pt2.get_gradient()*deg_to_rad 
+        # twist0 is the root section, the left half of the wing is the mirror of the right one
+        twist_pts       = [self.BC_manager.get_pt('twist'+str(i)) for i in xrange(N / 2)]
+        twist_half      = np.array([pt.get_value() for pt in twist_pts])*deg_to_rad
+        twist_grad_half = np.array([pt.get_gradient() for pt in twist_pts]).reshape(N / 2, ndv)*deg_to_rad
+        twist      = np.concatenate((twist_half[::-1], twist_half))
+        twist_grad = np.concatenate((twist_grad_half[::-1], twist_grad_half))
         self.set_twist(twist)
         self.set_twist_grad(twist_grad)
         
         #-- build and set sweep arrays
-        sweep_eta = np.zeros(N+1)
-        sweep_grad_eta = np.zeros((N+1,ndv))
-        sweep_eta[:]      = sweep
-        sweep_grad_eta[:] = sweep_grad
+        sweep_eta      = np.tile(sweep, N+1)
+        sweep_grad_eta = np.tile(sweep_grad, (N+1, 1))
         self.set_sweep_eta(sweep_eta)
         self.set_sweep_grad_eta(sweep_grad_eta)
         
         #-- build and set chords arrays
-        chords_eta         = np.zeros((N + 1))
-        chords_grad_eta    = np.zeros((N+ 1, ndv))
-        chords_eta[:]      = root_chord
-        chords_grad_eta[:] = root_chord_grad
+        chords_eta      = np.tile(root_chord, N+1)
+        chords_grad_eta = np.tile(root_chord_grad, (N+1, 1))
         self.set_chords_eta(chords_eta)
         self.set_chords_grad_eta(chords_grad_eta)
 
         #********* TBC TBC TBC : DEPENDS ON AIRFOILS TYPE UNKNOWN HOW TO DEAL WITH THAT*************
         #-- build and set rel_thicks arrays (TBC: Depends on Airfoils)
-        rel_thicks_eta = np.zeros(N+1)
-        rel_thicks_grad_eta = np.zeros((N+1, ndv))
-        for i, r in enumerate(r_list_eta):
-                r = abs(2. * r)
-                heights_eta = (tip_height - root_height)*r + root_height
-                heights_grad_eta= (tip_height_grad - root_height_grad)*r +root_height_grad
-                rel_thicks_eta[i] = heights_eta / chords_eta[i]
-                rel_thicks_grad_eta[i] = (heights_grad_eta * chords_eta[i] - heights_eta * chords_grad_eta[i]) / (chords_eta[i])**2      
+        r                = np.abs(2. * r_list_eta)
+        heights_eta      = (tip_height - root_height) * r + root_height
+        heights_grad_eta = np.outer(r, tip_height_grad - root_height_grad) + root_height_grad
+        rel_thicks_eta      = heights_eta / root_chord
+        rel_thicks_grad_eta = (heights_grad_eta * root_chord - np.outer(heights_eta, root_chord_grad)) / root_chord**2
         self.set_rel_thicks_eta(rel_thicks_eta)
         self.set_rel_thicks_grad_eta(rel_thicks_grad_eta)   
 
         #-- build and set eta arrays
+        abs_r    = np.abs(r_list_eta)
         eta      = np.zeros((3, N + 1))
         eta_grad = np.zeros((3, N + 1, ndv))
-        for i, r in enumerate(r_list_eta):
-            abs_r = abs(r)
-            eta[0, i] = abs_r * span * np.sin(sweep) + 0.25 * root_chord
-            eta_grad[0, i, :] = abs_r * span_grad[:] * np.sin(sweep) + abs_r * span * np.cos(sweep) * sweep_grad[:] + 0.25 * root_chord_grad[:]
-
-            eta[1, i] = r * span
-            eta_grad[1, i, :] = r * span_grad[:]
+        eta[0, :] = abs_r * span * np.sin(sweep) + 0.25 * root_chord
+        eta_grad[0, :, :] = np.outer(abs_r, span_grad * np.sin(sweep) + span * np.cos(sweep) * sweep_grad) + 0.25 * root_chord_grad
+        eta[1, :] = r_list_eta * span
+        eta_grad[1, :, :] = np.outer(r_list_eta, span_grad)
         
         self.set_eta(eta)
         self.set_eta_grad(eta_grad)
@@ -23,10 +23,8 @@
 # @author : Matthieu MEAUX
 #
 
-from numpy import dot, zeros
-from numpy.linalg import norm, solve
-
-from MDOTools.Solvers.adjoint_problem import AdjointProblem
+from numpy import dot, transpose, column_stack
+from scipy.linalg import lu_factor, lu_solve
 
 class DLLMAdjoint:
     def __init__(self, LLW, verbose = 1):
@@ -40,6 +38,7 @@ class DLLMAdjoint:
         self.__adj_list           = None
         self.__adj_conv_corr_list = None
         self.__dF_list_dchi       = None
+        self.__dW_dchi            = None
         
     #-- accessors
     def get_tag(self):
@@ -53,6 +52,9 @@ class DLLMAdjoint:
     
     def get_dF_list_dchi(self):
         return self.__dF_list_dchi
+    
+    def get_dW_dchi(self):
+        return self.__dW_dchi
         
     #-- computed related methods
     def is_computed(self):
@@ -68,6 +70,9 @@ class DLLMAdjoint:
     def get_dpR_dpW(self):
         return self.__LLW.get_dpR_dpW()
     
+    def get_dpR_dpW_lu(self):
+        return self.__LLW.get_dpR_dpW_lu()
+    
     def get_dpR_dpchi(self):
         return self.__LLW.get_dpR_dpchi()
     
@@ -81,37 +86,67 @@ class DLLMAdjoint:
     def get_dpF_list_dpchi(self):
         return self.__LLW.get_dpF_list_dpchi()
     
-    #-- Run adjoint problem for each cost function
+    #-- Run adjoint problem for all cost functions at once
     def run(self):
+        """
+        Solve dpR_dpW^T.adj = -dpF_dpW^T for all functions with a single factorization of dpR_dpW
+        """
         F_list_names = self.get_F_list_names()
         
-        self.__adj_list           = []
-        self.__adj_conv_corr_list = []
-        self.__dF_list_dchi       = []
-        
         R        = self.get_R()
-        dpRdpW   = self.get_dpR_dpW()
         dpRdpchi = self.get_dpR_dpchi()
+        dpRdpW_lu = self.__get_dpR_dpW_lu()
         
         dpFdpW_list   = self.get_dpF_list_dpW()
         dpFdpchi_list = self.get_dpF_list_dpchi()
         
         if self.__verbose == 0 :
             print "Running adjoint"
-        for i, F_name in enumerate(F_list_names):
-            if self.__verbose > 0 :
-                print 'Run adjoint problem for func = '+str(F_name)
-            dpFdpW   = dpFdpW_list[i]
-            dpFdpchi = dpFdpchi_list[i]
-            
-            AdjPb = AdjointProblem(R, dpRdpW, dpRdpchi, dpFdpW, dpFdpchi)
-            AdjPb.solve()
-            
-            self.__adj_list.append(AdjPb.get_adjoint_state())
-            self.__adj_conv_corr_list.append(AdjPb.get_convergence_correction())
-            self.__dF_list_dchi.append(AdjPb.get_dFdchi())
-            
-            if self.__verbose > 0 : print '  - Convergence adjoint correction for '+str(F_name)+' = '+str(self.__adj_conv_corr_list[i])
+        
+        # one right hand side per function, adjoint states are stored by row
+        self.__adj_list           = lu_solve(dpRdpW_lu, -transpose(dpFdpW_list), trans=1).T
+        self.__adj_conv_corr_list = dot(self.__adj_list, R)
+        self.__dF_list_dchi       = dpFdpchi_list + dot(self.__adj_list, dpRdpchi)
+        self.__dW_dchi            = None
+        
+        if self.__verbose > 0 :
+            for i, F_name in enumerate(F_list_names):
+                print '  - Convergence adjoint correction for '+str(F_name)+' = '+str(self.__adj_conv_corr_list[i])
+    
+    #-- Run forward (direct) sensitivity problem for all design variables at once
+    def run_forward(self):
+        """
+        Solve dpR_dpW.dW_dchi = -dpR_dpchi, cheaper than the adjoint when ndv is lower than the number of functions
+        """
+        F_list_names = self.get_F_list_names()
+        
+        R        = self.get_R()
+        dpRdpchi = self.get_dpR_dpchi()
+        dpRdpW_lu = self.__get_dpR_dpW_lu()
+        
+        dpFdpW_list   = self.get_dpF_list_dpW()
+        dpFdpchi_list = self.get_dpF_list_dpchi()
+        
+        if self.__verbose == 0 :
+            print "Running forward sensitivity"
+        
+        # R is added as last right hand side to get the same convergence correction as the adjoint: -dpF_dpW.dpR_dpW^-1.R
+        sol = lu_solve(dpRdpW_lu, column_stack((-dpRdpchi, R)))
+        self.__dW_dchi            = sol[:,:-1]
+        self.__adj_list           = None
+        self.__adj_conv_corr_list = -dot(dpFdpW_list, sol[:,-1])
+        self.__dF_list_dchi       = dpFdpchi_list + dot(dpFdpW_list, self.__dW_dchi)
+        
+        if self.__verbose > 0 :
+            for i, F_name in enumerate(F_list_names):
+                print '  - Convergence correction for '+str(F_name)+' = '+str(self.__adj_conv_corr_list[i])
+    
+    def __get_dpR_dpW_lu(self):
+        # factorization of dpRdpW kept by the direct solver, reused for the sensitivity solves
+        dpRdpW_lu = self.get_dpR_dpW_lu()
+        if dpRdpW_lu is None:
+            dpRdpW_lu = lu_factor(self.get_dpR_dpW())
+        return dpRdpW_lu
             
     def export_dF_list_dchi(self, filename=None):    
         if filename is None:
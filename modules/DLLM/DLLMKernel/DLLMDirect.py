@@ -26,6 +26,9 @@
 import numpy as np
 from numpy import array, transpose, outer, ones, zeros, copy, divide, diag, dot
 from numpy.linalg import norm, solve
+from scipy.linalg import lu_factor, lu_solve
+from scipy.sparse import csc_matrix
+from scipy.sparse.linalg import LinearOperator, gmres
 import matplotlib.pylab as plt
 
 from MDOTools.Solvers.newton_raphson_problem import NewtonRaphsonProblem
@@ -37,12 +40,40 @@ class DLLMDirect:
     """
     DEG_TO_RAD = np.pi / 180.
     RAD_TO_DEG = 180. / np.pi
+    # design variables jacobian columns with less non zero values than this fraction of N are multiplied by K as sparse columns
+    SPARSE_COLUMNS_DENSITY = 0.25
+    # methods solved by DLLMDirect itself, other methods are passed to the Newton-Raphson problem
+    DIRECT_METHODS = ['matrix_free', 'chord', 'linear']
 
     def __init__(self, LLW, verbose = 0):
         self.__LLW = LLW
         self.__verbose = verbose
         self.__computed = False
         self.__gamma_f_name = None
+        self.__residuals_hist = None
+
+        # Newton settings
+        self.__method = None
+        self.__relax_factor = 0.99
+        self.__stop_residual = 1.e-9
+        self.__max_iterations = 100
+        # chord method: the jacobian is refactorized when the residual reduction ratio is above this value
+        self.__chord_ratio = 0.5
+        self.__dpR_dpiAoA_lu = None
+        # the factorization is the one of the jacobian at the converged iAoA of the last run
+        self.__lu_current = False
+        # linear method: factorized jacobian with the K matrix and dpgamma_dplocalAoA it was computed for
+        self.__linear_K = None
+        self.__linear_dpgamma_dplocalAoA = None
+        self.__linear_dpR_dpiAoA = None
+        self.__linear_lu = None
+        # adaptive convergence: tolerance on the error estimate of the functions, None to converge to stop_residual
+        self.__F_tolerance = None
+        self.__F_list_correction = None
+        # initial guess of the next run, None to start from iAoA=0
+        self.__iAoA0 = None
+        # sparsity structure of dpgamma_dpchi and the geometry versions it was computed for, see __K_dot_dpchi
+        self.__dpchi_structure = None
 
         # initialize local variables
         self.__init_local_variables()
@@ -61,14 +92,14 @@ class DLLMDirect:
     def get_geom(self):
         return self.__LLW.get_geom()
 
-    def get_airfoils(self):
-        return self.__LLW.get_airfoils()
+    def get_sections(self):
+        return self.__LLW.get_sections()
 
     def get_K(self):
         return self.__LLW.get_K()
 
-    def get_dK_dchi(self):
-        return self.__LLW.get_dK_dchi()
+    def comp_dK_dchi_gamma(self, gamma):
+        return self.__LLW.comp_dK_dchi_gamma(gamma)
 
     def get_N(self):
         return self.get_geom().get_n_sect()
@@ -82,6 +113,9 @@ class DLLMDirect:
     def get_iAoA(self):
         return self.__iAoA
 
+    def get_gamma(self):
+        return self.__gamma
+
     def get_localAoA(self):
         return self.__localAoA
 
@@ -91,6 +125,19 @@ class DLLMDirect:
     def get_dpR_dpiAoA(self):
         return self.__dpR_dpiAoA
 
+    def get_dpR_dpiAoA_lu(self):
+        """
+        LU factorization of get_dpR_dpiAoA() (scipy.linalg.lu_factor format), None if not available
+        """
+        return self.__dpR_dpiAoA_lu
+
+    def is_dpR_dpiAoA_lu_current(self):
+        """
+        True if get_dpR_dpiAoA_lu() is the factorization of the jacobian at the converged iAoA of the last run.
+        The chord and Newton iterations only factorize it at convergence when the gradient is active.
+        """
+        return self.__lu_current and self.is_computed()
+
     def get_dpR_dpchi(self):
         return self.__dpR_dpchi
 
@@ -112,6 +159,13 @@ class DLLMDirect:
         """
         return self.__residuals_hist
 
+    def get_F_list_correction(self):
+        """
+        First order error estimate of the post-processing functions at the last iterate of an adaptive computation,
+        None if set_F_tolerance is not used
+        """
+        return self.__F_list_correction
+
     def is_computed(self):
         return self.__computed
 
@@ -129,28 +183,74 @@ class DLLMDirect:
         self.comp_R(iAoA0)
         self.comp_dpR_dpiAoA(iAoA0)
         self.__NRPb = NewtonRaphsonProblem(iAoA0,self.comp_R,self.comp_dpR_dpiAoA,verbose = self.__verbose)
-        self.__NRPb.set_relax_factor(0.99)
-        self.__NRPb.set_stop_residual(1.e-9)
-        self.__NRPb.set_max_iterations(100)
+        self.__NRPb.set_relax_factor(self.__relax_factor)
+        self.__NRPb.set_stop_residual(self.__stop_residual)
+        self.__NRPb.set_max_iterations(self.__max_iterations)
 
     def set_relax_factor(self, relax_factor):
+        self.__relax_factor = relax_factor
         self.__NRPb.set_relax_factor(relax_factor)
 
     def set_stop_residual(self, residual):
+        self.__stop_residual = residual
         self.__NRPb.set_stop_residual(residual)
 
     def set_max_iterations(self, max_it):
+        self.__max_iterations = max_it
         self.__NRPb.set_max_iterations(max_it)
 
     def set_method(self, method):
-        self.__NRPb.set_method(method)
+        self.__method = method
+        if method not in self.DIRECT_METHODS:
+            self.__NRPb.set_method(method)
+
+    def set_chord_ratio(self, chord_ratio):
+        self.__chord_ratio = chord_ratio
+
+    def set_F_tolerance(self, F_tolerance):
+        '''
+        Adaptive convergence: the Newton iterations stop as soon as the absolute error estimate dpF_dpiAoA.diAoA of every function,
+        with diAoA the next Newton step, is below F_tolerance. This estimate is the adjoint convergence correction.
+        The 'linear' method checks it before its single step and during its Newton fallback.
+        None to converge to stop_residual only.
+        '''
+        self.__F_tolerance = F_tolerance
+
+    def set_iAoA0(self, iAoA0):
+        '''
+        Initial guess of the next run only. Warm started runs are solved by the Newton iterations of DLLMDirect,
+        with the residuals normalized by the residual at iAoA=0 so that they are converged as cold started ones.
+        '''
+        self.__iAoA0 = iAoA0
 
     #-- Computation related methods
     def run(self):
         grad_active = self.get_grad_active()
-        self.__NRPb.solve()
+        iAoA0 = self.__iAoA0
+        self.__iAoA0 = None
+        self.__F_list_correction = None
+        self.__lu_current = False
+        if self.__method in self.DIRECT_METHODS or iAoA0 is not None or self.__F_tolerance is not None:
+            lu_current = False
+            if self.__method == 'linear':
+                lu_current = self.__solve_linear(iAoA0)
+            elif self.__method == 'matrix_free':
+                self.__solve_matrix_free(iAoA0)
+            elif self.__method == 'chord':
+                self.__solve_chord(iAoA0, self.__chord_ratio)
+            else:
+                # warm start or adaptive convergence of the Newton-Raphson problem: Newton iterations,
+                # the jacobian is factorized at each one
+                self.__solve_chord(iAoA0, 0.)
+            if grad_active and not lu_current:
+                # the adjoint needs the jacobian at the converged state, its factorization is kept for the adjoint solves
+                self.__comp_dpR_dpiAoA_lu(self.__iAoA)
+                lu_current = True
+            self.__lu_current = lu_current
+        else:
+            self.__residuals_hist = None
+            self.__NRPb.solve()
         self.set_computed(True)
-        self.write_gamma_to_file()
         if grad_active:
             self.comp_dpR_dpchi()
             
@@ -187,10 +287,10 @@ class DLLMDirect:
 
         # Circulation variables
         self.__gamma = zeros(N)
-        self.__dpgamma_dpiAoA = None
-        self.__dpgamma_dpthetaY = None
+        self.__dpgamma_dpiAoA = None    # diagonal of the matrix
+        self.__dpgamma_dpthetaY = None  # diagonal of the matrix
         self.__dpgamma_dpAoA = None
-        self.__dpgamma_dplocalAoA = zeros([N, N])
+        self.__dpgamma_dplocalAoA = zeros([N])  # diagonal of the matrix
         if grad_active:
             self.__dpgamma_dpchi = zeros([N, ndv])
         else:
@@ -218,9 +318,182 @@ class DLLMDirect:
         self.__compute_dpiAoAnew_dpiAoA()
 
         self.__dpR_dpiAoA = np.diag(ones([N])) - self.__dpiAoAnew_dpiAoA
+        self.__dpR_dpiAoA_lu = None
+        self.__lu_current = False
 
         return self.__dpR_dpiAoA
 
+    def __comp_dpR_dpiAoA_lu(self, iAoA):
+        self.comp_dpR_dpiAoA(iAoA)
+        self.__dpR_dpiAoA_lu = lu_factor(self.__dpR_dpiAoA)
+
+        return self.__dpR_dpiAoA_lu
+
+    def comp_dpR_dpiAoA_operator(self, iAoA):
+        """
+        Jacobian I - K.diag(dpgamma_dplocalAoA) as a linear operator, each product costs O(N^2)
+        """
+        N = self.get_N()
+        K = self.get_K()
+        self.__compute_dpgamma_dpiAoA()
+        dpgamma_dplocalAoA = self.__dpgamma_dplocalAoA.copy()
+
+        def matvec(x):
+            x = x.ravel()
+            return x - dot(K, dpgamma_dplocalAoA*x)
+
+        return LinearOperator((N, N), matvec=matvec, dtype=float)
+
+    def __init_iterations(self, iAoA0):
+        """
+        Initial iterate and reference residual of the internal solvers. The reference residual is the one at iAoA=0,
+        it is computed by the first iteration for a cold start.
+        """
+        N = self.get_N()
+        if iAoA0 is None:
+            return zeros(N), None
+        res0 = norm(self.comp_R(zeros(N)))
+        if res0 == 0.:
+            res0 = 1.
+        return iAoA0.copy(), res0
+
+    def __solve_matrix_free(self, iAoA0=None):
+        """
+        Newton iterations with the linear systems solved by GMRES on the jacobian operator
+        """
+        N = self.get_N()
+        iAoA, res0 = self.__init_iterations(iAoA0)
+        self.__residuals_hist = []
+        for it in xrange(self.__max_iterations):
+            R = self.comp_R(iAoA)
+            res = norm(R)
+            if res0 is None:
+                res0 = res
+                if res0 == 0.:
+                    res0 = 1.
+            self.__residuals_hist.append(res/res0)
+            if self.__verbose > 0:
+                print 'DLLMDirect matrix_free iteration', it, ': residual = ', res/res0
+            if res/res0 < self.__stop_residual:
+                self.__F_list_correction = None
+                break
+            dpR_dpiAoA = self.comp_dpR_dpiAoA_operator(iAoA)
+            # inexact Newton: the linear tolerance follows the nonlinear residual
+            diAoA, info = gmres(dpR_dpiAoA, -R, tol=min(0.1, res/res0), atol=0., restart=N, maxiter=N)
+            if info != 0:
+                # GMRES stalled or failed: the Newton step is computed by a direct solve
+                if self.__verbose > 0:
+                    print 'DLLMDirect matrix_free iteration', it, ': GMRES info = ', info, ', LU solve'
+                diAoA = lu_solve(self.__comp_dpR_dpiAoA_lu(iAoA), -R)
+            if self.__is_F_converged(diAoA):
+                break
+            iAoA = iAoA + self.__relax_factor*diAoA
+
+    def __solve_chord(self, iAoA0=None, chord_ratio=0.5):
+        """
+        Chord Newton iterations: the LU factorization of the jacobian is reused as long as the residual
+        decreases fast enough, chord_ratio=0. gives Newton iterations
+        """
+        iAoA, res0 = self.__init_iterations(iAoA0)
+        lu = None
+        self.__residuals_hist = []
+        for it in xrange(self.__max_iterations):
+            R = self.comp_R(iAoA)
+            res = norm(R)
+            if res0 is None:
+                res0 = res
+                if res0 == 0.:
+                    res0 = 1.
+            self.__residuals_hist.append(res/res0)
+            if self.__verbose > 0:
+                print 'DLLMDirect chord iteration', it, ': residual = ', res/res0
+            if res/res0 < self.__stop_residual:
+                self.__F_list_correction = None
+                break
+            factorize = lu is None or res > chord_ratio*res_prev
+            if factorize:
+                if self.__verbose > 0:
+                    print 'DLLMDirect chord iteration', it, ': jacobian factorization'
+                lu = self.__comp_dpR_dpiAoA_lu(iAoA)
+            diAoA = lu_solve(lu, -R)
+            if self.__is_F_converged(diAoA):
+                if factorize:
+                    break
+                # the error estimate is only reliable with the jacobian of the current iterate
+                lu = self.__comp_dpR_dpiAoA_lu(iAoA)
+                diAoA = lu_solve(lu, -R)
+                if self.__is_F_converged(diAoA):
+                    break
+            iAoA = iAoA + self.__relax_factor*diAoA
+            res_prev = res
+
+    def __is_F_converged(self, diAoA):
+        """
+        Adaptive convergence test at the current iterate, diAoA being the next Newton step
+        """
+        if self.__F_tolerance is None:
+            return False
+        self.__F_list_correction = self.__LLW.comp_F_list_correction(diAoA)
+        converged = (abs(self.__F_list_correction) < self.__F_tolerance).all()
+        if converged and self.__verbose > 0:
+            print 'DLLMDirect: functions converged, max error estimate = ', max(abs(self.__F_list_correction))
+        return converged
+
+    def __solve_linear(self, iAoA0=None):
+        """
+        Solve for wings with a circulation linear in the local angle of attack, such as analytic airfoils below the
+        transonic branch: the jacobian does not depend on iAoA, AoA, twist or thetaY, its factorization is kept as long
+        as K and dpgamma_dplocalAoA are unchanged and a solution costs one residual evaluation and one LU solve.
+        Falls back to Newton iterations when the residual is not linear.
+        @return True if the factorized jacobian is the one of the converged state
+        """
+        iAoA, res0 = self.__init_iterations(iAoA0)
+        R = self.comp_R(iAoA)
+        res = norm(R)
+        if res0 is None:
+            res0 = res
+            if res0 == 0.:
+                res0 = 1.
+        self.__residuals_hist = [res/res0]
+        if res/res0 < self.__stop_residual:
+            return False
+        K = self.get_K()
+        dpgamma_dplocalAoA = self.get_sections().dgamma_dAoA
+        if self.__linear_K is not K or not np.array_equal(self.__linear_dpgamma_dplocalAoA, dpgamma_dplocalAoA):
+            if self.__verbose > 0:
+                print 'DLLMDirect linear: jacobian factorization'
+            self.__linear_lu = self.__comp_dpR_dpiAoA_lu(iAoA)
+            self.__linear_dpR_dpiAoA = self.__dpR_dpiAoA
+            self.__linear_dpgamma_dplocalAoA = dpgamma_dplocalAoA.copy()
+            self.__linear_K = K
+        diAoA = lu_solve(self.__linear_lu, -R)
+        if self.__is_F_converged(diAoA):
+            # adaptive convergence at the initial iterate, the factorized jacobian is the one of this state
+            self.__set_linear_jacobian()
+            return True
+        iAoA = iAoA + diAoA
+        R = self.comp_R(iAoA)
+        res = norm(R)
+        self.__residuals_hist.append(res/res0)
+        if self.__verbose > 0:
+            print 'DLLMDirect linear: residual = ', res/res0
+        if res/res0 < self.__stop_residual and np.array_equal(self.__linear_dpgamma_dplocalAoA, self.get_sections().dgamma_dAoA):
+            self.__F_list_correction = None
+            self.__set_linear_jacobian()
+            return True
+        if res/res0 >= self.__stop_residual:
+            if self.__verbose > 0:
+                print 'DLLMDirect linear: nonlinear residual, Newton iterations'
+            residuals_hist = self.__residuals_hist
+            self.__solve_chord(iAoA, 0.)
+            self.__residuals_hist = residuals_hist + self.__residuals_hist[1:]
+        return False
+
+    def __set_linear_jacobian(self):
+        self.__dpgamma_dplocalAoA[:] = self.__linear_dpgamma_dplocalAoA
+        self.__dpR_dpiAoA = self.__linear_dpR_dpiAoA
+        self.__dpR_dpiAoA_lu = self.__linear_lu
+
     def comp_dpR_dpchi(self):
         self.__compute_dplocalAoA_dpchi()
         self.__compute_dpgamma_dpchi()
@@ -232,7 +505,8 @@ class DLLMDirect:
     def comp_dpR_dpthetaY(self):
         K = self.get_K()
         self.__compute_dpgamma_dpthetaY()
-        self.__dpR_dpthetaY = -dot(K, self.__dpgamma_dpthetaY)
+        # dplocalAoA_dpthetaY is the identity: scale the columns of K
+        self.__dpR_dpthetaY = -K*self.__dpgamma_dplocalAoA[np.newaxis,:]
 
         return self.__dpR_dpthetaY
 
@@ -244,19 +518,15 @@ class DLLMDirect:
         return self.__dpR_dpAoA
 
     def __compute_dpgamma_dpAoA(self):
-        N = self.get_N()
-        
-        for i in xrange(N):
-            self.__dpgamma_dplocalAoA[i,i] = self.get_airfoils()[i].dgamma_dAoA
+        self.__dpgamma_dplocalAoA[:] = self.get_sections().dgamma_dAoA
 
-        self.__dpgamma_dpAoA = dot(self.__dpgamma_dplocalAoA,self.__dplocalAoA_dpAoA)
+        self.__dpgamma_dpAoA = self.__dpgamma_dplocalAoA*self.__dplocalAoA_dpAoA
 
     def __compute_dpgamma_dpthetaY(self):
-        N = self.get_N()
-        for i in xrange(N):
-            self.__dpgamma_dplocalAoA[i,i] = self.get_airfoils()[i].dgamma_dAoA
+        self.__dpgamma_dplocalAoA[:] = self.get_sections().dgamma_dAoA
 
-        self.__dpgamma_dpthetaY = dot(self.__dpgamma_dplocalAoA,self.__dplocalAoA_dpthetaY)
+        # dplocalAoA_dpthetaY is the identity: only the diagonal is stored
+        self.__dpgamma_dpthetaY = self.__dpgamma_dplocalAoA.copy()
 
     def __compute_dplocalAoA_dpchi(self):
         N = self.get_N()
@@ -265,26 +535,63 @@ class DLLMDirect:
         if AoA_grad is None:
             self.__dplocalAoA_dpchi =  twist_grad
         else:
-            for i in xrange(N):
-                self.__dplocalAoA_dpchi[i, :] = AoA_grad[:] + twist_grad[i, :]
+            self.__dplocalAoA_dpchi = twist_grad + AoA_grad[np.newaxis, :]
 
     def __compute_dpgamma_dpchi(self):
-        N = self.get_N()
-        for i in xrange(N):
-            self.__dpgamma_dpchi[i,:] = self.get_airfoils()[i].dgamma_dchi
-
-        self.__dpgamma_dpchi = self.__dpgamma_dpchi + dot(self.__dpgamma_dplocalAoA, self.__dplocalAoA_dpchi)
+        self.__dpgamma_dpchi = self.get_sections().dgamma_dchi + self.__dpgamma_dplocalAoA[:,np.newaxis]*self.__dplocalAoA_dpchi
 
     def __compute_dpiAoAnew_dpchi(self):
         K = self.get_K()
-        dK_dchi = self.get_dK_dchi()
-        ndv = self.get_ndv()
-        self.__dpiAoAnew_dpchi = dot(K, self.__dpgamma_dpchi)
-        for n in xrange(ndv):
-            self.__dpiAoAnew_dpchi[:, n] += dot(dK_dchi[:, :, n], self.__gamma)
+        self.__dpiAoAnew_dpchi = self.__K_dot_dpchi(K, self.__dpgamma_dpchi)
+        self.__dpiAoAnew_dpchi += self.comp_dK_dchi_gamma(self.__gamma)
 
-    def __compute_localAoA(self):
+    def __K_dot_dpchi(self, K, dpchi):
+        """
+        K.dpchi for a (N, ndv) design variables jacobian: most columns have a few non zero values (a twist variable
+        only acts on its two symmetric sections) and are multiplied as sparse columns, the cost scales with the number
+        of non zero values instead of N.ndv
+        """
         N = self.get_N()
+        dense_cols, sparse_cols, rows, cols, indptr = self.__get_dpchi_structure(dpchi)
+        K_dpchi = zeros((N, dpchi.shape[1]))
+        if len(dense_cols) > 0:
+            K_dpchi[:, dense_cols] = dot(K, dpchi[:, dense_cols])
+        if len(sparse_cols) > 0:
+            # (dpchi^T.K^T)^T with dpchi^T in CSR format
+            dpchi_sparse = csc_matrix((dpchi[rows, cols], rows, indptr), shape=(N, len(sparse_cols)))
+            K_dpchi[:, sparse_cols] = dpchi_sparse.T.dot(K.T).T
+        return K_dpchi
+
+    def __get_dpchi_structure(self, dpchi):
+        """
+        Dense and sparse columns of dpchi and the CSC indices of its sparse columns. The structure only depends on the
+        geometry gradients: it is kept for the geometry versions it was computed for, as long as it holds all the non
+        zero values of dpchi, and is only rebuilt when the geometry changes.
+        @return dense_cols, sparse_cols, rows, cols, indptr with dpchi[rows, cols] the values of the sparse columns
+        """
+        geom = self.get_geom()
+        versions = [geom.get_version(quantity) for quantity in geom.TRACKED_QUANTITIES]
+        structure = self.__dpchi_structure
+        if structure is not None and structure[0] is geom and structure[1] == versions and structure[2] == dpchi.shape:
+            dense_cols, sparse_cols, rows, cols, indptr = structure[3]
+            # values that vanish at some states are kept in the structure, new ones invalidate it
+            nnz = np.count_nonzero(dpchi[rows, cols])
+            if len(dense_cols) > 0:
+                nnz += np.count_nonzero(dpchi[:, dense_cols])
+            if nnz == np.count_nonzero(dpchi):
+                return structure[3]
+        N = self.get_N()
+        nnz = np.count_nonzero(dpchi, axis=0)
+        sparse_cols = np.flatnonzero(np.logical_and(nnz > 0, nnz < self.SPARSE_COLUMNS_DENSITY*N))
+        dense_cols = np.flatnonzero(nnz >= self.SPARSE_COLUMNS_DENSITY*N)
+        # column by column non zero values of the sparse columns, as in the CSC format
+        rows, k = np.nonzero(dpchi[:, sparse_cols].T)[::-1]
+        cols = sparse_cols[k]
+        indptr = np.concatenate(([0], np.cumsum(nnz[sparse_cols])))
+        self.__dpchi_structure = (geom, versions, dpchi.shape, (dense_cols, sparse_cols, rows, cols, indptr))
+        return self.__dpchi_structure[3]
+
+    def __compute_localAoA(self):
         Thetay = self.get_geom().get_thetaY()
         twist = self.get_geom().get_twist()
         AoA = self.get_geom().get_AoA()
@@ -297,31 +604,27 @@ class DLLMDirect:
         # self.__localAoA=alpha-iaOa-self.get_wing_geom().get_twist()
         self.__localAoA = AoA + twist + self.__iAoA + Thetay
 
-        for i in xrange(N):
-            if self.__localAoA[i] > np.pi / 2. or self.__localAoA[i] < -np.pi / 2.:
-                raise Exception("Local angle of attack out of bounds [-pi/2, pi/2]")
+        if (abs(self.__localAoA) > np.pi / 2.).any():
+            raise Exception("Local angle of attack out of bounds [-pi/2, pi/2]")
 
     def __compute_gamma(self):
         """
         Update the circulation
         """
-        N = self.get_N()
         Mach = self.get_OC().get_Mach()
-        for i in xrange(N):
-            self.get_airfoils()[i].compute(self.__localAoA[i],Mach)
-            self.__gamma[i] = self.get_airfoils()[i].gamma
-            if np.isnan(self.get_airfoils()[i].gamma):
-                af = self.get_airfoils()[i]
-                print 'Lref = ',af.get_Lref()
-                print 'Sref = ',af.get_Sref()
-                print 'Cl = ',af.Cl
+        sections = self.get_sections()
+        sections.compute(self.__localAoA, Mach)
+        self.__gamma[:] = sections.gamma
+        for i in np.where(np.isnan(self.__gamma))[0]:
+            print 'Lref = ',sections.get_Lref()[i]
+            print 'Sref = ',sections.get_Sref()[i]
+            print 'Cl = ',sections.Cl[i]
 
     def __compute_dpgamma_dpiAoA(self):
-        N = self.get_N()
-        for i in xrange(N):
-            self.__dpgamma_dplocalAoA[i,i] = self.get_airfoils()[i].dgamma_dAoA
+        self.__dpgamma_dplocalAoA[:] = self.get_sections().dgamma_dAoA
 
-        self.__dpgamma_dpiAoA = dot(self.__dpgamma_dplocalAoA, self.__dplocalAoA_dpiAoA)
+        # dplocalAoA_dpiAoA is the identity: only the diagonal is stored
+        self.__dpgamma_dpiAoA = self.__dpgamma_dplocalAoA.copy()
 
     def __compute_iAoAnew(self):
         '''
@@ -335,7 +638,8 @@ class DLLMDirect:
         Computes the derivative dpiAoAnew_dpiAoA
         """
         K = self.get_K()
-        self.__dpiAoAnew_dpiAoA = dot(K, self.__dpgamma_dpiAoA)
+        # dplocalAoA_dpiAoA is the identity: scale the columns of K instead of a dense product
+        self.__dpiAoAnew_dpiAoA = K*self.__dpgamma_dplocalAoA[np.newaxis,:]
 
     def write_gamma_to_file(self):
         '''
@@ -37,12 +37,18 @@ class DLLMMesh:
         self.__ndv = self.get_geom().get_ndv()
         self.__N       = None
         self.__K       = None
-        self.__dK_dchi = None
+        # geometry and version of its span-wise positions the mesh was computed for
+        self.__geom        = None
+        self.__eta_version = None
+        self.__eta_grad      = None
+        self.__y_grad        = None
+        self.__dv_cols       = None
+        self.__dKmetric_fact = None
         self.recompute()
     
     #-- Accessors
-    def get_airfoils(self):
-        return self.__LLW.get_airfoils()
+    def get_sections(self):
+        return self.__LLW.get_sections()
     
     def get_tag(self):
         return self.__LLW.get_tag()
@@ -59,17 +65,23 @@ class DLLMMesh:
     def get_K(self):
         return self.__K
     
-    def get_dK_dchi(self):
-        return self.__dK_dchi
-    
     #-- Methods
     def recompute(self):
         self.__N   = self.get_geom().get_n_sect()
+        self.__geom        = self.get_geom()
+        self.__eta_version = self.__geom.get_version('eta')
         
         # Set computational geometry
         self.__K       = None 
-        self.__dK_dchi = None
         self.__setGeom()
+        
+    def update(self):
+        '''
+        Recompute the mesh if the span-wise positions eta changed, K only depends on them
+        '''
+        geom = self.get_geom()
+        if geom is not self.__geom or geom.get_version('eta') != self.__eta_version:
+            self.recompute()
          
     def __setGeom(self):
         '''
@@ -90,22 +102,24 @@ class DLLMMesh:
         self.__K = - dot(Kmetric,DdGammaDy_DGamma)
         
         if self.get_grad_active():
-            eta_grad = self.get_geom().get_eta_grad()[1,:,:]
-            y_grad   = self.get_geom().get_XYZ_grad()[1,:,:]
+            # dK_dchi is not stored: only the metric derivative factor is kept for comp_dK_dchi_gamma
+            self.__eta_grad = self.get_geom().get_eta_grad()[1,:,:]
+            self.__y_grad   = self.get_geom().get_XYZ_grad()[1,:,:]
+            self.__dKmetric_fact = 1./(4.*numpy.pi*YminEta**2)
+            # K only depends on the design variables that move the span-wise positions, usually the span only
+            self.__dv_cols = numpy.flatnonzero(numpy.logical_or(self.__eta_grad.any(axis=0), self.__y_grad.any(axis=0)))
             
-            YminEta_grad=zeros((self.__N,self.__N+1,self.__ndv))
-            for n in xrange(self.__ndv):
-                YminEta_grad[:,:,n] = transpose(outer(ones([self.__N+1]),y_grad[:,n]))-outer(ones([self.__N]),eta_grad[:,n])
-            
-            dKmetric_dchi=zeros((self.__N,self.__N+1,self.__ndv))
-                   
-            for n in xrange(self.__ndv):
-                dKmetric_dchi[:,:,n]=-YminEta_grad[:,:,n]/YminEta[:,:]**2
-            dKmetric_dchi/=4.*numpy.pi
-            
-            self.__dK_dchi = zeros((self.__N,self.__N,self.__ndv))
-            for n in xrange(self.__ndv):
-                self.__dK_dchi[:,:,n]=-dot(dKmetric_dchi[:,:,n],DdGammaDy_DGamma)
-                  
-
-    
\ No newline at end of file
+    def comp_dK_dchi_gamma(self, gamma):
+        """
+        Product dK_dchi.gamma as a (N, ndv) array, computed from y_grad and eta_grad without the (N, N, ndv) tensor
+        """
+        # circulation jumps at the N+1 mesh points: DdGammaDy_DGamma.gamma
+        dgamma = zeros(self.__N+1)
+        dgamma[:self.__N]  = gamma
+        dgamma[1:]        -= gamma
+        # dK_dchi[i,j,n].gamma[j] = sum_k (y_grad[i,n]-eta_grad[k,n])*dgamma[k]/(4.pi.YminEta[i,k]**2)
+        W = self.__dKmetric_fact*dgamma
+        cols = self.__dv_cols
+        dK_dchi_gamma = zeros((self.__N, self.__eta_grad.shape[1]))
+        dK_dchi_gamma[:, cols] = self.__y_grad[:, cols]*W.sum(axis=1)[:,numpy.newaxis] - dot(W, self.__eta_grad[:, cols])
+        return dK_dchi_gamma
@@ -52,16 +52,44 @@ class DLLMPost:
         'Sref']
     
     ERROR_MSG = 'ERROR in DLLMPost.'
+    # Levi-Civita symbol, (a x b)_i = eps_ijk a_j b_k
+    LEVI_CIVITA = np.zeros((3,3,3))
+    LEVI_CIVITA[0,1,2] = LEVI_CIVITA[1,2,0] = LEVI_CIVITA[2,0,1] =  1.
+    LEVI_CIVITA[0,2,1] = LEVI_CIVITA[2,1,0] = LEVI_CIVITA[1,0,2] = -1.
+
+    # Blocks of the basic analysis needed by each function, 'distrib' holds the span-wise distributions
+    ALL_BLOCKS = ['Cl', 'Cdi', 'Cdvp', 'Cdw', 'Cdf', 'Cm_ref', 'distrib']
+    F_DEPENDENCIES = {
+        'Cl'                    : ['Cl'],
+        'Cdi'                   : ['Cdi'],
+        'Cdvp'                  : ['Cdvp'],
+        'Cdw'                   : ['Cdw'],
+        'Cdf'                   : ['Cdf'],
+        'Cdp'                   : ['Cdi', 'Cdvp', 'Cdw'],
+        'Cd'                    : ['Cdi', 'Cdvp', 'Cdw', 'Cdf'],
+        'Lift'                  : ['Cl'],
+        'Drag_Induced'          : ['Cdi'],
+        'Drag_Viscous_pressure' : ['Cdvp'],
+        'Drag_Wave'             : ['Cdw'],
+        'Drag_Friction'         : ['Cdf'],
+        'Drag_Pressure'         : ['Cdi', 'Cdvp', 'Cdw'],
+        'Drag'                  : ['Cdi', 'Cdvp', 'Cdw', 'Cdf'],
+        'LoD'                   : ['Cl', 'Cdi', 'Cdvp', 'Cdw', 'Cdf'],
+        'Cmy'                   : ['Cm_ref'],
+        'Sref'                  : []}
 
     def __init__(self, LLW, verbose = 1):
         """
         Post-Processing module compatible with adjoint for DLLM
         """
         self.__LLW               = LLW
-        self.__F_list_names_calc = self.DEF_F_LIST_NAMES
 
-        self.__F_list_calc = None
         self.__F_list_names = self.DEF_F_LIST_NAMES
+        # functions evaluated by the last run and blocks of the basic analysis it computed
+        self.__F_list_names_run = None
+        self.__blocks_computed = []
+        # span-wise distributions are computed at each run unless switched off
+        self.__distrib_active = True
         self.__F_list_dim = 0
         self.__F_list = None
         self.__dpF_list_dpiAoA = None
@@ -184,6 +212,9 @@ class DLLMPost:
     def get_F_list_names(self):
         return self.__F_list_names
 
+    def get_distrib_active(self):
+        return self.__distrib_active
+
     def get_F_list(self):
         return self.__F_list
 
@@ -202,8 +233,8 @@ class DLLMPost:
     def get_geom(self):
         return self.__LLW.get_geom()
 
-    def get_airfoils(self):
-        return self.__LLW.get_airfoils()
+    def get_sections(self):
+        return self.__LLW.get_sections()
 
     def get_OC(self):
         return self.__LLW.get_OC()
@@ -238,6 +269,13 @@ class DLLMPost:
     #-- Setters
     def set_F_list_names(self, F_list_names):
         self.__F_list_names = F_list_names
+
+    def set_distrib_active(self, distrib_active=True):
+        """
+        Compute the span-wise distributions (Cl_distrib, Lift_distrib, CoL, ...) at each run, True by default.
+        No function depends on them: switch them off to save their cost when only the functions are needed.
+        """
+        self.__distrib_active = distrib_active
         
 #  -- To update target loads capability
 #     def set_target_loads_file(self, loads_file):
@@ -267,79 +305,23 @@ class DLLMPost:
     
     #-- Run method
     def __init_run(self):
-        N = self.get_N()
-        ndv = self.get_ndv()
-        self.__F_list_calc_dim = len(self.__F_list_names_calc)
-        self.__F_list_calc     = zeros(self.__F_list_calc_dim)
+        self.__blocks_computed = []
         self.__F_list_dim      = len(self.__F_list_names)
-        self.__F_list          = zeros(self.__F_list_dim)
-        self.__dpF_list_dpAoA  = zeros(self.__F_list_dim)
-        self.__dpF_list_dpiAoA = zeros((self.__F_list_dim, N))
-        if self.get_grad_active():
-            self.__dpF_list_dpchi  = zeros((self.__F_list_dim, ndv))
-        else:
-            self.__dpF_list_dpchi  = None
-        self.__dpF_list_dpthetaY = zeros((self.__F_list_dim, N))
 
     def run(self, F_list_names=None):
-        ERROR_MSG = self.ERROR_MSG + 'run: '
-        N = self.get_N()
+        """
+        Evaluate the functions of F_list_names and their partial derivatives, the stored F_list_names by default.
+        Only the blocks of the basic analysis these functions depend on are computed.
+        """
         grad_active = self.get_grad_active()
+        if F_list_names is None:
+            F_list_names = self.__F_list_names
             
         self.__init_run()
-        self.__basic_analysis()
-
-        # Default analysis
-        Pdyn     = self.get_OC().get_Pdyn()
-        Sref     = self.get_Sref()
-        if grad_active:
-            Sref_grad = self.get_Sref_grad()
-            
-        if F_list_names is None:
-            F_names_list = self.__F_list_names_calc
-        else: 
-            F_names_list = F_list_names
-        for i, F_name in enumerate(F_names_list):
-            if F_name == 'Cl':
-                val = self.Cl
-            elif F_name == 'Cdi':
-                val = self.Cdi
-            elif F_name == 'Cdvp':
-                val = self.Cdvp
-            elif F_name == 'Cdw':
-                val = self.Cdw
-            elif F_name == 'Cdf':
-                val = self.Cdf
-            elif F_name == 'Cdp':
-                val = self.Cdi+self.Cdw+self.Cdvp
-            elif F_name == 'Cd':
-                val = self.Cdi+self.Cdw+self.Cdvp+self.Cdf
-            elif F_name == 'Lift':
-                val = Pdyn*Sref*self.Cl
-            elif F_name == 'Drag_Induced':
-                val = Pdyn*Sref*self.Cdi
-            elif F_name == 'Drag_Viscous_pressure':
-                val = Pdyn*Sref*self.Cdvp
-            elif F_name == 'Drag_Wave':
-                val = Pdyn*Sref*self.Cdw
-            elif F_name == 'Drag_Friction':
-                val = Pdyn*Sref*self.Cdf
-            elif F_name == 'Drag_Pressure':
-                val = Pdyn*Sref*(self.Cdi+self.Cdw+self.Cdvp)
-            elif F_name == 'Drag':
-                val = Pdyn*Sref*(self.Cdi+self.Cdw+self.Cdvp+self.Cdf)
-            elif F_name == 'LoD':
-                Cl = self.Cl
-                Cd = (self.Cdi+self.Cdw+self.Cdvp+self.Cdf)
-                val = Cl/Cd
-                self.LoD = Cl/Cd
-            elif F_name == 'Cmy':
-                val = self.Cm_ref[1]
-            elif F_name == 'Sref':
-                val = Sref
-            else:
-                raise Exception(ERROR_MSG + ' unknown function ' + str(F_name))
-            self.__F_list_calc[i] = val
+        blocks = self.__get_blocks(F_list_names)
+        if self.__distrib_active:
+            blocks.append('distrib')
+        self.__basic_analysis(blocks)
 
         # Adjoint analysis
         if self.__verbose > 0:
@@ -347,10 +329,34 @@ class DLLMPost:
                 print "Post : partial derivatives for gradient assembly"
             else:
                 print "Post : partial derivatives for other applications"
-        if F_list_names is None:
-            F_names_list = self.__F_list_names
-        else: 
-            F_names_list = F_list_names
+        self.__F_list, self.__dpF_list_dpiAoA, self.__dpF_list_dpAoA, self.__dpF_list_dpthetaY, self.__dpF_list_dpchi = \
+            self.__assemble(F_list_names, grad_active)
+
+        self.__F_list_names_run = list(F_list_names)
+        if self.__verbose > 0 :
+            self.__display_info()
+        self.set_computed(True)
+        
+    def __assemble(self, F_list_names, grad_active):
+        """
+        Functions of F_list_names and their partial derivatives from the blocks of the basic analysis
+        @return F_list, dpF_list_dpiAoA, dpF_list_dpAoA, dpF_list_dpthetaY and dpF_list_dpchi, None if not grad_active
+        """
+        ERROR_MSG = self.ERROR_MSG + '__assemble: '
+        N = self.get_N()
+        n_F = len(F_list_names)
+        Pdyn     = self.get_OC().get_Pdyn()
+        Sref     = self.get_Sref()
+        F_list            = zeros(n_F)
+        dpF_list_dpiAoA   = zeros((n_F, N))
+        dpF_list_dpAoA    = zeros(n_F)
+        dpF_list_dpthetaY = zeros((n_F, N))
+        dpF_list_dpchi    = None
+        if grad_active:
+            Sref_grad = self.get_Sref_grad()
+            dpF_list_dpchi = zeros((n_F, self.get_ndv()))
+            
+        F_names_list = F_list_names
         for i, F_name in enumerate(F_names_list):
             if F_name == 'Cl':
                 val = self.Cl
@@ -504,242 +510,243 @@ class DLLMPost:
             else:
                 raise Exception,ERROR_MSG+' unknown function '+str(F_name)
             
-            self.__F_list[i]            = val
-            self.__dpF_list_dpiAoA[i,:] = dpFdpiAoA[:]
-            self.__dpF_list_dpAoA[i]    = dpFdpAoA
-            self.__dpF_list_dpthetaY[i,:] = dpFdpthetaY[:]
+            F_list[i]            = val
+            dpF_list_dpiAoA[i,:] = dpFdpiAoA[:]
+            dpF_list_dpAoA[i]    = dpFdpAoA
+            dpF_list_dpthetaY[i,:] = dpFdpthetaY[:]
             if grad_active:
-                self.__dpF_list_dpchi[i,:]  = dpFdpchi[:]
+                dpF_list_dpchi[i,:]  = dpFdpchi[:]
 
-        if self.__verbose > 0 :
-            self.__display_info()
-        self.set_computed(True)
+        return F_list, dpF_list_dpiAoA, dpF_list_dpAoA, dpF_list_dpthetaY, dpF_list_dpchi
+    
+    def comp_dpF_list_dpiAoA(self, F_list_names=None):
+        """
+        Partial derivatives of the functions of F_list_names, the stored F_list_names by default, with respect to iAoA
+        at the current direct state, used by the error estimates of the direct iterations. Only the blocks these
+        functions depend on are computed, without the design variables derivatives, and the results of the last run
+        and its computed status are left unchanged.
+        """
+        if F_list_names is None:
+            F_list_names = self.__F_list_names
+        # the basic analysis overwrites the results of the last run: they are restored once the derivatives are assembled
+        saved_attributes = self.__dict__.copy()
+        saved_blocks     = list(self.__blocks_computed)
+        try:
+            self.__basic_analysis(self.__get_blocks(F_list_names), grad_active=False)
+            dpF_list_dpiAoA = self.__assemble(F_list_names, False)[1]
+        finally:
+            self.__dict__.clear()
+            self.__dict__.update(saved_attributes)
+            self.__blocks_computed = saved_blocks
+        return dpF_list_dpiAoA
         
     #-- basic analysis
-    def __basic_analysis(self):
-        grad_active = self.get_grad_active()
+    def __get_blocks(self, F_names_list):
+        """
+        Blocks of the basic analysis needed to evaluate the functions of F_names_list
+        """
+        ERROR_MSG = self.ERROR_MSG + '__get_blocks: '
+        blocks = []
+        for F_name in F_names_list:
+            if F_name not in self.F_DEPENDENCIES:
+                raise Exception(ERROR_MSG + ' unknown function ' + str(F_name))
+            for block in self.F_DEPENDENCIES[F_name]:
+                if block not in blocks:
+                    blocks.append(block)
+        return blocks
+
+    def __basic_analysis(self, blocks=None, grad_active=None):
+        """
+        Compute the blocks of the analysis listed in blocks, all of them by default, with the design variables
+        derivatives if grad_active, self.get_grad_active() by default.
+        dplocalAoA_dpiAoA and dplocalAoA_dpthetaY are identity matrices: the partial derivatives
+        with respect to iAoA and thetaY are built from the section values without any dense product.
+        """
+        if blocks is None:
+            blocks = self.ALL_BLOCKS
+        for block in blocks:
+            if block not in self.__blocks_computed:
+                self.__blocks_computed.append(block)
+        coeff_blocks = [block for block in blocks if block in ['Cl','Cdi','Cdw','Cdvp','Cdf']]
+        forces_needed = ('Cm_ref' in blocks) or ('distrib' in blocks)
+        
+        if grad_active is None:
+            grad_active = self.get_grad_active()
         Sref        = self.get_Sref()
         N           = self.get_N()  
         iAoA        = self.get_iAoA()
-        airfoils    = self.get_airfoils()
-        dplocalAoA_dpiAoA   = self.get_dplocalAoA_dpiAoA()
+        sections    = self.get_sections()
+        S_sect      = sections.get_Sref()
         dplocalAoA_dpAoA    = self.get_dplocalAoA_dpAoA()
-        dplocalAoA_dpthetaY = self.get_dplocalAoA_dpthetaY()
         Pdyn     = self.get_OC().get_Pdyn()
-        xyz_ref  = self.get_xyz_ref()
-        XYZ      = self.get_geom().get_XYZ()
-        XYZ_grad = self.get_geom().get_XYZ_grad()
-        chords      = self.get_geom().get_chords()
-        chords_grad = self.get_geom().get_chords_grad()
         
         if grad_active:
             ndv = self.get_ndv()
             dlAoAdchi = self.get_dplocalAoA_dpchi()
             Sref_grad = self.get_Sref_grad()
-        
-        self.Cl_distrib   = zeros(N)
-        self.Cdi_distrib  = zeros(N)
-        self.Cdw_distrib  = zeros(N)
-        self.Cdvp_distrib = zeros(N)
-        self.Cdf_distrib  = zeros(N)
-        self.Lift_distrib = zeros(N)
-        self.Drag_distrib = zeros(N)
-        self.Cl    = 0.0
-        self.Cdi   = 0.0
-        self.Cdw   = 0.0
-        self.Cdvp  = 0.0
-        self.Cdf   = 0.0
-        self.CoL   = 0.0
-        self.CoD   = 0.0
-        
-        self.CF     = zeros(3)
-        self.Cm_ref = zeros(3)
-        
-        self.dpCl_dpiAoA    = zeros(N)
-        self.dpCdi_dpiAoA   = zeros(N)
-        self.dpCdw_dpiAoA   = zeros(N)
-        self.dpCdvp_dpiAoA  = zeros(N)
-        self.dpCdf_dpiAoA   = zeros(N)
-        self.dpLift_distrib_dpiAoA  = zeros((N,N))
-        self.dpDrag_distrib_dpiAoA  = zeros((N,N))
-        self.dpCm_ref_dpiAoA        = zeros((3,N))
-                  
-        self.dpCl_dpAoA      = 0.0
-        self.dpCdi_dpAoA     = 0.0
-        self.dpCdw_dpAoA     = 0.0
-        self.dpCdvp_dpAoA    = 0.0
-        self.dpCdf_dpAoA     = 0.0
-        self.dpLift_distrib_dpAoA    = zeros(N)
-        self.dpDrag_distrib_dpAoA    = zeros(N)
-        self.dpCm_ref_dpAoA          = zeros(3)
-        
-        self.dpCl_dpthethaY   = zeros(N)
-        self.dpCdi_dpthethaY  = zeros(N)
-        self.dpCdw_dpthethaY  = zeros(N)
-        self.dpCdvp_dpthethaY = zeros(N)
-        self.dpCdf_dpthethaY  = zeros(N)
-        self.dpLift_distrib_dpthethaY  = zeros((N,N))
-        self.dpDrag_distrib_dpthethaY  = zeros((N,N))   
-        self.dpCm_ref_dpthethaY        = zeros((3,N))
-        
-        if grad_active:
-            self.dpCl_dpchi   = zeros(ndv)
-            self.dpCdi_dpchi  = zeros(ndv)
-            self.dpCdw_dpchi  = zeros(ndv)
-            self.dpCdvp_dpchi = zeros(ndv)
-            self.dpCdf_dpchi  = zeros(ndv)
-            self.dpLift_distrib_dpchi = zeros((N,ndv))
-            self.dpDrag_distrib_dpchi = zeros((N,ndv))
-            self.dpCm_ref_dpchi       = zeros((3,ndv))
+            S_sect_grad = sections.get_Sref_grad()
         
         #Note: all airfoils are computed already during direct run
-        for i in xrange(N):
-            af = airfoils[i]
-            surf_fact = af.get_Sref() / Sref
+        Cl_s   = sections.Cl
+        Cdw_s  = sections.Cdw
+        Cdvp_s = sections.Cdvp
+        Cdf_s  = sections.Cdf
+        dCl_dAoA   = sections.dCl_dAoA
+        dCdw_dAoA  = sections.dCdw_dAoA
+        dCdvp_dAoA = sections.dCdvp_dAoA
+        dCdf_dAoA  = sections.dCdf_dAoA
+        cos_iAoA = cos(iAoA)
+        sin_iAoA = sin(iAoA)
+        
+        if len(coeff_blocks) > 0:
+            surf_fact = S_sect / Sref
             if grad_active:
-                dsurf_fact = (af.get_Sref_grad()*Sref-af.get_Sref()*Sref_grad)/Sref**2
-                
-            # Recover airfoil xyz_cop
-            af_pcop = af.pcop
-            af_xyz_cop = np.zeros(3)
-            af_xyz_cop[0] = XYZ[0,i]+(af_pcop-0.25)*chords[i]
-            af_xyz_cop[1] = XYZ[1,i]
-            af_xyz_cop[2] = XYZ[2,i]
-            
-            # O = xyz_ref, Pi = af_xyz_cop
-            OPi = af_xyz_cop - xyz_ref
+                sf = surf_fact[:,np.newaxis]
+                dsurf_fact = (S_sect_grad*Sref-S_sect[:,np.newaxis]*Sref_grad[np.newaxis,:])/Sref**2
+        
+        #-- Coefficients and their partial derivatives
+        if grad_active and ('Cl' in blocks or 'Cdi' in blocks):
+            dCl_dchi_tot = dCl_dAoA[:,np.newaxis]*dlAoAdchi*sf+sections.dCl_dchi*sf+Cl_s[:,np.newaxis]*dsurf_fact
             
+        if 'Cl' in blocks:
+            self.Cl              =  np.sum(Cl_s * cos_iAoA * surf_fact)
+            self.dpCl_dpthethaY  =  dCl_dAoA * cos_iAoA * surf_fact
+            self.dpCl_dpiAoA     = -Cl_s * sin_iAoA * surf_fact + self.dpCl_dpthethaY
+            self.dpCl_dpAoA      =  np.sum(dCl_dAoA * cos_iAoA * dplocalAoA_dpAoA * surf_fact)
             if grad_active:
-                af_xyz_xop_grad      = XYZ_grad[:,i]
-                af_xyz_xop_grad[0,:] = af_xyz_xop_grad[0,:]+(af_pcop-0.25)*chords_grad[i,:]
-                OPi_grad= af_xyz_xop_grad
-            
-            # Coefficients distributions
-            self.Cl_distrib[i]   =  af.Cl * cos(iAoA[i])
-            self.Cdi_distrib[i]  = -af.Cl * sin(iAoA[i])
-            self.Cdw_distrib[i]  =  af.Cdw
-            self.Cdvp_distrib[i] =  af.Cdvp
-            self.Cdf_distrib[i]  =  af.Cdf
-            
-            # data and partial derivatives needed
-            locCl =  af.Cl*cos(iAoA[i])
-            locCd = -af.Cl*sin(iAoA[i])+af.Cdw+af.Cdvp+af.Cdf
-            dlocCl_dAoA    =  af.dCl_dAoA*cos(iAoA[i])
-            dlocCd_dAoA    = -af.dCl_dAoA*sin(iAoA[i])+af.dCdw_dAoA+af.dCdvp_dAoA+af.dCdf_dAoA
+                self.dpCl_dpchi  =  dot(cos_iAoA, dCl_dchi_tot)
+                
+        if 'Cdi' in blocks:
+            self.Cdi             = -np.sum(Cl_s * sin_iAoA * surf_fact)
+            self.dpCdi_dpthethaY = -dCl_dAoA * sin_iAoA * surf_fact
+            self.dpCdi_dpiAoA    = -Cl_s * cos_iAoA * surf_fact + self.dpCdi_dpthethaY
+            self.dpCdi_dpAoA     = -np.sum(dCl_dAoA * sin_iAoA * dplocalAoA_dpAoA * surf_fact)
             if grad_active:
-                dlocCl_dchi =  af.dCl_dchi*cos(iAoA[i])
-                dlocCd_dchi = -af.dCl_dchi*sin(iAoA[i])+af.dCdw_dchi+af.dCdvp_dchi+af.dCdf_dchi
-            
-            self.Lift_distrib[i] = Pdyn*af.get_Sref()*locCl
-            self.Drag_distrib[i] = Pdyn*af.get_Sref()*locCd
-            
-            CFi    = np.zeros(3)
-            CFi[0] = locCd*af.get_Sref()
-            CFi[2] = locCl*af.get_Sref()
-            
-            dpCFi_dpiAoA = np.zeros((3,N))
-            dpCFi_dpiAoA[0,i] += -af.Cl*cos(iAoA[i])*af.get_Sref()
-            dpCFi_dpiAoA[0,:] += dlocCd_dAoA*af.get_Sref()*dplocalAoA_dpiAoA[i,:]
-            dpCFi_dpiAoA[2,i] += -af.Cl*sin(iAoA[i])*af.get_Sref()
-            dpCFi_dpiAoA[2,:] += dlocCl_dAoA*af.get_Sref()*dplocalAoA_dpiAoA[i,:]
-            
-            dpCFi_dpAoA    = np.zeros(3)
-            dpCFi_dpAoA[0] = dlocCd_dAoA*af.get_Sref()*dplocalAoA_dpAoA[i]
-            dpCFi_dpAoA[2] = dlocCl_dAoA*af.get_Sref()*dplocalAoA_dpAoA[i]
-            
-            dpCFi_dpthetaY    = np.zeros((3,N))
-            dpCFi_dpthetaY[0] = dlocCd_dAoA*af.get_Sref()*dplocalAoA_dpthetaY[i,:]
-            dpCFi_dpthetaY[2] = dlocCl_dAoA*af.get_Sref()*dplocalAoA_dpthetaY[i,:]
-            
+                self.dpCdi_dpchi = -dot(sin_iAoA, dCl_dchi_tot)
+                
+        if 'Cdw' in blocks:
+            self.Cdw             =  np.sum(Cdw_s  * surf_fact)
+            self.dpCdw_dpthethaY =  dCdw_dAoA * surf_fact
+            self.dpCdw_dpiAoA    =  self.dpCdw_dpthethaY
+            self.dpCdw_dpAoA     =  np.sum(dCdw_dAoA * dplocalAoA_dpAoA * surf_fact)
             if grad_active:
-                dpCFi_dpchi      = np.zeros((3,ndv))
-                dpCFi_dpchi[0,:] = dlocCd_dchi*af.get_Sref()+locCd*af.get_Sref_grad()+af.get_Sref()*dlocCd_dAoA*dlAoAdchi[i, :]
-                dpCFi_dpchi[2,:] = dlocCl_dchi*af.get_Sref()+locCl*af.get_Sref_grad()+af.get_Sref()*dlocCl_dAoA*dlAoAdchi[i, :]
-            
-            self.CoL += af_xyz_cop*locCl*af.get_Sref()
-            self.CoD += af_xyz_cop*locCd*af.get_Sref()
-            
-            self.CF += CFi
-            self.Cm_ref += np.cross(OPi,CFi)
-            
-            # Coefficients
-            self.Cl   += af.Cl * cos(iAoA[i]) * surf_fact
-            self.Cdi  -= af.Cl * sin(iAoA[i]) * surf_fact
-            self.Cdw  += af.Cdw  * surf_fact
-            self.Cdvp += af.Cdvp * surf_fact
-            self.Cdf  += af.Cdf  * surf_fact
-            
-            # Partial derivatives with respect to iAoA
-            self.dpCl_dpiAoA[i]  -= af.Cl * sin(iAoA[i]) * surf_fact
-            self.dpCl_dpiAoA     += af.dCl_dAoA * cos(iAoA[i]) * dplocalAoA_dpiAoA[i,:] * surf_fact
-            
-            self.dpCdi_dpiAoA[i] -= af.Cl * cos(iAoA[i]) * surf_fact
-            self.dpCdi_dpiAoA    -= af.dCl_dAoA * sin(iAoA[i]) * dplocalAoA_dpiAoA[i,:] * surf_fact
+                self.dpCdw_dpchi = (dCdw_dAoA[:,np.newaxis]*dlAoAdchi*sf+sections.dCdw_dchi*sf+Cdw_s[:,np.newaxis]*dsurf_fact).sum(axis=0)
+                
+        if 'Cdvp' in blocks:
+            self.Cdvp             =  np.sum(Cdvp_s * surf_fact)
+            self.dpCdvp_dpthethaY =  dCdvp_dAoA * surf_fact
+            self.dpCdvp_dpiAoA    =  self.dpCdvp_dpthethaY
+            self.dpCdvp_dpAoA     =  np.sum(dCdvp_dAoA * dplocalAoA_dpAoA * surf_fact)
+            if grad_active:
+                self.dpCdvp_dpchi = (dCdvp_dAoA[:,np.newaxis]*dlAoAdchi*sf+sections.dCdvp_dchi*sf+Cdvp_s[:,np.newaxis]*dsurf_fact).sum(axis=0)
+                
+        if 'Cdf' in blocks:
+            self.Cdf             =  np.sum(Cdf_s  * surf_fact)
+            self.dpCdf_dpthethaY =  dCdf_dAoA * surf_fact
+            self.dpCdf_dpiAoA    =  self.dpCdf_dpthethaY
+            self.dpCdf_dpAoA     =  np.sum(dCdf_dAoA * dplocalAoA_dpAoA * surf_fact)
+            if grad_active:
+                self.dpCdf_dpchi = (dCdf_dAoA[:,np.newaxis]*dlAoAdchi*sf+sections.dCdf_dchi*sf+Cdf_s[:,np.newaxis]*dsurf_fact).sum(axis=0)
+        
+        if not forces_needed:
+            return
+        
+        #-- Local forces, needed by the moments and the distributions
+        pcop     = sections.pcop
+        xyz_ref  = self.get_xyz_ref()
+        XYZ      = self.get_geom().get_XYZ()
+        chords   = sections.get_chords()
+        
+        # Recover airfoils xyz_cop
+        xyz_cop = np.zeros((3,N))
+        xyz_cop[0,:] = XYZ[0,:]+(pcop-0.25)*chords
+        xyz_cop[1,:] = XYZ[1,:]
+        xyz_cop[2,:] = XYZ[2,:]
+        
+        # data and partial derivatives needed
+        locCl =  Cl_s*cos_iAoA
+        locCd = -Cl_s*sin_iAoA+Cdw_s+Cdvp_s+Cdf_s
+        dlocCl_dAoA    =  dCl_dAoA*cos_iAoA
+        dlocCd_dAoA    = -dCl_dAoA*sin_iAoA+dCdw_dAoA+dCdvp_dAoA+dCdf_dAoA
+        if grad_active:
+            dlocCl_dchi =  sections.dCl_dchi*cos_iAoA[:,np.newaxis]
+            dlocCd_dchi = -sections.dCl_dchi*sin_iAoA[:,np.newaxis]+sections.dCdw_dchi+sections.dCdvp_dchi+sections.dCdf_dchi
+        
+        if 'distrib' in blocks:
+            # Coefficients distributions
+            self.Cl_distrib    =  Cl_s * cos_iAoA
+            self.Cdi_distrib   = -Cl_s * sin_iAoA
+            self.Cdw_distrib   =  Cdw_s
+            self.Cdvp_distrib  =  Cdvp_s
+            self.Cdf_distrib   =  Cdf_s
             
-            self.dpCdw_dpiAoA    += af.dCdw_dAoA  * dplocalAoA_dpiAoA[i,:] * surf_fact
+            self.Lift_distrib = Pdyn*S_sect*locCl
+            self.Drag_distrib = Pdyn*S_sect*locCd
             
-            self.dpCdvp_dpiAoA   += af.dCdvp_dAoA * dplocalAoA_dpiAoA[i,:] * surf_fact
+            self.dpLift_distrib_dpiAoA = np.diag(Pdyn*S_sect*(-Cl_s*sin_iAoA+dlocCl_dAoA))
+            self.dpDrag_distrib_dpiAoA = np.diag(Pdyn*S_sect*(-Cl_s*cos_iAoA+dlocCd_dAoA))
+            self.dpLift_distrib_dpAoA  = Pdyn*S_sect*dCl_dAoA*cos_iAoA*dplocalAoA_dpAoA
+            self.dpDrag_distrib_dpAoA  = Pdyn*S_sect*dlocCd_dAoA*dplocalAoA_dpAoA
+            self.dpLift_distrib_dpthethaY = np.diag(Pdyn*S_sect*dCl_dAoA*cos_iAoA)
+            self.dpDrag_distrib_dpthethaY = np.diag(Pdyn*S_sect*dlocCd_dAoA)
+            if grad_active:
+                S_s = S_sect[:,np.newaxis]
+                self.dpLift_distrib_dpchi = Pdyn*cos_iAoA[:,np.newaxis]*(S_s*dCl_dAoA[:,np.newaxis]*dlAoAdchi+S_s*sections.dCl_dchi+S_sect_grad*Cl_s[:,np.newaxis])
+                self.dpDrag_distrib_dpchi = Pdyn*(S_s*dlocCd_dAoA[:,np.newaxis]*dlAoAdchi+S_s*dlocCd_dchi+S_sect_grad*locCd[:,np.newaxis])
             
-            self.dpCdf_dpiAoA    += af.dCdf_dAoA  * dplocalAoA_dpiAoA[i,:] * surf_fact
+            # Cl.Sref and Cd.Sref are the sums of the local forces
+            self.CoL = dot(xyz_cop, locCl*S_sect)/np.sum(locCl*S_sect)
+            self.CoD = dot(xyz_cop, locCd*S_sect)/np.sum(locCd*S_sect)
+        
+        if 'Cm_ref' in blocks:
+            # O = xyz_ref, Pi = xyz_cop[:,i]
+            OP = xyz_cop - xyz_ref[:,np.newaxis]
             
-            self.dpLift_distrib_dpiAoA[i,i] += Pdyn*af.get_Sref()*(-af.Cl*sin(iAoA[i])) 
-            self.dpLift_distrib_dpiAoA[i,:] += Pdyn*af.get_Sref()*dlocCl_dAoA* dplocalAoA_dpiAoA[i,:]
+            # Sections forces CF[:,i] and their derivatives, split in a diagonal part and a part driven by the local AoA:
+            # dpCF_dpx[:,i,j] = diag_dpCF_dpiAoA[:,i]*delta_ij + dpCF_dplocalAoA[:,i]*dplocalAoA_dpx[i,j]
+            CF = np.zeros((3,N))
+            CF[0,:] = locCd*S_sect
+            CF[2,:] = locCl*S_sect
             
-            self.dpDrag_distrib_dpiAoA[i,i] += Pdyn*af.get_Sref()*(-af.Cl*cos(iAoA[i]))
-            self.dpDrag_distrib_dpiAoA[i,:] += Pdyn*af.get_Sref()*dlocCd_dAoA*dplocalAoA_dpiAoA[i,:]
+            diag_dpCF_dpiAoA = np.zeros((3,N))
+            diag_dpCF_dpiAoA[0,:] = -Cl_s*cos_iAoA*S_sect
+            diag_dpCF_dpiAoA[2,:] = -Cl_s*sin_iAoA*S_sect
             
-            for j in xrange(N):
-                self.dpCm_ref_dpiAoA[:,j] += np.cross(OPi,dpCFi_dpiAoA[:,j])
+            dpCF_dplocalAoA = np.zeros((3,N))
+            dpCF_dplocalAoA[0,:] = dlocCd_dAoA*S_sect
+            dpCF_dplocalAoA[2,:] = dlocCl_dAoA*S_sect
             
-            # Partial derivative with respect to AoA
-            self.dpCl_dpAoA   += af.dCl_dAoA * cos(iAoA[i]) * dplocalAoA_dpAoA[i] * surf_fact
-            self.dpCdi_dpAoA  -= af.dCl_dAoA * sin(iAoA[i]) * dplocalAoA_dpAoA[i] * surf_fact
-            self.dpCdw_dpAoA  += af.dCdw_dAoA * dplocalAoA_dpAoA[i] * surf_fact
-            self.dpCdvp_dpAoA += af.dCdvp_dAoA * dplocalAoA_dpAoA[i] * surf_fact
-            self.dpCdf_dpAoA  += af.dCdf_dAoA * dplocalAoA_dpAoA[i] * surf_fact
-            self.dpLift_distrib_dpAoA[i] = Pdyn*af.get_Sref()*af.dCl_dAoA *cos(iAoA[i])*dplocalAoA_dpAoA[i]
-            self.dpDrag_distrib_dpAoA[i] = Pdyn*af.get_Sref()*dlocCd_dAoA*dplocalAoA_dpAoA[i]
-            self.dpCm_ref_dpAoA += np.cross(OPi,dpCFi_dpAoA)
+            self.CF     = CF.sum(axis=1)
+            self.Cm_ref = np.cross(OP, CF, axis=0).sum(axis=1)
+            OPxdpCF_dplocalAoA = np.cross(OP, dpCF_dplocalAoA, axis=0)
             
-            # Partial derivatives with respect to thetaY
-            self.dpCl_dpthethaY   += af.dCl_dAoA * cos(iAoA[i]) * dplocalAoA_dpthetaY[i,:] * surf_fact
-            self.dpCdi_dpthethaY  -= af.dCl_dAoA * sin(iAoA[i]) * dplocalAoA_dpthetaY[i,:] * surf_fact
-            self.dpCdw_dpthethaY  += af.dCdw_dAoA  * dplocalAoA_dpthetaY[i,:] * surf_fact
-            self.dpCdvp_dpthethaY += af.dCdvp_dAoA * dplocalAoA_dpthetaY[i,:] * surf_fact
-            self.dpCdf_dpthethaY  += af.dCdf_dAoA  * dplocalAoA_dpthetaY[i,:] * surf_fact
-            self.dpLift_distrib_dpthethaY[i,:] = Pdyn*af.get_Sref()*af.dCl_dAoA*cos(iAoA[i])*dplocalAoA_dpthetaY[i,:]
-            self.dpDrag_distrib_dpthethaY[i,:] = Pdyn*af.get_Sref()*dlocCd_dAoA*dplocalAoA_dpthetaY[i,:]
-            for j in xrange(N):
-                self.dpCm_ref_dpthethaY[:,j] += np.cross(OPi,dpCFi_dpthetaY[:,j])
+            self.dpCm_ref_dpiAoA    = np.cross(OP, diag_dpCF_dpiAoA, axis=0) + OPxdpCF_dplocalAoA
+            self.dpCm_ref_dpAoA     = dot(OPxdpCF_dplocalAoA, dplocalAoA_dpAoA)
+            self.dpCm_ref_dpthethaY = OPxdpCF_dplocalAoA
             
-            # Partial derivatives with respect to chi
             if grad_active:
-                self.dpCl_dpchi   += cos(iAoA[i])*(af.dCl_dAoA*dlAoAdchi[i, :]*surf_fact+af.dCl_dchi*surf_fact+af.Cl*dsurf_fact)
-                self.dpCdi_dpchi  -= sin(iAoA[i])*(af.dCl_dAoA*dlAoAdchi[i, :]*surf_fact+af.dCl_dchi*surf_fact+af.Cl*dsurf_fact)
-                self.dpCdw_dpchi  += (af.dCdw_dAoA*dlAoAdchi[i, :]*surf_fact+af.dCdw_dchi*surf_fact+af.Cdw*dsurf_fact)
-                self.dpCdvp_dpchi += (af.dCdvp_dAoA*dlAoAdchi[i, :]*surf_fact+af.dCdvp_dchi*surf_fact+af.Cdvp*dsurf_fact)
-                self.dpCdf_dpchi  += (af.dCdf_dAoA*dlAoAdchi[i, :]*surf_fact+af.dCdf_dchi*surf_fact+af.Cdf*dsurf_fact)
-                self.dpLift_distrib_dpchi[i,:] = Pdyn*cos(iAoA[i])*(af.get_Sref()*af.dCl_dAoA *dlAoAdchi[i,:]+af.get_Sref()*af.dCl_dchi+af.get_Sref_grad()*af.Cl)
-
-                dlocCd_dchi = -af.dCl_dchi*sin(iAoA[i])+af.dCdw_dchi+af.dCdvp_dchi+af.dCdf_dchi
-                self.dpDrag_distrib_dpchi[i,:] = Pdyn*(af.get_Sref()*dlocCd_dAoA*dlAoAdchi[i, :]+af.get_Sref()*dlocCd_dchi+af.get_Sref_grad()*locCd)
+                XYZ_grad    = self.get_geom().get_XYZ_grad()
+                chords_grad = sections.get_chords_grad()
+                OP_grad        = XYZ_grad.copy()
+                OP_grad[0,:,:] = OP_grad[0,:,:]+(pcop-0.25)[:,np.newaxis]*chords_grad
                 
-                for n in xrange(ndv):
-                    self.dpCm_ref_dpchi[:,n] +=  np.cross(OPi,dpCFi_dpchi[:,n])+np.cross(OPi_grad[:,n],CFi)
-
-        self.CF     = self.CF/Sref
-        bk_Cm       = self.Cm_ref
-        self.Cm_ref = self.Cm_ref/Sref
-        self.dpCm_ref_dpiAoA    = self.dpCm_ref_dpiAoA/Sref
-        self.dpCm_ref_dpAoA     = self.dpCm_ref_dpAoA/Sref
-        self.dpCm_ref_dpthethaY = self.dpCm_ref_dpthethaY/Sref
-        if grad_active:
-            for n in xrange(ndv):
-                self.dpCm_ref_dpchi[:,n]     = (self.dpCm_ref_dpchi[:,n]*Sref-bk_Cm[:]*Sref_grad[n])/(Sref)**2
+                dpCF_dpchi      = np.zeros((3,N,ndv))
+                dpCF_dpchi[0,:,:] = dlocCd_dchi*S_sect[:,np.newaxis]+locCd[:,np.newaxis]*S_sect_grad+(S_sect*dlocCd_dAoA)[:,np.newaxis]*dlAoAdchi
+                dpCF_dpchi[2,:,:] = dlocCl_dchi*S_sect[:,np.newaxis]+locCl[:,np.newaxis]*S_sect_grad+(S_sect*dlocCl_dAoA)[:,np.newaxis]*dlAoAdchi
+                
+                # sum over the sections of OP x dpCF_dpchi + dOP_dchi x CF
+                self.dpCm_ref_dpchi = np.einsum('abc,bi,cin->an', self.LEVI_CIVITA, OP, dpCF_dpchi) \
+                                    + np.einsum('abc,bin,ci->an', self.LEVI_CIVITA, OP_grad, CF)
+            
+            self.CF     = self.CF/Sref
+            bk_Cm       = self.Cm_ref
+            self.Cm_ref = self.Cm_ref/Sref
+            self.dpCm_ref_dpiAoA    = self.dpCm_ref_dpiAoA/Sref
+            self.dpCm_ref_dpAoA     = self.dpCm_ref_dpAoA/Sref
+            self.dpCm_ref_dpthethaY = self.dpCm_ref_dpthethaY/Sref
+            if grad_active:
+                self.dpCm_ref_dpchi     = (self.dpCm_ref_dpchi*Sref-np.outer(bk_Cm,Sref_grad))/(Sref)**2
         
-        Cd = self.Cdi+self.Cdf+self.Cdvp+self.Cdw
-        self.CoL = self.CoL/(self.Cl*Sref)
-        self.CoD = self.CoD/(Cd*Sref)
 #         print 'CoL=',self.CoL
 #         print 'CoD=',self.CoD
 #         print 'Cm_ref = ',self.Cm_ref
@@ -752,7 +759,7 @@ class DLLMPost:
             filename = self.get_tag()+'_F_list.dat'
         
         fid = open(filename,'w')
-        for i,F_name in enumerate(self.__F_list_names_calc):
+        for i,F_name in enumerate(self.__F_list_names_run):
             unit=None
             if   F_name[0:4] in ['Lift','Drag']:
                 unit = 'N'
@@ -760,7 +767,7 @@ class DLLMPost:
                 unit = 'm**2'
             else:
                 unit = '-'
-            line = F_name+' = '+str(self.__F_list_calc[i])+' ('+unit+') \n'
+            line = F_name+' = '+str(self.__F_list[i])+' ('+unit+') \n'
             fid.write(line)
         fid.close()
     
@@ -768,6 +775,8 @@ class DLLMPost:
     def plot(self):
         name = self.get_tag()
         Y_list = self.get_geom().get_XYZ()[1,:]
+        if 'distrib' not in self.__blocks_computed:
+            self.__basic_analysis(['distrib'])
         
         #-- Plot Lift distrib
         plt.xlim(1.1*Y_list[0], 1.1*Y_list[-1])
@@ -837,7 +846,7 @@ class DLLMPost:
         print '\n*** aerodynamic functions and coefficients ***'
         print '  Sref  = ', self.get_Sref() ,'[m**2]'
         print '  Lref  = ', self.get_Lref() , '[m]'
-        for i, func in enumerate(self.__F_list_names_calc):
+        for i, func in enumerate(self.__F_list_names_run):
             if func [0:4] in ['Lift', 'Drag']:
                 unit = '[N]'
             else:
@@ -845,4 +854,4 @@ class DLLMPost:
             if func == 'Sref':
                 pass
             else:
-                print '  ' + self.__F_list_names_calc[i] + '\t=\t' + str(self.__F_list_calc[i]) + ' ' + unit
+                print '  ' + self.__F_list_names_run[i] + '\t=\t' + str(self.__F_list[i]) + ' ' + unit
@@ -0,0 +1,142 @@
+# -*-mode: python; py-indent-offset: 4; tab-width: 8; coding: iso-8859-1 -*-
+#  DLLM (non-linear Differentiated Lifting Line Model, open source software)
+# 
+#  Copyright (C) 2013-2015 Airbus Group SAS
+# 
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+# 
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+# 
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#  
+#  https://github.com/matthieu-meaux/DLLM.git
+#
+# @author : Matthieu MEAUX
+#
+
+import cPickle
+
+class DLLMSink:
+    """
+    Result sink of a DLLM solver: receives the results after each run step.
+    This base sink discards everything.
+    """
+    def __init__(self):
+        pass
+
+    def write_direct(self, LLW):
+        pass
+
+    def write_post(self, LLW):
+        pass
+
+    def write_adjoint(self, LLW):
+        pass
+
+    def flush(self):
+        pass
+
+class DLLMMemorySink(DLLMSink):
+    """
+    Keeps the results of the evaluations in memory, one record per direct run.
+    @param max_records : maximum number of records kept, the oldest are dropped. None to keep all records.
+    """
+    def __init__(self, max_records=1):
+        DLLMSink.__init__(self)
+        self.__max_records = max_records
+        self.__records     = []
+
+    #-- Accessors
+    def get_records(self):
+        return self.__records
+
+    def get_last_record(self):
+        if len(self.__records) == 0:
+            return None
+        return self.__records[-1]
+
+    def clear(self):
+        self.__records = []
+
+    #-- Sink methods
+    def write_direct(self, LLW):
+        DLLMDirect = LLW.get_DLLMDirect()
+        record = {'gamma': DLLMDirect.get_gamma().copy(),
+                  'iAoA' : DLLMDirect.get_iAoA().copy()}
+        self.__records.append(record)
+        if self.__max_records is not None and len(self.__records) > self.__max_records:
+            del self.__records[0]
+
+    def write_post(self, LLW):
+        record = self.get_last_record()
+        if record is not None:
+            record['F_list_names'] = list(LLW.get_F_list_names())
+            record['F_list']       = LLW.get_F_list().copy()
+
+    def write_adjoint(self, LLW):
+        record = self.get_last_record()
+        if record is not None:
+            record['dF_list_dchi'] = LLW.get_dF_list_dchi().copy()
+
+class DLLMBufferedSink(DLLMMemorySink):
+    """
+    Appends the records of many evaluations to a single binary file, buffer_size records at a time.
+    The file is a sequence of pickled lists of records, read back by load.
+    """
+    def __init__(self, filename, buffer_size=100):
+        DLLMMemorySink.__init__(self, max_records=None)
+        self.__filename    = filename
+        self.__buffer_size = buffer_size
+
+    def get_filename(self):
+        return self.__filename
+
+    def get_buffer_size(self):
+        return self.__buffer_size
+
+    def write_direct(self, LLW):
+        # the previous records are complete once a new evaluation starts
+        if len(self.get_records()) >= self.__buffer_size:
+            self.flush()
+        DLLMMemorySink.write_direct(self, LLW)
+
+    def flush(self):
+        records = self.get_records()
+        if len(records) > 0:
+            fid = open(self.__filename, 'ab')
+            cPickle.dump(records, fid, cPickle.HIGHEST_PROTOCOL)
+            fid.close()
+            self.clear()
+
+    @staticmethod
+    def load(filename):
+        records = []
+        fid = open(filename, 'rb')
+        while True:
+            try:
+                records += cPickle.load(fid)
+            except EOFError:
+                break
+        fid.close()
+        return records
+
+class DLLMTextSink(DLLMSink):
+    """
+    Legacy text output: circulation, induced angles, functions and gradients files
+    """
+    def write_direct(self, LLW):
+        LLW.get_DLLMDirect().write_gamma_to_file()
+
+    def write_post(self, LLW):
+        LLW.export_F_list()
+
+    def write_adjoint(self, LLW):
+        LLW.export_dF_list_dchi()
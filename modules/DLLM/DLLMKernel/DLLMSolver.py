@@ -28,11 +28,15 @@ from DLLM.DLLMKernel.DLLMMesh import DLLMMesh
 from DLLM.DLLMKernel.DLLMDirect import DLLMDirect
 from DLLM.DLLMKernel.DLLMPost import DLLMPost
 from DLLM.DLLMKernel.DLLMAdjoint import DLLMAdjoint
+from DLLM.DLLMKernel.DLLMSink import DLLMSink, DLLMMemorySink, DLLMBufferedSink, DLLMTextSink
 
 import numpy as np
+from scipy.linalg import lu_factor, lu_solve
 
 class DLLMSolver:
     ERROR_MSG='ERROR in DLLMSolver.'
+    POS_SENSITIVITY_MODES = ['auto', 'adjoint', 'forward']
+    POS_SINKS = ['none', 'memory', 'buffered', 'text']
     def __init__(self, tag, geom, OC, verbose = 0, grad_active=True):
         '''
         Constructor for wings based on lifting line theory
@@ -57,6 +61,13 @@ class DLLMSolver:
         self.__Lref_grad   = None
         self.__Sref_grad   = None
         
+        # gradient computation: forward when there are less design variables than functions in 'auto' mode
+        self.__sensitivity_mode = 'auto'
+        
+        # results kept in memory by default, the legacy text files are written by the 'text' sink
+        self.__sink = DLLMMemorySink()
+        self.__sweep_iterations = None
+        
         self.__DLLMMesh    = DLLMMesh(self, verbose = self.__verbose)
         self.__DLLMDirect  = DLLMDirect(self, verbose = self.__verbose)
         self.__DLLMPost    = DLLMPost(self, verbose = self.__verbose)
@@ -76,8 +87,8 @@ class DLLMSolver:
     def get_geom(self):
         return self.__geom
     
-    def get_airfoils(self):
-        return self.get_geom().get_linked_airfoils()
+    def get_sections(self):
+        return self.get_geom().get_sections()
     
     def get_OC(self):
         return self.__OC
@@ -113,8 +124,8 @@ class DLLMSolver:
     def get_K(self):
         return self.__DLLMMesh.get_K()
     
-    def get_dK_dchi(self):
-        return self.__DLLMMesh.get_dK_dchi()
+    def comp_dK_dchi_gamma(self, gamma):
+        return self.__DLLMMesh.comp_dK_dchi_gamma(gamma)
     
     #-- DLLMDirect accessors
     def set_direct_computed(self, bool=True):
@@ -126,6 +137,32 @@ class DLLMSolver:
     def get_convergence_history(self):
         return self.__DLLMDirect.get_convergence_history()
     
+    def get_F_list_correction(self):
+        return self.__DLLMDirect.get_F_list_correction()
+    
+    def get_corrected_F_list(self):
+        '''
+        Functions corrected by the error estimate of an adaptive direct computation, see set_F_tolerance
+        '''
+        F_list = np.array(self.get_F_list())
+        F_list_correction = self.get_F_list_correction()
+        if F_list_correction is not None:
+            F_list += F_list_correction
+        return F_list
+    
+    def comp_F_list_correction(self, diAoA):
+        '''
+        First order variation of the functions of get_F_list_names() for the iAoA step diAoA from the current direct state.
+        Only dpF/dpW is computed, the post-processing results and status are left unchanged.
+        '''
+        return np.dot(self.__DLLMPost.comp_dpF_list_dpiAoA(), diAoA)
+    
+    def get_sweep_iterations(self):
+        '''
+        Number of Newton iterations of each point of the last run_sweep, -1 when the direct method does not record them
+        '''
+        return self.__sweep_iterations
+        
     def get_localAoA(self):
         return self.__DLLMDirect.get_localAoA()
     
@@ -138,6 +175,12 @@ class DLLMSolver:
     def get_dpR_dpW(self):
         return self.__DLLMDirect.get_dpR_dpiAoA()
     
+    def get_dpR_dpW_lu(self):
+        return self.__DLLMDirect.get_dpR_dpiAoA_lu()
+    
+    def is_dpR_dpW_lu_current(self):
+        return self.__DLLMDirect.is_dpR_dpiAoA_lu_current()
+    
     def get_dpR_dpchi(self):
         return self.__DLLMDirect.get_dpR_dpchi()
     
@@ -200,6 +243,12 @@ class DLLMSolver:
     def get_dF_list_dchi(self):
         return self.__DLLMAdjoint.get_dF_list_dchi()
     
+    def get_sensitivity_mode(self):
+        return self.__sensitivity_mode
+    
+    def get_sink(self):
+        return self.__sink
+    
     #-- Setters
     def __reinit_modules(self):
         self.__DLLMDirect.set_computed(False)
@@ -207,18 +256,27 @@ class DLLMSolver:
         if self.get_grad_active():
             self.__DLLMAdjoint.set_computed(False)
         
+    def set_tag(self, tag):
+        """
+        Set the tag of the solver, prefix of its output files. The file name of a buffered sink is set when the sink is.
+        """
+        self.__tag = tag
+        
     def set_OC(self, OC):
         self.__OC = OC
         self.__reinit_modules()
         
     def set_geom(self, geom):
         self.__geom  = geom
-        self.__DLLMMesh.recompute()
+        self.__DLLMMesh.update()
         self.__reinit_modules()
         
     def set_F_list_names(self, F_list_names):
         self.__DLLMPost.set_F_list_names(F_list_names)
         
+    def set_distrib_active(self, distrib_active=True):
+        self.__DLLMPost.set_distrib_active(distrib_active)
+        
     #-- DLLMDirect setters
     def set_relax_factor(self, relax_factor):
         self.__DLLMDirect.set_relax_factor(relax_factor)
@@ -232,20 +290,54 @@ class DLLMSolver:
     def set_method(self, method):
         self.__DLLMDirect.set_method(method)
         
+    def set_chord_ratio(self, chord_ratio):
+        self.__DLLMDirect.set_chord_ratio(chord_ratio)
+        
+    def set_F_tolerance(self, F_tolerance):
+        self.__DLLMDirect.set_F_tolerance(F_tolerance)
+        
     def set_gamma_file_name(self, gamma_f_name):
         self.__DLLMDirect.set_gamma_file_name(gamma_f_name)
         
     def set_xyz_ref(self, xyz_ref):
         self.__xyz_ref = xyz_ref
         
+    def set_sensitivity_mode(self, sensitivity_mode):
+        ERROR_MSG=self.ERROR_MSG+'set_sensitivity_mode: '
+        if not sensitivity_mode in self.POS_SENSITIVITY_MODES:
+            raise Exception(ERROR_MSG+'sensitivity_mode '+str(sensitivity_mode)+' not in possible modes : '+str(self.POS_SENSITIVITY_MODES))
+        self.__sensitivity_mode = sensitivity_mode
+        
+    def set_sink(self, sink):
+        '''
+        Set the results sink
+        @param sink : a DLLMSink instance or a sink type in POS_SINKS
+        '''
+        ERROR_MSG=self.ERROR_MSG+'set_sink: '
+        if not isinstance(sink, DLLMSink):
+            if not sink in self.POS_SINKS:
+                raise Exception(ERROR_MSG+'sink '+str(sink)+' not in possible sinks : '+str(self.POS_SINKS))
+            if   sink == 'none':
+                sink = DLLMSink()
+            elif sink == 'memory':
+                sink = DLLMMemorySink()
+            elif sink == 'buffered':
+                sink = DLLMBufferedSink(self.get_tag()+'_results.bin')
+            else:
+                sink = DLLMTextSink()
+        self.__sink.flush()
+        self.__sink = sink
+        
     #-- Run methods
     def run_direct(self):
         self.__DLLMDirect.run()
+        self.__sink.write_direct(self)
         
     def run_post(self, F_list_names=None):
         ERROR_MSG=self.ERROR_MSG+'run_post: '
         if self.is_direct_computed():
             self.__DLLMPost.run(F_list_names=F_list_names)
+            self.__sink.write_post(self)
         else:
             print ERROR_MSG+'Cannot run post-processing if solution is not computed'
             
@@ -253,12 +345,75 @@ class DLLMSolver:
         ERROR_MSG=self.ERROR_MSG+'run_adjoint: '
         if self.get_grad_active():
             if self.is_post_computed():
-                self.__DLLMAdjoint.run()
+                if self.__use_forward_sensitivity():
+                    self.__DLLMAdjoint.run_forward()
+                else:
+                    self.__DLLMAdjoint.run()
+                self.__sink.write_adjoint(self)
             else:
                 print ERROR_MSG+'Cannot run adjoint if post-processing is not computed'
         else:
             print ERROR_MSG+'Cannot run adjoint if gradient is not active'
             
+    def run_sweep(self, AoA_list, Mach_list=None):
+        '''
+        Polar computation by predictor-corrector continuation: each operating point is started from the previous
+        solution, extrapolated along the tangent dW/dAoA for angle of attack steps, and converged by Newton iterations.
+        The tangent is solved at each converged point with the LU factorization of dpR/dpW held by the direct solver
+        when it is the one of the converged point, a new one otherwise, so that every angle of attack step is predicted.
+        Mach number steps are started from the previous solution. The operating condition is left at the last point.
+        @param AoA_list : angles of attack in degrees
+        @param Mach_list : Mach numbers, None to keep the current one
+        @return the array of the functions of get_F_list_names() at each point, shape (n_points, nF)
+        '''
+        ERROR_MSG=self.ERROR_MSG+'run_sweep: '
+        if self.get_geom().get_AoA() is not None:
+            raise Exception(ERROR_MSG+'the angle of attack is set by the geometry design variables, it cannot be swept')
+        OC = self.get_OC()
+        if Mach_list is None:
+            Mach_list = OC.get_Mach()
+        AoA_list, Mach_list = np.broadcast_arrays(np.atleast_1d(AoA_list), np.atleast_1d(Mach_list))
+        n_points = len(AoA_list)
+        F_array = None
+        self.__sweep_iterations = -np.ones(n_points, dtype=int)
+        iAoA = None
+        dW_dAoA = None
+        for k in xrange(n_points):
+            OC.set_AoA(AoA_list[k])
+            OC.set_Mach(Mach_list[k])
+            OC.compute_atmosphere()
+            self.set_OC(OC)
+            if iAoA is not None:
+                # predictor: first order along the angle of attack, the Mach number steps are started from the previous solution
+                iAoA0 = iAoA.copy()
+                if dW_dAoA is not None:
+                    iAoA0 += dW_dAoA*(AoA_list[k]-AoA_list[k-1])*np.pi/180.
+                self.__DLLMDirect.set_iAoA0(iAoA0)
+            # corrector
+            self.run_direct()
+            self.run_post()
+            res_hist = self.get_convergence_history()
+            if res_hist is not None:
+                self.__sweep_iterations[k] = len(res_hist)-1
+            F_list = self.get_F_list()
+            if F_array is None:
+                F_array = np.zeros((n_points, len(F_list)))
+            F_array[k,:] = F_list
+            iAoA = self.get_iAoA().copy()
+            dW_dAoA = None
+            if k < n_points-1 and AoA_list[k+1] != AoA_list[k] and Mach_list[k+1] == Mach_list[k]:
+                if self.is_dpR_dpW_lu_current():
+                    lu = self.get_dpR_dpW_lu()
+                else:
+                    lu = lu_factor(self.comp_dpR_dpiAoA(iAoA))
+                dW_dAoA = -lu_solve(lu, self.comp_dpR_dpAoA())
+        return F_array
+    
+    def __use_forward_sensitivity(self):
+        if self.__sensitivity_mode == 'auto':
+            return self.get_geom().get_ndv() < len(self.get_F_list_names())
+        return self.__sensitivity_mode == 'forward'
+            
     #-- Export methods
     def plot(self):
         if self.__DLLMDirect.is_computed():
@@ -266,6 +421,9 @@ class DLLMSolver:
         if self.__DLLMPost.is_computed():
             self.__DLLMPost.plot()
     
+    def flush_sink(self):
+        self.__sink.flush()
+    
     def export_F_list(self, filename=None):
         self.__DLLMPost.export_F_list(filename=filename)
         
@@ -124,6 +124,10 @@ class DLLMTargetCl(DLLMSolver):
     def get_dpR_dpW(self):
         return self.__dpR_TCl_dpW
     
+    def get_dpR_dpW_lu(self):
+        # no factorization is kept for the jacobian augmented with the AoA
+        return None
+    
     def get_dpR_dpchi(self):
         DLLMDirect = self.get_DLLMDirect()
         DLLMPost   = self.get_DLLMPost()
@@ -158,7 +162,7 @@ class DLLMTargetCl(DLLMSolver):
 #        self.__NRPb.valid_jacobian(W0, iprint=True)
         self.__NRPb.solve()
         DLLMDirect.set_computed(True)
-        DLLMDirect.write_gamma_to_file()
+        self.get_sink().write_direct(self)
         if self.get_grad_active():
             DLLMDirect.comp_dpR_dpchi()
             
\ No newline at end of file
@@ -123,6 +123,10 @@ class DLLMTargetLift(DLLMSolver):
     def get_dpR_dpW(self):
         return self.__dpR_TL_dpW
     
+    def get_dpR_dpW_lu(self):
+        # no factorization is kept for the jacobian augmented with the AoA
+        return None
+    
     def get_dpR_dpchi(self):
         DLLMDirect = self.get_DLLMDirect()
         DLLMPost   = self.get_DLLMPost()
@@ -157,6 +161,6 @@ class DLLMTargetLift(DLLMSolver):
 #        self.__NRPb.valid_jacobian(W0, iprint=True)
         self.__NRPb.solve()
         DLLMDirect.set_computed(True)
-        DLLMDirect.write_gamma_to_file()
+        self.get_sink().write_direct(self)
         if self.get_grad_active():
             DLLMDirect.comp_dpR_dpchi()
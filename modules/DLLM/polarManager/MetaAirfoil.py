@@ -38,13 +38,39 @@ class MetaAirfoil(Airfoil):
     
     def __init__(self, OC, surrogate_model, relative_thickness=.12, camber=0., Sref=1., Lref=1., sweep=0., surrogate_fcs=None, grad_active=True):
 
-        Airfoil.__init__(self, OC, Sref, Lref, relative_thickness, sweep, camber, grad_active=grad_active)
+        Airfoil.__init__(self, OC, Lref=Lref, Sref=Sref, grad_active=grad_active)
+        self.set_sweep(sweep)
+        
+        self.__rel_thick      = relative_thickness
+        self.__rel_thick_grad = None
+        self.__camber         = camber
+        
         if not surrogate_fcs:
             self.__coefs = SurrogateCoefs(surrogate_model)
         else:
             self.__coefs = surrogate_fcs
         self.__surrogate_model = surrogate_model
         
+    #-- Setters
+    def set_rel_thick(self, rel_thick):
+        self.__rel_thick = rel_thick
+        
+    def set_rel_thick_grad(self, rel_thick_grad):
+        self.__rel_thick_grad = rel_thick_grad
+        
+    def set_camber(self, camber):
+        self.__camber = camber
+    
+    #-- Accessors
+    def get_rel_thick(self):
+        return self.__rel_thick
+    
+    def get_rel_thick_grad(self):
+        return self.__rel_thick_grad
+    
+    def get_camber(self):
+        return self.__camber
+        
     #-- Note: to be updated with new way of working
     def Cl(self, alpha, Mach):
         sweep=self.get_sweep()
@@ -324,6 +350,88 @@ class MetaAirfoil(Airfoil):
         gradCm = self.__coefs.grad_Cm(ToC, self.get_camber(), alpha, Mach_normal)
         return gradCm
     
+    #-- Methods to compute aero coefficients for all sections at once
+    def comp_aero_coeffs_batch(self, AoA, Mach):
+        """
+        Evaluate the meta model for all the sections in a single call: AoA and section attributes are arrays.
+        Pressure drag is stored as Cdvp, wave drag is included in the meta model.
+        """
+        OC = self.get_OC()
+        c  = OC.get_c()
+        nu = OC.get_nu()
+        N  = len(AoA)
+        P  = self.POW_COS
+        L     = self.get_Lref()
+        sweep = self.get_sweep()
+        toc   = self.get_rel_thick()
+        cos_sweep = np.cos(sweep)
+        sin_sweep = np.sin(sweep)
+        Mach_normal = Mach*cos_sweep**P
+        ToC = toc/cos_sweep**P*100.
+        camber = self.get_camber()*np.ones(N)
+        sweep_corr = cos_sweep**(2.*P)
+        
+        Cl_m  = self.__coefs.meta_Cl_batch(ToC, camber, AoA, Mach_normal)
+        Cd_m  = self.__coefs.meta_Cd_batch(ToC, camber, AoA, Mach_normal)
+        gradCl = self.__coefs.grad_Cl_batch(ToC, camber, AoA, Mach_normal)
+        gradCd = self.__coefs.grad_Cd_batch(ToC, camber, AoA, Mach_normal)
+        
+        k, coef = self.k_coef()
+        Cl0 = self.Cl0()
+        
+        #-- Lift
+        self.Cl       = Cl_m*sweep_corr
+        self.dCl_dAoA = gradCl[:,2]*sweep_corr
+        
+        #-- Pressure drag without spurious drag
+        Cds       = k + coef*(Cl_m - Cl0)**2.
+        Cds_alpha = coef*2.*(Cl_m - Cl0)*gradCl[:,2]
+        pressure  = Cd_m-Cds > 0.
+        self.Cdvp       = np.where(pressure, Cd_m-Cds, 0.)
+        self.dCdvp_dAoA = np.where(pressure, gradCd[:,2]-Cds_alpha, 0.)
+        self.Cdw        = np.zeros(N)
+        self.dCdw_dAoA  = np.zeros(N)
+        
+        #-- Friction drag
+        Re = Mach*cos_sweep*c*L/nu
+        toc_s = toc/cos_sweep
+        thick_coeff = 1.+2.1*toc_s
+        lam  = np.logical_and(Re >= 1.e-12, Re < 1.e5)
+        turb = Re >= 1.e5
+        self.Cdf = np.zeros(N)
+        self.Cdf[lam]  = 1.328/np.sqrt(Re[lam])*thick_coeff[lam]
+        self.Cdf[turb] = 0.074*Re[turb]**(-0.2)*thick_coeff[turb]
+        self.dCdf_dAoA = np.zeros(N)
+        
+        self.pcop = 0.25*np.ones(N)
+        
+        if self.is_grad_active():
+            dL     = self.get_Lref_grad()
+            dsweep = self.get_sweep_grad()
+            dtoc   = self.get_rel_thick_grad()
+            dsweep_corr = (-2.*P*sin_sweep*cos_sweep**(2.*P-1.))[:,np.newaxis]*dsweep
+            dToC_dchi   = 100.*(dtoc*(cos_sweep**P)[:,np.newaxis]+(P*toc*sin_sweep*cos_sweep**(P-1.))[:,np.newaxis]*dsweep)/(cos_sweep**(2*P))[:,np.newaxis]
+            dMach_dchi  = (-P*Mach*sin_sweep*cos_sweep**(P-1.))[:,np.newaxis]*dsweep
+            
+            dClm_dchi = gradCl[:,0][:,np.newaxis]*dToC_dchi + gradCl[:,3][:,np.newaxis]*dMach_dchi
+            dCdm_dchi = gradCd[:,0][:,np.newaxis]*dToC_dchi + gradCd[:,3][:,np.newaxis]*dMach_dchi
+            
+            self.dCl_dchi = dClm_dchi*sweep_corr[:,np.newaxis] + Cl_m[:,np.newaxis]*dsweep_corr
+            
+            dCds_dchi = (2.*coef*(Cl_m - Cl0))[:,np.newaxis]*dClm_dchi
+            self.dCdvp_dchi = np.where(pressure[:,np.newaxis], dCdm_dchi-dCds_dchi, 0.)
+            self.dCdw_dchi  = np.zeros(dL.shape)
+            
+            dRe = (Mach*cos_sweep*c/nu)[:,np.newaxis]*dL-(Mach*sin_sweep*c*L/nu)[:,np.newaxis]*dsweep
+            dtoc_s = (dtoc*cos_sweep[:,np.newaxis]+(toc*sin_sweep)[:,np.newaxis]*dsweep)/(cos_sweep**2)[:,np.newaxis]
+            dthick_coeff = 2.1*dtoc_s
+            lam = np.logical_and(Re >= 1.e-6, Re < 1.e5)
+            self.dCdf_dchi = np.zeros(dL.shape)
+            self.dCdf_dchi[lam]  = (-0.664/(Re[lam]**1.5))[:,np.newaxis]*dRe[lam]*thick_coeff[lam][:,np.newaxis]\
+                                 + (1.328/np.sqrt(Re[lam]))[:,np.newaxis]*dthick_coeff[lam]
+            self.dCdf_dchi[turb] = (-0.0148*Re[turb]**(-1.2))[:,np.newaxis]*dRe[turb]*thick_coeff[turb][:,np.newaxis]\
+                                 + (0.074*Re[turb]**(-0.2))[:,np.newaxis]*dthick_coeff[turb]
+    
 #     def dCl_dthickness(self):
 #         sweep=self.get_sweep()
 #         Mach_normal= Mach*np.cos(sweep)
@@ -425,5 +533,8 @@ class MetaAirfoil(Airfoil):
         if OC is None:
             OC = self.get_OC()
         return MetaAirfoil(OC, self.__surrogate_model, relative_thickness=rel_thick, camber=camber, Sref=Sref, Lref=Lref, sweep=sweep, surrogate_fcs=self.__coefs)
+    
+    def get_shared_data(self):
+        return [self.__coefs, self.__surrogate_model]
         
         
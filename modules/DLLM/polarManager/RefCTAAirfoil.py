@@ -22,10 +22,11 @@
 # @author : Matthieu Meaux
 
 # - Local imports -
+import os
 import string
 import numpy as np
 import matplotlib.pylab as plt
-from scipy.interpolate import interp1d
+from scipy.interpolate import make_interp_spline, PPoly
 
 from airfoil import Airfoil
 
@@ -34,6 +35,9 @@ class RefCTAAirfoil(Airfoil):
     An analytic airfoil based on linear theory
     """
     THICKNESS_CORRECTION = 0.7698
+    ERROR_MSG = 'ERROR in RefCTAAirfoil.'
+    # process-wide polar tables shared read-only by all instances: absolute file path -> (modification time, breaks, coeffs)
+    POLAR_REGISTRY = {}
     
     def __init__(self, OC, Sref=1., Lref=1., y_pos=None, grad_active=False):
         '''
@@ -47,9 +51,14 @@ class RefCTAAirfoil(Airfoil):
         
         self.y_pos = y_pos
         
+        # relative thickness is given by the polars, only stored for information
+        self.__rel_thick      = None
+        self.__rel_thick_grad = None
+        
         self.__y_def_list    = None
         self.__file_def_list = None
-        self.__interp_list   = None
+        # piecewise cubic polars of Cl, Cdw, Cdvp, Cdf and Cmy versus AoA in degrees, see init_interpolators
+        self.__tables        = None
         
         self.__index_p       = None
         self.__index_m       = None
@@ -60,6 +69,12 @@ class RefCTAAirfoil(Airfoil):
     def set_y_pos(self, y_pos):
         self.y_pos = y_pos
         
+    def set_rel_thick(self, rel_thick):
+        self.__rel_thick = rel_thick
+        
+    def set_rel_thick_grad(self, rel_thick_grad):
+        self.__rel_thick_grad = rel_thick_grad
+        
     def set_y_def_list(self, y_def_list):
         self.__y_def_list = y_def_list
         
@@ -69,19 +84,40 @@ class RefCTAAirfoil(Airfoil):
     def set_dict_info(self, dict_info):
         self.__dict_info = dict_info
     
+    #-- Accessors
+    def get_rel_thick(self):
+        return self.__rel_thick
+    
+    def get_rel_thick_grad(self):
+        return self.__rel_thick_grad
+    
+    #-- Methods
     def init_interpolators(self):
 #         print 'self.__y_def_list = ',self.__y_def_list 
 #         print 'self.__file_def_list = ',self.__file_def_list
-        self.__interp_list = []
+        breaks_list = []
+        coeffs_list = []
         #-- Check length
         if len(self.__y_def_list) != len(self.__file_def_list):
             raise Exception,'RefCTAAirfoil: Inconsistent input data'
         for filename in self.__file_def_list:
-            #-- Read file
-            AoA_list ,CL_list, CDw_list, CDvp_list, CDf_list, Cmy_list = self.__read_file(filename)
-            out_coeffs=np.array([CL_list,CDw_list,CDvp_list,CDf_list,Cmy_list])
-            interp_coeffs = interp1d(AoA_list, out_coeffs, kind='cubic')
-            self.__interp_list.append(interp_coeffs)
+            breaks, coeffs = self.__get_polar(filename)
+            breaks_list.append(breaks)
+            coeffs_list.append(coeffs)
+        
+        # tables of all polars padded to the same number of intervals:
+        # breaks (n_polars, n_breaks) padded with inf, coeffs (n_polars, 4, n_breaks-1, 5) padded with zeros
+        n_breaks = max([len(breaks) for breaks in breaks_list])
+        breaks = np.inf*np.ones((len(breaks_list), n_breaks))
+        coeffs = np.zeros((len(breaks_list), 4, n_breaks-1, 5))
+        for k in xrange(len(breaks_list)):
+            breaks[k,:len(breaks_list[k])] = breaks_list[k]
+            coeffs[k,:,:len(breaks_list[k])-1,:] = coeffs_list[k]
+        n_intervals = np.array([len(b)-1 for b in breaks_list])
+        AoA_max = np.array([b[-1] for b in breaks_list])
+        for table in (breaks, coeffs, n_intervals, AoA_max):
+            table.flags.writeable = False
+        self.__tables = (breaks, coeffs, n_intervals, AoA_max)
         
 #         #-- Test plotting of polars
 #         AoA_test=np.linspace(-6.0, 6.0, 50)
@@ -159,57 +195,147 @@ class RefCTAAirfoil(Airfoil):
         self.__fact_m = fact
         self.__fact_p   = (1.-fact)
 
+    def init_interp_factors_batch(self):
+        """
+        Same as init_interp_factors when y_pos is the array of the span-wise positions of all sections
+        """
+        y_def = np.array(self.__y_def_list)
+        test_y = abs(np.asarray(self.y_pos))
+        i = np.searchsorted(y_def, test_y, side='left')
+        self.__index_m   = i-1
+        self.__index_p   = i
+        
+        fact = (y_def[self.__index_p]-test_y)/(y_def[self.__index_p]-y_def[self.__index_m])
+        self.__fact_m = fact
+        self.__fact_p = (1.-fact)
+
     #-- Methods to compute aero coefficients
     def comp_aero_coeffs(self, AoA, Mach):
-        AoA_deg = AoA*180./np.pi
         #-- Mach is ignored for this airfoil
-        out_data_m = self.__interp_list[self.__index_m](AoA_deg)
-        out_data_p = self.__interp_list[self.__index_p](AoA_deg)
-        out_data_m_d = self.__interp_list[self.__index_m](AoA_deg+0.05)
-        out_data_p_d = self.__interp_list[self.__index_p](AoA_deg+0.05)
-#         print 'out_data_m = ',out_data_m
-#         print 'out_data_p = ',out_data_p
-        self.Cl   = self.__fact_m*out_data_m[0] + self.__fact_p*out_data_p[0]
-        Cl_d = self.__fact_m*out_data_m_d[0] + self.__fact_p*out_data_p_d[0]
-        self.Cdw  = self.__fact_m*out_data_m[1] + self.__fact_p*out_data_p[1]
-        self.Cdvp = self.__fact_m*out_data_m[2] + self.__fact_p*out_data_p[2]
-        self.Cdf  = self.__fact_m*out_data_m[3] + self.__fact_p*out_data_p[3]
-        
-        self.dCl_dAoA = (Cl_d-self.Cl)/(0.05*np.pi/180.)
-        
-        Cmy = self.__fact_m*out_data_m[4] + self.__fact_p*out_data_p[4]
-        
-        self.pcop  = 0.25
-        if self.Cl != 0:
-            delta_d = Cmy/abs(self.Cl)
+        out_data, dout_data = self.__interpolate(np.array([AoA]), np.array([self.__index_m]), np.array([self.__index_p]),
+                                                 np.array([self.__fact_m]), np.array([self.__fact_p]))
+        self.Cl         = out_data[0,0]
+        self.Cdw        = out_data[1,0]
+        self.Cdvp       = out_data[2,0]
+        self.Cdf        = out_data[3,0]
+        self.dCl_dAoA   = dout_data[0,0]
+        self.dCdw_dAoA  = dout_data[1,0]
+        self.dCdvp_dAoA = dout_data[2,0]
+        self.dCdf_dAoA  = dout_data[3,0]
+        pcop, dpcop_dAoA = self.__comp_pcop(out_data, dout_data)
+        self.pcop       = pcop[0]
+        self.dpcop_dAoA = dpcop_dAoA[0]
             
-        self.pcop = self.pcop-delta_d
+    def comp_aero_coeffs_batch(self, AoA, Mach):
+        """
+        Same as comp_aero_coeffs for all the sections at once
+        """
+        #-- Mach is ignored for this airfoil
+        out_data, dout_data = self.__interpolate(AoA, self.__index_m, self.__index_p, self.__fact_m, self.__fact_p)
+        self.Cl         = out_data[0]
+        self.Cdw        = out_data[1]
+        self.Cdvp       = out_data[2]
+        self.Cdf        = out_data[3]
+        self.dCl_dAoA   = dout_data[0]
+        self.dCdw_dAoA  = dout_data[1]
+        self.dCdvp_dAoA = dout_data[2]
+        self.dCdf_dAoA  = dout_data[3]
+        self.pcop, self.dpcop_dAoA = self.__comp_pcop(out_data, dout_data)
         
-#         print 'delta_d = ',delta_d
-#         
-#         print 'Cl_d = ',Cl_d
-#         print 'self.Cl = ',self.Cl
-#         print 'self.Cdw = ',self.Cdw
-#         print 'self.Cdvp = ',self.Cdvp
-#         print 'self.Cdf = ',self.Cdf
-#         
-#         print 'self.dCl_dAoA = ',self.dCl_dAoA,2.*np.pi
-#         
-#         print 'Cmy = ',Cmy
-#         print 'self.pcop = ',self.pcop
-            
+    def __comp_pcop(self, out_data, dout_data):
+        """
+        Center of pressure from Cl and Cmy, pcop = 0.25-Cmy/|Cl|, 0.25 where Cl is null, and its derivative
+        """
+        Cl        = out_data[0]
+        Cmy       = out_data[4]
+        non_zero  = Cl != 0
+        delta_d   = np.zeros(len(Cl))
+        ddelta_d  = np.zeros(len(Cl))
+        abs_Cl    = abs(Cl[non_zero])
+        delta_d[non_zero]  = Cmy[non_zero]/abs_Cl
+        ddelta_d[non_zero] = (dout_data[4][non_zero]-delta_d[non_zero]*np.sign(Cl[non_zero])*dout_data[0][non_zero])/abs_Cl
+        return 0.25-delta_d, -ddelta_d
+    
+    def __interpolate(self, AoA, index_m, index_p, fact_m, fact_p):
+        """
+        Coefficients Cl, Cdw, Cdvp, Cdf, Cmy and their derivatives with respect to AoA (in radians) for each section,
+        blended between the polars index_m and index_p with the factors fact_m and fact_p
+        @return two (5, n) arrays
+        """
+        ERROR_MSG = self.ERROR_MSG+'__interpolate: '
+        breaks, coeffs, n_intervals, AoA_max = self.__tables
+        n = len(AoA)
+        # both polars of all sections at once
+        k       = np.concatenate((index_m, index_p))
+        fact    = np.concatenate((fact_m, fact_p))[:,np.newaxis]
+        AoA_deg = np.concatenate((AoA, AoA))*180./np.pi
+        if (AoA_deg < breaks[k,0]).any() or (AoA_deg > AoA_max[k]).any():
+            raise Exception(ERROR_MSG+'AoA out of the range of the polars')
+        # interval of each AoA and Horner evaluation of its cubic and of the derivative
+        i  = np.minimum((breaks[k] <= AoA_deg[:,np.newaxis]).sum(axis=1)-1, n_intervals[k]-1)
+        dx = (AoA_deg-breaks[k,i])[:,np.newaxis]
+        c  = coeffs[k,:,i,:]
+        val  = fact*(((c[:,0]*dx+c[:,1])*dx+c[:,2])*dx+c[:,3])
+        dval = fact*((3.*c[:,0]*dx+2.*c[:,1])*dx+c[:,2])*180./np.pi
+        return (val[:n]+val[n:]).T, (dval[:n]+dval[n:]).T
+    
     def get_scaled_copy(self, OC=None, Sref=None, Lref=None, rel_thick=None, grad_active=True):
         if Sref is None:
             Sref=self.get_Sref()
         if Lref is None:
             Lref=self.get_Lref()
-        if rel_thick is None:
-            rel_thick = self.get_rel_thick()
         if OC is None:
             OC = self.get_OC()
-        return AnalyticAirfoil(OC, self.__AoA0_deg, Sref=Sref, Lref=Lref, rel_thick=rel_thick, Ka=self.__Ka, grad_active=self.is_grad_active())
+        scaled_af = RefCTAAirfoil(OC, Sref=Sref, Lref=Lref, y_pos=self.y_pos, grad_active=self.is_grad_active())
+        scaled_af.set_y_def_list(self.__y_def_list)
+        scaled_af.set_file_def_list(self.__file_def_list)
+        # polar tables are shared with the scaled copy
+        scaled_af.__tables = self.__tables
+        if self.y_pos is not None:
+            scaled_af.init_interp_factors()
+        return scaled_af
+    
+    def get_batch_copy(self, airfoils, Sref, Lref):
+        batch_af = self.get_scaled_copy(Sref=Sref, Lref=Lref)
+        batch_af.set_y_pos(np.array([af.y_pos for af in airfoils]))
+        batch_af.init_interp_factors_batch()
+        return batch_af
+    
+    def get_shared_data(self):
+        return [self.__tables]
+    
+    @staticmethod
+    def clear_polar_registry():
+        RefCTAAirfoil.POLAR_REGISTRY.clear()
     
     #-- Private methods
+    def __get_polar(self, filename):
+        """
+        Piecewise cubic table of a polar file from the registry, the file is read and fitted only if it is not
+        registered yet or if it was modified since
+        @return the breaks and the (4, n_breaks-1, 5) coefficients of Cl, Cdw, Cdvp, Cdf and Cmy versus AoA in degrees
+        """
+        path  = os.path.abspath(filename)
+        mtime = os.path.getmtime(path)
+        entry = self.POLAR_REGISTRY.get(path)
+        if entry is not None and entry[0] == mtime:
+            return entry[1], entry[2]
+        #-- Read file
+        AoA_list ,CL_list, CDw_list, CDvp_list, CDf_list, Cmy_list = self.__read_file(path)
+        out_coeffs=np.array([CL_list,CDw_list,CDvp_list,CDf_list,Cmy_list])
+        # same cubic spline as interp1d(kind='cubic'), converted once to piecewise polynomial coefficients
+        pp_list = [PPoly.from_spline(make_interp_spline(AoA_list, coeff, k=3)) for coeff in out_coeffs]
+        # the repeated end knots of the spline give null length intervals, they are removed
+        x = pp_list[0].x
+        intervals = np.flatnonzero(x[1:] > x[:-1])
+        breaks = np.append(x[intervals], x[intervals[-1]+1])
+        coeffs = np.dstack([pp.c[:,intervals] for pp in pp_list])
+        # shared tables are read-only
+        breaks.flags.writeable = False
+        coeffs.flags.writeable = False
+        self.POLAR_REGISTRY[path] = (mtime, breaks, coeffs)
+        return breaks, coeffs
+    
     def __read_file(self, filename):
         fid = open(filename,'r')
         all_lines = fid.readlines()
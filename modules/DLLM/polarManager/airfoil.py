@@ -23,6 +23,8 @@
 # @author : Matthieu Meaux
 
 # - Local imports -
+import numpy as np
+
 class Airfoil:
     '''
     Airfoil class for lifting line computations. 
@@ -158,12 +160,49 @@ class Airfoil:
         if self.is_grad_active():
             dL = self.get_Lref_grad()
             self.dgamma_dchi = 0.5*(dL*self.Cl+L*self.dCl_dchi)
+            
+    #-- Batch methods: section attributes (Lref, Sref, sweep, twist...) are arrays over the span-wise sections,
+    #-- gradients are (N, ndv) arrays, and all aerodynamic coefficients are computed for the whole wing at once
+    def compute_batch(self, AoA, Mach):
+        self.comp_aero_coeffs_batch(AoA, Mach)
+        self.comp_gamma_infos_batch()
+        
+    def comp_aero_coeffs_batch(self, AoA, Mach):
+        """
+        method to compute aero coefficients for all sections to be overloaded in sub classes
+        """
+        pass
+    
+    def comp_gamma_infos_batch(self):
+        """
+        Compute gamma and gamma derivatives for all sections
+        """
+        L = self.get_Lref()
+        self.gamma       = 0.5*L*self.Cl
+        self.dgamma_dAoA = 0.5*L*self.dCl_dAoA
+        if self.is_grad_active():
+            dL = self.get_Lref_grad()
+            self.dgamma_dchi = 0.5*(dL*self.Cl[:,np.newaxis]+L[:,np.newaxis]*self.dCl_dchi)
     
     #-- scaled copy (useless in this case)
     def get_scaled_copy(self, Sref, Lref):
         OC = self.get_OC()
         return Airfoil(OC, Sref, Lref, grad_active=self.__grad_active)  
     
+    def get_batch_copy(self, airfoils, Sref, Lref):
+        """
+        Scaled copy used for batch evaluation of the sections defined by the airfoils list
+        @param Sref : array of sections reference surfaces
+        @param Lref : array of sections reference lengths
+        """
+        return self.get_scaled_copy(Sref=Sref, Lref=Lref)
+    
+    def get_shared_data(self):
+        """
+        Read-only polar data of the airfoil, shared by its copies instead of being duplicated
+        """
+        return []
+    
     def print_coeffs(self):
         print '\n*** Airfoil aerodynamic oefficients ***'
         print '  Cl   = ', self.Cl , '[-]'
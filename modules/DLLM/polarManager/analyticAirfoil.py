@@ -218,7 +218,136 @@ class AnalyticAirfoil(Airfoil):
         if self.is_grad_active():
             dCdvp_min= 60.*(4.*dtoc2*toc2**3*self.Cdf+toc2**4*self.dCdf_dchi)
             self.dCdvp_dchi = dCdvp_min + 2.*(dCdvp_min+self.dCdf_dchi)*self.Cl**2+4.*(Cdvp_min + self.Cdf)*self.Cl*self.dCl_dchi
-            
+
+    def comp_aero_coeffs_batch(self, AoA, Mach):
+        """
+        Same as comp_aero_coeffs for all the sections at once: AoA and section attributes are arrays
+        """
+        OC = self.get_OC()
+        c  = OC.get_c()
+        nu = OC.get_nu()
+        N  = len(AoA)
+        L     = self.get_Lref()
+        sweep = self.get_sweep()
+        toc   = self.get_rel_thick()
+        cos_sweep = np.cos(sweep)
+        sin_sweep = np.sin(sweep)
+        toc2  = toc/cos_sweep
+        Mach_normal = Mach*cos_sweep
+
+        if self.is_grad_active():
+            dL     = self.get_Lref_grad()
+            dsweep = self.get_sweep_grad()
+            dtoc   = self.get_rel_thick_grad()
+            ndv    = dL.shape[1]
+            dtoc2  = (dtoc*cos_sweep[:,np.newaxis]+(toc*sin_sweep)[:,np.newaxis]*dsweep)/(cos_sweep**2)[:,np.newaxis]
+            dMach_normal = -Mach*sin_sweep[:,np.newaxis]*dsweep
+
+        #-- compute dCl_dAoA
+        # Base slope with Prandtl correction
+        sub   = Mach_normal < 0.9
+        sup   = Mach_normal > 1.1
+        trans = np.logical_not(np.logical_or(sub, sup))
+
+        base_slope = np.zeros(N)
+        base_slope[sub] = 2.*np.pi/np.sqrt(1.-Mach_normal[sub]**2)
+        s_sub = 2.*np.pi/np.sqrt(abs(1.-0.9**2))
+        s_sup = 4./np.sqrt(abs(1.1**2-1.))
+        fact = (1.1-Mach_normal[trans])/0.2
+        base_slope[trans] = s_sub*fact+s_sup*(1.-fact)
+        base_slope[sup] = 4./np.sqrt(Mach_normal[sup]**2-1.)
+        if self.is_grad_active():
+            dbase_slope = np.zeros((N, ndv))
+            Mn = Mach_normal[sub][:,np.newaxis]
+            dbase_slope[sub] = 2.*np.pi*(Mn*dMach_normal[sub])/((1.-Mn**2)*np.sqrt(1.-Mn**2))
+            dfact = -dMach_normal[trans]/0.2
+            dbase_slope[trans] = s_sub*dfact+s_sup*(1.-dfact)
+            Mn = Mach_normal[sup][:,np.newaxis]
+            dbase_slope[sup] = -4.*(Mn*dMach_normal[sup])/((1.-Mn**2)*np.sqrt(1.-Mn**2))
+
+        # thickness correction
+        thick_corr = 1. + self.THICKNESS_CORRECTION*toc/cos_sweep
+        if self.is_grad_active():
+            dthick_corr = self.THICKNESS_CORRECTION*(dtoc*cos_sweep[:,np.newaxis]+(toc*sin_sweep)[:,np.newaxis]*dsweep)/(cos_sweep**2)[:,np.newaxis]
+        # sweep correction
+        sweep_corr = cos_sweep**2
+        if self.is_grad_active():
+            dsweep_corr = (-2.*sin_sweep*cos_sweep)[:,np.newaxis]*dsweep
+
+        self.dCl_dAoA = base_slope*thick_corr*sweep_corr
+
+        if self.is_grad_active():
+            d2Cl_dAoAdchi = dbase_slope*thick_corr[:,np.newaxis]*sweep_corr[:,np.newaxis]\
+                          + base_slope[:,np.newaxis]*dthick_corr*sweep_corr[:,np.newaxis]\
+                          + (base_slope*thick_corr)[:,np.newaxis]*dsweep_corr
+
+        #-- Compute Cl
+        self.Cl = self.dCl_dAoA*(AoA-self.__AoA0)
+
+        if np.isnan(self.Cl).any():
+            print 'dCl_dAoA = ',self.dCl_dAoA
+            print 'sweep_corr = ',sweep_corr
+            print 'thick_corr = ',thick_corr
+            print 'toc = ',toc
+
+        #-- Compute dCl_dchi
+        if self.is_grad_active():
+            self.dCl_dchi = d2Cl_dAoAdchi*(AoA-self.__AoA0)[:,np.newaxis]
+
+        #-- Compute Cdw
+        Mdd    = self.__Ka/cos_sweep - toc/cos_sweep**2 - self.Cl/(10.*cos_sweep**3)
+        Mcrit  = Mdd - (0.1/80)**(1./3.)
+        wave   = np.logical_not(Mach < Mcrit)
+        self.Cdw = np.where(wave, 20.*(Mach-Mcrit)**4, 0.)
+
+        #-- Compute dCdw_dAoA
+        dMdd_dAoA   = -self.dCl_dAoA/(10.*cos_sweep**3)
+        dMcrit_dAoA =  dMdd_dAoA
+        self.dCdw_dAoA = np.where(wave, -80.*(Mach-Mcrit)**3*dMcrit_dAoA, 0.)
+
+        #-- compute dCdw_dchi
+        if self.is_grad_active():
+            dMdd   = (self.__Ka*sin_sweep/cos_sweep**2)[:,np.newaxis]*dsweep \
+               - dtoc/(cos_sweep**2)[:,np.newaxis] - (toc*2.*sin_sweep/cos_sweep**3)[:,np.newaxis]*dsweep \
+               - self.dCl_dchi/(10.*cos_sweep**3)[:,np.newaxis] - (self.Cl*3.*sin_sweep/(10.*cos_sweep**4))[:,np.newaxis]*dsweep
+            dMcrit = dMdd
+            self.dCdw_dchi = np.where(wave[:,np.newaxis], (-80.*(Mach-Mcrit)**3)[:,np.newaxis]*dMcrit, 0.)
+
+        #-- compute Cdf
+        Re = Mach*cos_sweep*c*L/nu
+        thick_coeff = 1.+2.1*toc2 # a rough guess since 1.21 for 10% relative thickness
+        # Drag is null at zero Re number, laminar flow below Re=1.e5 and turbulent flow above
+        lam  = np.logical_and(Re >= 1.e-12, Re < 1.e5)
+        turb = Re >= 1.e5
+        self.Cdf = np.zeros(N)
+        self.Cdf[lam]  = 1.328/np.sqrt(Re[lam])*thick_coeff[lam]
+        self.Cdf[turb] = 0.074*Re[turb]**(-0.2)*thick_coeff[turb]
+
+        #-- Compute dCdf_dAoA
+        self.dCdf_dAoA = np.zeros(N)
+
+        #-- Compute dCdf_dchi
+        if self.is_grad_active():
+            dRe = (Mach*cos_sweep*c/nu)[:,np.newaxis]*dL-(Mach*sin_sweep*c*L/nu)[:,np.newaxis]*dsweep
+            dthick_coeff = 2.1*dtoc2
+            self.dCdf_dchi = np.zeros((N, ndv))
+            self.dCdf_dchi[lam]  = (-0.664/(Re[lam]**1.5))[:,np.newaxis]*dRe[lam]*thick_coeff[lam][:,np.newaxis]\
+                                 + (1.328/np.sqrt(Re[lam]))[:,np.newaxis]*dthick_coeff[lam]
+            self.dCdf_dchi[turb] = (-0.0148*Re[turb]**(-1.2))[:,np.newaxis]*dRe[turb]*thick_coeff[turb][:,np.newaxis]\
+                                 + (0.074*Re[turb]**(-0.2))[:,np.newaxis]*dthick_coeff[turb]
+
+        #-- compute Cdvp
+        Cdvp_min = 60.*toc2**4*self.Cdf
+        self.Cdvp = Cdvp_min + 2.*(Cdvp_min + self.Cdf)*self.Cl**2
+        #-- compute dCdvp_dAoA
+        # dCdvp_min_dAoA = 0. since dCdf_dAoA = 0.
+        self.dCdvp_dAoA = 4.*(Cdvp_min + self.Cdf)*self.Cl*self.dCl_dAoA
+
+        if self.is_grad_active():
+            dCdvp_min = 60.*(4.*dtoc2*(toc2**3*self.Cdf)[:,np.newaxis]+(toc2**4)[:,np.newaxis]*self.dCdf_dchi)
+            self.dCdvp_dchi = dCdvp_min + 2.*(dCdvp_min+self.dCdf_dchi)*(self.Cl**2)[:,np.newaxis]\
+                            + (4.*(Cdvp_min + self.Cdf)*self.Cl)[:,np.newaxis]*self.dCl_dchi
+
     def get_scaled_copy(self, OC=None, Sref=None, Lref=None, rel_thick=None, grad_active=True):
         if Sref is None:
             Sref=self.get_Sref()
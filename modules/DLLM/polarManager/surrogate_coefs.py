@@ -35,6 +35,9 @@ class SurrogateCoefs:
     Evaluate aerodynamic coefficients through the meta model
     Compute gradients of the meta model functions
     """
+    # relative step of the centered differences used by the batch gradients
+    GRAD_STEP = 1.e-5
+    
     def __init__(self, surrogate_model):
         
         fileName = surrogate_model
@@ -125,4 +128,64 @@ class SurrogateCoefs:
         
         return grad_cm
     
+    #-- Batch methods: inputs are arrays over the sections, the meta models are evaluated on a single sample
+    def __build_sample(self, thickness, camber, AoA, Mach):
+        AoA = AoA*180./np.pi
+        inputs = np.array([thickness, camber, AoA, Mach]).T
+        return NumericalSample(inputs.tolist())
+    
+    def __grad_batch(self, meta, thickness, camber, AoA, Mach):
+        """
+        Centered differences of a meta model for all sections: the 8 perturbed inputs of every section are
+        evaluated in a single sample, returns a (N, 4) array
+        """
+        AoA = AoA*180./np.pi
+        inputs = np.array([thickness, camber, AoA, Mach]).T
+        N = inputs.shape[0]
+        steps = self.GRAD_STEP*np.maximum(np.abs(inputs), 1.)
+        # (4, N, 4) perturbations, one input perturbed per block
+        perturb = np.eye(4)[:,np.newaxis,:]*steps[np.newaxis,:,:]
+        stencil = np.concatenate([inputs+perturb, inputs-perturb]).reshape(8*N, 4)
+        values = np.array(meta(NumericalSample(stencil.tolist())))[:,0].reshape(2, 4, N)
+        grad = ((values[0]-values[1])/(2.*steps.T)).T
+        grad[:,2] = grad[:,2]*180./np.pi
+        return grad
+    
+    def meta_Cl_batch(self, thickness, camber, AoA, Mach):
+        """
+        Evaluate lift coefficient using the meta model for all sections
+        """
+        sample = self.__build_sample(thickness, camber, AoA, Mach)
+        return np.array(self.__meta_CL(sample))[:,0]
+    
+    def meta_Cd_batch(self, thickness, camber, AoA, Mach):
+        """
+        Evaluate drag coefficient using the meta model for all sections
+        """
+        sample = self.__build_sample(thickness, camber, AoA, Mach)
+        return np.array(self.__meta_CD(sample))[:,0]
     
+    def meta_Cm_batch(self, thickness, camber, AoA, Mach):
+        """
+        Evaluate moment coefficient using the meta model for all sections
+        """
+        sample = self.__build_sample(thickness, camber, AoA, Mach)
+        return np.array(self.__meta_CM(sample))[:,0]
+    
+    def grad_Cl_batch(self, thickness, camber, AoA, Mach):
+        """
+        Evaluate gradient of Cl for all sections, returns a (N, 4) array
+        """
+        return self.__grad_batch(self.__meta_CL, thickness, camber, AoA, Mach)
+    
+    def grad_Cd_batch(self, thickness, camber, AoA, Mach):
+        """
+        Evaluate gradient of Cd for all sections, returns a (N, 4) array
+        """
+        return self.__grad_batch(self.__meta_CD, thickness, camber, AoA, Mach)
+    
+    def grad_Cm_batch(self, thickness, camber, AoA, Mach):
+        """
+        Evaluate gradient of Cm for all sections, returns a (N, 4) array
+        """
+        return self.__grad_batch(self.__meta_CM, thickness, camber, AoA, Mach)
@@ -42,6 +42,16 @@ from test_DLLM_simple_Loads import TestDLLMSimpleLoads
 from test_DLLM_simple_TCl_TLift import TestDLLMSimpleTClTLift
 from test_DLLM_wrapper import TestDLLMWrapper
 from test_DLLM_MP import TestDLLMMP
+from test_DLLM_sink import TestDLLMSink
+from test_DLLM_cache import TestDLLMCache
+from test_DLLM_store import TestDLLMStore
+from test_DLLM_sweep import TestDLLMSweep
+from test_DLLM_direct_methods import TestDLLMDirectMethods
+from test_DLLM_sensitivity import TestDLLMSensitivity
+from test_DLLM_geom_versions import TestDLLMGeomVersions
+from test_DLLM_batch import TestDLLMBatch
+from test_RefCTA_airfoil import TestRefCTAAirfoil
+from test_DLLM_mesh import TestDLLMMesh
 
 def suite():
     suite = unittest.TestSuite()
@@ -53,6 +63,16 @@ def suite():
     suite.addTest(unittest.makeSuite(TestDLLMSimpleTClTLift))
     suite.addTest(unittest.makeSuite(TestDLLMWrapper))
     suite.addTest(unittest.makeSuite(TestDLLMMP))
+    suite.addTest(unittest.makeSuite(TestDLLMSink))
+    suite.addTest(unittest.makeSuite(TestDLLMCache))
+    suite.addTest(unittest.makeSuite(TestDLLMStore))
+    suite.addTest(unittest.makeSuite(TestDLLMSweep))
+    suite.addTest(unittest.makeSuite(TestDLLMDirectMethods))
+    suite.addTest(unittest.makeSuite(TestDLLMSensitivity))
+    suite.addTest(unittest.makeSuite(TestDLLMGeomVersions))
+    suite.addTest(unittest.makeSuite(TestDLLMBatch))
+    suite.addTest(unittest.makeSuite(TestRefCTAAirfoil))
+    suite.addTest(unittest.makeSuite(TestDLLMMesh))
     if run_meta:
         suite.addTest(unittest.makeSuite(TestDLLMMeta))
     return suite
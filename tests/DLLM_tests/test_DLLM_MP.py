@@ -22,6 +22,7 @@
 # @author : Matthieu Meaux
 
 import unittest
+import sys
 import numpy as np
 from numpy import zeros, array
 
@@ -124,6 +125,31 @@ class TestDLLMMP(unittest.TestCase):
         ok,df_fd,df=val_grad.compare(x0,treshold=1.e-5,split_out=True,return_all=True)
         assert(ok)
 
+    def test_DLLM_MP_thread_backend(self):
+        config_dict = self.__get_base_config_dict()
+        
+        MP=DLLMMP('Case')
+        MP.configure(config_dict)
+        MP.set_out_format('numpy')
+        MP.set_grad_format('numpy')
+        x0=MP.get_x0()
+        F_ref, F_grad_ref = MP.run_and_grad(x0)
+        MP.close()
+        
+        stdout = sys.stdout
+        config_dict['Case.backend']='thread'
+        MP=DLLMMP('Case')
+        MP.configure(config_dict)
+        MP.set_out_format('numpy')
+        MP.set_grad_format('numpy')
+        F_list, F_list_grad = MP.run_and_grad(x0)
+        assert(sys.stdout is stdout)
+        MP.close()
+        assert(sys.stdout is stdout)
+        
+        assert(np.allclose(F_list, F_ref, rtol=1.e-12, atol=0.))
+        assert(np.allclose(F_list_grad, F_grad_ref, rtol=1.e-10, atol=1.e-14))
+
 if __name__ == '__main__':
     suite = unittest.TestLoader().loadTestsFromTestCase(TestDLLMMP)
     unittest.TextTestRunner(verbosity=2).run(suite)
\ No newline at end of file
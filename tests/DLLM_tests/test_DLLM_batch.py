@@ -0,0 +1,198 @@
+# -*-mode: python; py-indent-offset: 4; tab-width: 8; coding: iso-8859-1 -*-
+#  DLLM (non-linear Differentiated Lifting Line Model, open source software)
+# 
+#  Copyright (C) 2013-2015 Airbus Group SAS
+# 
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+# 
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+# 
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+#  https://github.com/matthieu-meaux/DLLM.git
+#
+# @author : Matthieu Meaux
+
+import os
+import glob
+import unittest
+import multiprocessing
+import numpy as np
+
+from DLLM.DLLMEval.DLLMWrapper import DLLMWrapper
+from DLLM.DLLMEval.DLLMMP import DLLMMP
+from DLLM.DLLMKernel.DLLMSink import DLLMBufferedSink
+
+class TestDLLMBatch(unittest.TestCase):
+    
+    def __get_base_config_dict(self):
+        config_dict={}
+        # Operating condition configuration
+        config_dict['batch.OC.Mach']=0.8
+        config_dict['batch.OC.AoA']=3.5
+        config_dict['batch.OC.altitude']=10000.
+        
+        # Parameterisation configuration
+        config_dict['batch.param.geom_type']='Broken'
+        config_dict['batch.param.n_sect']=20
+        config_dict['batch.param.BCfilename']='input_parameters.par'
+        config_dict['batch.param.airfoil.type']='simple'
+        config_dict['batch.param.airfoil.AoA0']=-2.
+        
+        # DLLM configuration
+        config_dict['batch.DLLM.type']='Solver'
+        config_dict['batch.DLLM.method']='inhouse'
+        config_dict['batch.DLLM.relax_factor']=0.99
+        config_dict['batch.DLLM.stop_residual']=1e-9
+        config_dict['batch.DLLM.max_iterations']=100
+        
+        return config_dict
+    
+    def __get_MP_config_dict(self):
+        config_dict={}
+        config_dict['Case.nb_conditions']=2
+        config_dict['Case.condition_name']='cond'
+        config_dict['Case.nb_workers']=2
+        config_dict['Case.cond1.OC.Mach']=0.8
+        config_dict['Case.cond1.OC.AoA']=3.5
+        config_dict['Case.cond1.OC.altitude']=10000.
+        config_dict['Case.cond2.OC.Mach']=0.6
+        config_dict['Case.cond2.OC.AoA']=4.5
+        config_dict['Case.cond2.OC.altitude']=5000.
+        
+        config_dict['Case.param.geom_type']='Broken'
+        config_dict['Case.param.n_sect']=20
+        config_dict['Case.param.BCfilename']='input_parameters.par'
+        config_dict['Case.param.airfoil.type']='simple'
+        config_dict['Case.param.airfoil.AoA0']=-2.
+        config_dict['Case.param.airfoil.Cm0']=-0.1
+        
+        config_dict['Case.DLLM.type']='Solver'
+        config_dict['Case.DLLM.method']='inhouse'
+        config_dict['Case.DLLM.relax_factor']=0.99
+        config_dict['Case.DLLM.stop_residual']=1e-9
+        config_dict['Case.DLLM.max_iterations']=100
+        config_dict['Case.DLLM.sink']='none'
+        
+        return config_dict
+    
+    def __get_wrapper(self, config_dict):
+        DLLMWrap = DLLMWrapper('batch', verbose=0)
+        DLLMWrap.configure(config_dict)
+        DLLMWrap.set_out_format('numpy')
+        DLLMWrap.set_grad_format('numpy')
+        return DLLMWrap
+    
+    def __get_designs(self, x0, n_designs):
+        X = np.zeros((n_designs, len(x0)))
+        for j in xrange(n_designs):
+            X[j,:] = np.array(x0)*(1.+0.01*j)
+        return X
+    
+    def __get_new_workers(self, pids_before):
+        # workers left by other tests are ignored
+        return sorted([worker.pid for worker in multiprocessing.active_children() if worker.pid not in pids_before])
+    
+    def __remove_files(self, pattern):
+        for filename in glob.glob(pattern):
+            os.remove(filename)
+        
+    def test_DLLM_wrapper_batch_vs_sequential(self):
+        config_dict = self.__get_base_config_dict()
+        config_dict['batch.DLLM.sink']='none'
+        DLLMWrap = self.__get_wrapper(config_dict)
+        X = self.__get_designs(DLLMWrap.get_x0(), 4)
+        F_array, F_grad_array = DLLMWrap.run_and_grad_batch(X, nb_workers=2)
+        DLLMWrap.close()
+        for j in xrange(X.shape[0]):
+            DLLMWrap_ref = self.__get_wrapper(config_dict)
+            F_list, F_list_grad = DLLMWrap_ref.run_and_grad(X[j])
+            assert(np.array_equal(F_array[j], F_list))
+            assert(np.array_equal(F_grad_array[j], F_list_grad))
+            
+    def test_DLLM_wrapper_batch_pool_reuse_and_close(self):
+        config_dict = self.__get_base_config_dict()
+        config_dict['batch.DLLM.sink']='none'
+        DLLMWrap = self.__get_wrapper(config_dict)
+        X = self.__get_designs(DLLMWrap.get_x0(), 4)
+        pids_before = [worker.pid for worker in multiprocessing.active_children()]
+        F_array = DLLMWrap.run_batch(X, nb_workers=2)
+        pids = self.__get_new_workers(pids_before)
+        assert(len(pids) == 2)
+        # the pool is kept between the batches
+        assert(np.array_equal(DLLMWrap.run_batch(X[::-1], nb_workers=2), F_array[::-1]))
+        assert(self.__get_new_workers(pids_before) == pids)
+        DLLMWrap.close()
+        assert(len(self.__get_new_workers(pids_before)) == 0)
+        # a new pool is started by the next batch
+        assert(np.array_equal(DLLMWrap.run_batch(X, nb_workers=2), F_array))
+        DLLMWrap.close()
+        assert(len(self.__get_new_workers(pids_before)) == 0)
+        
+    def test_DLLM_wrapper_batch_worker_files(self):
+        self.__remove_files('batch*')
+        config_dict = self.__get_base_config_dict()
+        DLLMWrap = self.__get_wrapper(config_dict)
+        X = self.__get_designs(DLLMWrap.get_x0(), 4)
+        DLLMWrap.run_batch(X, nb_workers=2)
+        DLLMWrap.close()
+        # the legacy text files are tagged with the name of the worker
+        filenames = glob.glob('batch*_F_list.dat')
+        assert(len(filenames) > 0)
+        for filename in filenames:
+            assert(filename.startswith('batch.worker'))
+        self.__remove_files('batch*')
+        
+    def test_DLLM_wrapper_batch_buffered_sink(self):
+        self.__remove_files('batch_results.bin*')
+        config_dict = self.__get_base_config_dict()
+        config_dict['batch.DLLM.sink']='buffered'
+        DLLMWrap = self.__get_wrapper(config_dict)
+        X = self.__get_designs(DLLMWrap.get_x0(), 4)
+        F_array = DLLMWrap.run_batch(X, nb_workers=2)
+        DLLMWrap.close()
+        # each worker appends to its own file, flushed when the pool is closed
+        assert(not os.path.exists('batch_results.bin'))
+        records = []
+        for filename in glob.glob('batch_results.bin.worker*'):
+            records += DLLMBufferedSink.load(filename)
+        assert(len(records) == X.shape[0])
+        F_records = sorted([tuple(record['F_list']) for record in records])
+        assert(F_records == sorted([tuple(F_list) for F_list in F_array]))
+        self.__remove_files('batch_results.bin*')
+        
+    def __check_MP_batch(self, backend):
+        pids_before = [worker.pid for worker in multiprocessing.active_children()]
+        config_dict = self.__get_MP_config_dict()
+        config_dict['Case.backend']=backend
+        MP = DLLMMP('Case')
+        MP.configure(config_dict)
+        MP.set_out_format('numpy')
+        MP.set_grad_format('numpy')
+        X = self.__get_designs(MP.get_x0(), 3)
+        MP_F_array, MP_F_grad_array = MP.run_and_grad_batch(X)
+        # same pool for the batch and the sequential evaluations
+        for j in xrange(X.shape[0]):
+            MP_F_list, MP_F_list_grad = MP.run_and_grad(X[j])
+            assert(np.allclose(MP_F_array[j], MP_F_list, rtol=1.e-12, atol=0.))
+            assert(np.allclose(MP_F_grad_array[j], MP_F_list_grad, rtol=1.e-10, atol=1.e-14))
+        MP.close()
+        assert(len(self.__get_new_workers(pids_before)) == 0)
+        
+    def test_DLLM_MP_batch_vs_sequential_process(self):
+        self.__check_MP_batch('process')
+        
+    def test_DLLM_MP_batch_vs_sequential_thread(self):
+        self.__check_MP_batch('thread')
+        
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestDLLMBatch)
+    unittest.TextTestRunner(verbosity=2).run(suite)
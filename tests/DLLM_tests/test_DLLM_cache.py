@@ -0,0 +1,125 @@
+# -*-mode: python; py-indent-offset: 4; tab-width: 8; coding: iso-8859-1 -*-
+#  DLLM (non-linear Differentiated Lifting Line Model, open source software)
+# 
+#  Copyright (C) 2013-2015 Airbus Group SAS
+# 
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+# 
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+# 
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+#  https://github.com/matthieu-meaux/DLLM.git
+#
+# @author : Matthieu Meaux
+
+import unittest
+import numpy as np
+
+from DLLM.DLLMEval.DLLMWrapper import DLLMWrapper
+from DLLM.DLLMKernel.DLLMSink import DLLMMemorySink
+from MDOTools.OC.operating_condition import OperatingCondition
+
+class TestDLLMCache(unittest.TestCase):
+    
+    def __get_base_config_dict(self):
+        config_dict={}
+        # Operating condition configuration
+        config_dict['test.OC.Mach']=0.8
+        config_dict['test.OC.AoA']=3.5
+        config_dict['test.OC.altitude']=10000.
+        
+        # Parameterisation configuration
+        config_dict['test.param.geom_type']='Broken'
+        config_dict['test.param.n_sect']=20
+        config_dict['test.param.BCfilename']='input_parameters.par'
+        config_dict['test.param.airfoil.type']='simple'
+        config_dict['test.param.airfoil.AoA0']=-2.
+        
+        # DLLM configuration
+        config_dict['test.DLLM.type']='Solver'
+        config_dict['test.DLLM.method']='inhouse'
+        config_dict['test.DLLM.relax_factor']=0.99
+        config_dict['test.DLLM.stop_residual']=1e-9
+        config_dict['test.DLLM.max_iterations']=100
+        config_dict['test.DLLM.sink']='none'
+        
+        return config_dict
+    
+    def __get_wrapper(self, config_dict):
+        DLLMWrap = DLLMWrapper('test', verbose=0)
+        DLLMWrap.configure(config_dict)
+        DLLMWrap.set_out_format('numpy')
+        DLLMWrap.set_grad_format('numpy')
+        # one record per direct run
+        sink = DLLMMemorySink(max_records=None)
+        DLLMWrap.get_DLLM_solver().set_sink(sink)
+        return DLLMWrap, sink
+    
+    def test_DLLM_cache_hit(self):
+        config_dict = self.__get_base_config_dict()
+        DLLMWrap, sink = self.__get_wrapper(config_dict)
+        x0=DLLMWrap.get_x0()
+        F_list, F_list_grad = DLLMWrap.run_and_grad(x0)
+        nb_runs = len(sink.get_records())
+        assert(np.array_equal(DLLMWrap.run(x0), F_list))
+        assert(np.array_equal(DLLMWrap.run_grad(x0), F_list_grad))
+        assert(len(sink.get_records()) == nb_runs)
+        
+    def test_DLLM_cache_LRU_eviction(self):
+        config_dict = self.__get_base_config_dict()
+        config_dict['test.cache_size']=2
+        DLLMWrap, sink = self.__get_wrapper(config_dict)
+        x0=DLLMWrap.get_x0()
+        x_list=[x0+0.01*k for k in xrange(3)]
+        F_list_ref=[DLLMWrap.run(x) for x in x_list]
+        assert(len(sink.get_records()) == 3)
+        # x_list[1] and x_list[2] are cached, x_list[0] was evicted
+        DLLMWrap.run(x_list[1])
+        DLLMWrap.run(x_list[2])
+        assert(len(sink.get_records()) == 3)
+        F_list = DLLMWrap.run(x_list[0])
+        assert(len(sink.get_records()) == 4)
+        assert(np.allclose(F_list, F_list_ref[0], rtol=1.e-10))
+        # x_list[1] is now the least recently used one
+        DLLMWrap.run(x_list[2])
+        DLLMWrap.run(x_list[1])
+        assert(len(sink.get_records()) == 5)
+        
+    def test_DLLM_cache_hit_updates_state(self):
+        config_dict = self.__get_base_config_dict()
+        DLLMWrap, sink = self.__get_wrapper(config_dict)
+        x0=DLLMWrap.get_x0()
+        x1=x0+0.01
+        F_list0 = DLLMWrap.run(x0)
+        DLLMWrap.run(x1)
+        assert(np.array_equal(DLLMWrap.run(x0), F_list0))
+        assert(np.array_equal(DLLMWrap.get_x(), x0))
+        # the solver is recomputed at x0 on access
+        F_list = DLLMWrap.get_DLLM_solver().get_F_list()
+        assert(np.allclose(F_list, F_list0, rtol=1.e-10))
+        assert(np.allclose(DLLMWrap.analysis(), F_list0, rtol=1.e-10))
+        
+    def test_DLLM_cache_set_OC(self):
+        config_dict = self.__get_base_config_dict()
+        DLLMWrap, sink = self.__get_wrapper(config_dict)
+        x0=DLLMWrap.get_x0()
+        F_list0 = DLLMWrap.run(x0)
+        OC=OperatingCondition('test.OC')
+        OC.config_from_dict(config_dict)
+        OC.set_Mach(0.6)
+        DLLMWrap.set_OC(OC)
+        F_list = DLLMWrap.run(x0)
+        assert(not np.allclose(F_list, F_list0))
+        
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestDLLMCache)
+    unittest.TextTestRunner(verbosity=2).run(suite)
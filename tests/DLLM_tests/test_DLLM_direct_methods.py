@@ -0,0 +1,128 @@
+# -*-mode: python; py-indent-offset: 4; tab-width: 8; coding: iso-8859-1 -*-
+#  DLLM (non-linear Differentiated Lifting Line Model, open source software)
+# 
+#  Copyright (C) 2013-2015 Airbus Group SAS
+# 
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+# 
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+# 
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+#  https://github.com/matthieu-meaux/DLLM.git
+#
+# @author : Matthieu Meaux
+
+import unittest
+import numpy as np
+
+from DLLM.DLLMGeom.wing_broken import Wing_Broken
+from DLLM.DLLMKernel.DLLMSolver import DLLMSolver
+from MDOTools.OC.operating_condition import OperatingCondition
+
+class TestDLLMDirectMethods(unittest.TestCase):
+    
+    def __init_wing_param(self):
+        OC=OperatingCondition('cond1')
+        OC.set_Mach(0.8)
+        OC.set_AoA(3.5)
+        OC.set_altitude(10000.)
+        OC.set_T0_deg(15.)
+        OC.set_P0(101325.)
+        OC.set_humidity(0.)
+        OC.compute_atmosphere()
+        
+        wing_param=Wing_Broken('broken_wing',n_sect=20)
+        wing_param.import_BC_from_file('input_parameters.par')
+        wing_param.build_linear_airfoil(OC, AoA0=0.0, set_as_ref=True)
+        wing_param.build_airfoils_from_ref()
+        wing_param.update()
+        
+        return OC,wing_param
+    
+    def __run(self, method=None):
+        OC,wing_param = self.__init_wing_param()
+        DLLM = DLLMSolver('test',wing_param,OC)
+        DLLM.set_sink('none')
+        DLLM.set_stop_residual(1.e-10)
+        if method is not None:
+            DLLM.set_method(method)
+        DLLM.run_direct()
+        DLLM.run_post()
+        DLLM.run_adjoint()
+        return DLLM
+    
+    def __check_method(self, method):
+        DLLM_ref = self.__run()
+        DLLM = self.__run(method)
+        assert(np.allclose(DLLM.get_F_list(), DLLM_ref.get_F_list(), rtol=1.e-8, atol=1.e-12))
+        assert(np.allclose(DLLM.get_dF_list_dchi(), DLLM_ref.get_dF_list_dchi(), rtol=1.e-6, atol=1.e-10))
+        return DLLM
+    
+    def test_DLLM_direct_matrix_free(self):
+        self.__check_method('matrix_free')
+        
+    def test_DLLM_direct_chord(self):
+        self.__check_method('chord')
+        
+    def test_DLLM_direct_linear(self):
+        DLLM = self.__check_method('linear')
+        # linear airfoils: one LU solve, then a single residual evaluation
+        assert(len(DLLM.get_convergence_history()) == 2)
+        
+    def test_DLLM_direct_F_tolerance(self):
+        DLLM_ref = self.__run()
+        F_list_ref = DLLM_ref.get_F_list()
+        for method in ['matrix_free', 'chord', 'linear']:
+            OC,wing_param = self.__init_wing_param()
+            DLLM = DLLMSolver('test',wing_param,OC)
+            DLLM.set_sink('none')
+            DLLM.set_method(method)
+            DLLM.set_F_tolerance(1.e-3)
+            DLLM.run_direct()
+            assert(not DLLM.is_post_computed())
+            DLLM.run_post()
+            assert(np.allclose(DLLM.get_F_list(), F_list_ref, rtol=0., atol=1.e-2))
+            
+    def __get_post_outputs(self, DLLM):
+        outputs = {}
+        for name, value in vars(DLLM.get_DLLMPost()).items():
+            if not name.startswith('_'):
+                outputs[name] = np.copy(value)
+        outputs['F_list'] = DLLM.get_F_list().copy()
+        return outputs
+    
+    def __check_post_outputs(self, outputs, outputs_ref):
+        assert(sorted(outputs.keys()) == sorted(outputs_ref.keys()))
+        for name in outputs_ref.keys():
+            assert(np.array_equal(outputs[name], outputs_ref[name]))
+        
+    def test_DLLM_direct_F_tolerance_post(self):
+        OC,wing_param = self.__init_wing_param()
+        DLLM = DLLMSolver('test',wing_param,OC)
+        DLLM.set_sink('none')
+        DLLM.set_F_tolerance(1.e-3)
+        DLLM.run_direct()
+        # only the blocks of Cl are computed, the error estimates use all the functions of get_F_list_names()
+        DLLM.run_post(F_list_names=['Cl'])
+        outputs = self.__get_post_outputs(DLLM)
+        # the error estimates of the direct iterations leave the post-processing results unchanged
+        DLLM.comp_F_list_correction(1.e-3*np.ones(len(DLLM.get_iAoA())))
+        assert(DLLM.is_post_computed())
+        self.__check_post_outputs(self.__get_post_outputs(DLLM), outputs)
+        # same outputs as a post-processing of the same state without F_tolerance
+        DLLM.set_F_tolerance(None)
+        DLLM.run_post(F_list_names=['Cl'])
+        self.__check_post_outputs(self.__get_post_outputs(DLLM), outputs)
+        
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestDLLMDirectMethods)
+    unittest.TextTestRunner(verbosity=2).run(suite)
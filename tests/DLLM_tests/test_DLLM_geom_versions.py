@@ -0,0 +1,111 @@
+# -*-mode: python; py-indent-offset: 4; tab-width: 8; coding: iso-8859-1 -*-
+#  DLLM (non-linear Differentiated Lifting Line Model, open source software)
+# 
+#  Copyright (C) 2013-2015 Airbus Group SAS
+# 
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+# 
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+# 
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+#  https://github.com/matthieu-meaux/DLLM.git
+#
+# @author : Matthieu Meaux
+
+import unittest
+import numpy as np
+
+from DLLM.DLLMGeom.wing_broken import Wing_Broken
+from DLLM.DLLMKernel.DLLMSolver import DLLMSolver
+from MDOTools.OC.operating_condition import OperatingCondition
+
+class TestDLLMGeomVersions(unittest.TestCase):
+    
+    def __init_wing_param(self):
+        OC=OperatingCondition('cond1')
+        OC.set_Mach(0.8)
+        OC.set_AoA(3.5)
+        OC.set_altitude(10000.)
+        OC.set_T0_deg(15.)
+        OC.set_P0(101325.)
+        OC.set_humidity(0.)
+        OC.compute_atmosphere()
+        
+        wing_param=Wing_Broken('broken_wing',n_sect=20)
+        wing_param.import_BC_from_file('input_parameters.par')
+        wing_param.build_linear_airfoil(OC, AoA0=0.0, set_as_ref=True)
+        wing_param.build_airfoils_from_ref()
+        wing_param.update()
+        
+        return OC,wing_param
+    
+    def __get_versions(self, wing_param):
+        versions = {}
+        for quantity in wing_param.TRACKED_QUANTITIES:
+            versions[quantity] = wing_param.get_version(quantity)
+        return versions
+    
+    def __get_x(self, wing_param, dv_id, delta):
+        x = wing_param.get_dv_array().copy()
+        x[wing_param.get_dv_id_list().index(dv_id)] += delta
+        return x
+    
+    def __run(self, DLLM):
+        DLLM.run_direct()
+        DLLM.run_post()
+        DLLM.run_adjoint()
+    
+    def test_DLLM_geom_versions_unchanged(self):
+        OC,wing_param = self.__init_wing_param()
+        versions = self.__get_versions(wing_param)
+        wing_param.update_from_x_list(wing_param.get_dv_array().copy())
+        assert(self.__get_versions(wing_param) == versions)
+        
+    def test_DLLM_geom_versions_twist(self):
+        OC,wing_param = self.__init_wing_param()
+        versions = self.__get_versions(wing_param)
+        wing_param.update_from_x_list(self.__get_x(wing_param, 'twist3', 1.))
+        new_versions = self.__get_versions(wing_param)
+        assert(new_versions['twist'] > versions['twist'])
+        for quantity in ['eta', 'chords', 'rel_thicks', 'sweep']:
+            assert(new_versions[quantity] == versions[quantity])
+            
+    def test_DLLM_geom_versions_span(self):
+        OC,wing_param = self.__init_wing_param()
+        versions = self.__get_versions(wing_param)
+        wing_param.update_from_x_list(self.__get_x(wing_param, 'span', 1.))
+        new_versions = self.__get_versions(wing_param)
+        assert(new_versions['eta'] > versions['eta'])
+        assert(new_versions['twist'] == versions['twist'])
+        
+    def test_DLLM_geom_versions_solver_update(self):
+        OC,wing_param = self.__init_wing_param()
+        DLLM = DLLMSolver('test',wing_param,OC)
+        DLLM.set_sink('none')
+        self.__run(DLLM)
+        for dv_id, delta in [('twist3', 1.), ('span', 1.), ('root_chord', -0.5)]:
+            x = self.__get_x(wing_param, dv_id, delta)
+            wing_param.update_from_x_list(x)
+            DLLM.set_geom(wing_param)
+            self.__run(DLLM)
+            # same design from scratch
+            OC_ref,wing_param_ref = self.__init_wing_param()
+            wing_param_ref.update_from_x_list(x)
+            DLLM_ref = DLLMSolver('test',wing_param_ref,OC_ref)
+            DLLM_ref.set_sink('none')
+            self.__run(DLLM_ref)
+            assert(np.allclose(DLLM.get_F_list(), DLLM_ref.get_F_list(), rtol=1.e-12, atol=1.e-14))
+            assert(np.allclose(DLLM.get_dF_list_dchi(), DLLM_ref.get_dF_list_dchi(), rtol=1.e-10, atol=1.e-14))
+        
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestDLLMGeomVersions)
+    unittest.TextTestRunner(verbosity=2).run(suite)
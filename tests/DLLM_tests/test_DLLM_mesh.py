@@ -0,0 +1,111 @@
+# -*-mode: python; py-indent-offset: 4; tab-width: 8; coding: iso-8859-1 -*-
+#  DLLM (non-linear Differentiated Lifting Line Model, open source software)
+# 
+#  Copyright (C) 2013-2015 Airbus Group SAS
+# 
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+# 
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+# 
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+#  https://github.com/matthieu-meaux/DLLM.git
+#
+# @author : Matthieu Meaux
+
+import unittest
+import numpy as np
+
+from DLLM.DLLMGeom.wing_broken import Wing_Broken
+from DLLM.DLLMKernel.DLLMSolver import DLLMSolver
+from MDOTools.OC.operating_condition import OperatingCondition
+
+class TestDLLMMesh(unittest.TestCase):
+    
+    def __init_wing_param(self):
+        OC=OperatingCondition('cond1')
+        OC.set_Mach(0.8)
+        OC.set_AoA(3.5)
+        OC.set_altitude(10000.)
+        OC.set_T0_deg(15.)
+        OC.set_P0(101325.)
+        OC.set_humidity(0.)
+        OC.compute_atmosphere()
+        
+        wing_param=Wing_Broken('broken_wing',n_sect=20)
+        wing_param.import_BC_from_file('input_parameters.par')
+        wing_param.build_linear_airfoil(OC, AoA0=0.0, set_as_ref=True)
+        wing_param.build_airfoils_from_ref()
+        wing_param.update()
+        
+        return OC,wing_param
+    
+    def __get_gamma(self, N):
+        # elliptic-like circulation, non null at the tips so that all the jumps are tested
+        return 1.+np.cos(np.linspace(-0.45*np.pi, 0.45*np.pi, N))
+    
+    def __comp_dK_dchi(self, wing_param):
+        """
+        Full (N, N, ndv) derivative of K with respect to the design variables
+        """
+        N   = wing_param.get_n_sect()
+        ndv = wing_param.get_ndv()
+        eta = wing_param.get_eta()[1,:]
+        y   = wing_param.get_XYZ()[1,:]
+        eta_grad = wing_param.get_eta_grad()[1,:,:]
+        y_grad   = wing_param.get_XYZ_grad()[1,:,:]
+        YminEta  = y[:,np.newaxis]-eta[np.newaxis,:]
+        DdGammaDy_DGamma = np.zeros((N+1,N))
+        DdGammaDy_DGamma[:N,:] += np.eye(N)
+        DdGammaDy_DGamma[1:,:] -= np.eye(N)
+        dK_dchi = np.zeros((N,N,ndv))
+        for n in xrange(ndv):
+            YminEta_grad = y_grad[:,n][:,np.newaxis]-eta_grad[:,n][np.newaxis,:]
+            dKmetric_dchi = -YminEta_grad/YminEta**2/(4.*np.pi)
+            dK_dchi[:,:,n] = -np.dot(dKmetric_dchi, DdGammaDy_DGamma)
+        return dK_dchi
+    
+    def test_DLLM_mesh_dK_dchi_gamma(self):
+        OC,wing_param = self.__init_wing_param()
+        DLLM = DLLMSolver('test',wing_param,OC)
+        N = wing_param.get_n_sect()
+        gamma = self.__get_gamma(N)
+        dK_dchi_gamma = DLLM.get_DLLMMesh().comp_dK_dchi_gamma(gamma)
+        dK_dchi_gamma_ref = np.einsum('ijn,j->in', self.__comp_dK_dchi(wing_param), gamma)
+        assert(dK_dchi_gamma.shape == (N, wing_param.get_ndv()))
+        assert(np.allclose(dK_dchi_gamma, dK_dchi_gamma_ref, rtol=1.e-12, atol=1.e-14))
+        
+    def test_DLLM_mesh_valid_dK_dchi_gamma(self):
+        OC,wing_param = self.__init_wing_param()
+        DLLM = DLLMSolver('test',wing_param,OC)
+        N = wing_param.get_n_sect()
+        gamma = self.__get_gamma(N)
+        dK_dchi_gamma = DLLM.get_DLLMMesh().comp_dK_dchi_gamma(gamma)
+        x0 = wing_param.get_dv_array().copy()
+        dK_dchi_gamma_fd = np.zeros(dK_dchi_gamma.shape)
+        for n in xrange(len(x0)):
+            step = 1.e-6*max(1., abs(x0[n]))
+            K_gamma = []
+            for delta in [step, -step]:
+                x = x0.copy()
+                x[n] += delta
+                wing_param.update_from_x_list(x)
+                DLLM.set_geom(wing_param)
+                K_gamma.append(np.dot(DLLM.get_K(), gamma))
+            dK_dchi_gamma_fd[:,n] = (K_gamma[0]-K_gamma[1])/(2.*step)
+        wing_param.update_from_x_list(x0)
+        scale = abs(dK_dchi_gamma).max()
+        assert(scale > 0.)
+        assert(np.allclose(dK_dchi_gamma, dK_dchi_gamma_fd, rtol=1.e-5, atol=1.e-7*scale))
+        
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestDLLMMesh)
+    unittest.TextTestRunner(verbosity=2).run(suite)
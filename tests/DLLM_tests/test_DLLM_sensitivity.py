@@ -0,0 +1,94 @@
+# -*-mode: python; py-indent-offset: 4; tab-width: 8; coding: iso-8859-1 -*-
+#  DLLM (non-linear Differentiated Lifting Line Model, open source software)
+# 
+#  Copyright (C) 2013-2015 Airbus Group SAS
+# 
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+# 
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+# 
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+#  https://github.com/matthieu-meaux/DLLM.git
+#
+# @author : Matthieu Meaux
+
+import unittest
+import numpy as np
+
+from DLLM.DLLMGeom.wing_broken import Wing_Broken
+from DLLM.DLLMKernel.DLLMSolver import DLLMSolver
+from DLLM.DLLMKernel.DLLMTargetCl import DLLMTargetCl
+from MDOTools.OC.operating_condition import OperatingCondition
+
+class TestDLLMSensitivity(unittest.TestCase):
+    
+    def __init_wing_param(self):
+        OC=OperatingCondition('cond1')
+        OC.set_Mach(0.8)
+        OC.set_AoA(3.5)
+        OC.set_altitude(10000.)
+        OC.set_T0_deg(15.)
+        OC.set_P0(101325.)
+        OC.set_humidity(0.)
+        OC.compute_atmosphere()
+        
+        wing_param=Wing_Broken('broken_wing',n_sect=20)
+        wing_param.import_BC_from_file('input_parameters.par')
+        wing_param.build_linear_airfoil(OC, AoA0=0.0, set_as_ref=True)
+        wing_param.build_airfoils_from_ref()
+        wing_param.update()
+        
+        return OC,wing_param
+    
+    def __run(self, sensitivity_mode, target_Cl=None):
+        OC,wing_param = self.__init_wing_param()
+        if target_Cl is None:
+            DLLM = DLLMSolver('test',wing_param,OC)
+        else:
+            DLLM = DLLMTargetCl('test',wing_param,OC)
+            DLLM.set_target_Cl(target_Cl)
+        DLLM.set_sink('none')
+        DLLM.set_sensitivity_mode(sensitivity_mode)
+        DLLM.run_direct()
+        DLLM.run_post()
+        DLLM.run_adjoint()
+        return DLLM
+    
+    def __check_forward_vs_adjoint(self, target_Cl=None):
+        DLLM_adj = self.__run('adjoint', target_Cl=target_Cl)
+        DLLM_fwd = self.__run('forward', target_Cl=target_Cl)
+        dF_adj = np.array(DLLM_adj.get_dF_list_dchi())
+        dF_fwd = np.array(DLLM_fwd.get_dF_list_dchi())
+        assert(np.allclose(dF_fwd, dF_adj, rtol=1.e-10, atol=1.e-12*np.max(abs(dF_adj))))
+        corr_adj = np.array(DLLM_adj.get_adjoint_convergence_correction_list())
+        corr_fwd = np.array(DLLM_fwd.get_adjoint_convergence_correction_list())
+        assert(np.allclose(corr_fwd, corr_adj, rtol=1.e-8, atol=1.e-16))
+        
+    def test_DLLM_forward_vs_adjoint(self):
+        self.__check_forward_vs_adjoint()
+        
+    def test_DLLM_forward_vs_adjoint_TCl(self):
+        self.__check_forward_vs_adjoint(target_Cl=0.5)
+        
+    def test_DLLM_sensitivity_auto(self):
+        DLLM_adj = self.__run('adjoint')
+        DLLM_auto = self.__run('auto')
+        assert(np.allclose(DLLM_auto.get_dF_list_dchi(), DLLM_adj.get_dF_list_dchi(), rtol=1.e-10))
+        
+    def test_DLLM_sensitivity_unknown_mode(self):
+        OC,wing_param = self.__init_wing_param()
+        DLLM = DLLMSolver('test',wing_param,OC)
+        self.assertRaises(Exception, DLLM.set_sensitivity_mode, 'unknown')
+        
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestDLLMSensitivity)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,112 @@
+# -*-mode: python; py-indent-offset: 4; tab-width: 8; coding: iso-8859-1 -*-
+#  DLLM (non-linear Differentiated Lifting Line Model, open source software)
+# 
+#  Copyright (C) 2013-2015 Airbus Group SAS
+# 
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+# 
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+# 
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+#  https://github.com/matthieu-meaux/DLLM.git
+#
+# @author : Matthieu Meaux
+
+import os
+import unittest
+import numpy as np
+
+from DLLM.DLLMGeom.wing_broken import Wing_Broken
+from DLLM.DLLMKernel.DLLMSolver import DLLMSolver
+from DLLM.DLLMKernel.DLLMSink import DLLMMemorySink, DLLMBufferedSink
+from MDOTools.OC.operating_condition import OperatingCondition
+
+class TestDLLMSink(unittest.TestCase):
+    
+    def __init_wing_param(self):
+        OC=OperatingCondition('cond1')
+        OC.set_Mach(0.8)
+        OC.set_AoA(3.5)
+        OC.set_altitude(10000.)
+        OC.set_T0_deg(15.)
+        OC.set_P0(101325.)
+        OC.set_humidity(0.)
+        OC.compute_atmosphere()
+        
+        wing_param=Wing_Broken('broken_wing',n_sect=20)
+        wing_param.import_BC_from_file('input_parameters.par')
+        wing_param.build_linear_airfoil(OC, AoA0=0.0, set_as_ref=True)
+        wing_param.build_airfoils_from_ref()
+        wing_param.update()
+        
+        return OC,wing_param
+    
+    def __run(self, DLLM):
+        DLLM.run_direct()
+        DLLM.run_post()
+        DLLM.run_adjoint()
+    
+    def test_DLLM_memory_sink(self):
+        OC,wing_param = self.__init_wing_param()
+        DLLM = DLLMSolver('test',wing_param,OC)
+        sink = DLLMMemorySink(max_records=2)
+        DLLM.set_sink(sink)
+        for AoA in [2.,3.,4.]:
+            OC.set_AoA(AoA)
+            DLLM.set_OC(OC)
+            self.__run(DLLM)
+        records = sink.get_records()
+        assert(len(records) == 2)
+        record = sink.get_last_record()
+        assert(np.array_equal(record['iAoA'], DLLM.get_iAoA()))
+        assert(np.array_equal(record['F_list'], DLLM.get_F_list()))
+        assert(np.array_equal(record['dF_list_dchi'], DLLM.get_dF_list_dchi()))
+        assert(record['F_list_names'] == list(DLLM.get_F_list_names()))
+        
+    def test_DLLM_buffered_sink_load(self):
+        filename = 'test_sink_results.bin'
+        if os.path.exists(filename):
+            os.remove(filename)
+        OC,wing_param = self.__init_wing_param()
+        DLLM = DLLMSolver('test',wing_param,OC)
+        DLLM.set_sink(DLLMBufferedSink(filename, buffer_size=2))
+        F_list_ref = []
+        for AoA in [1.,2.,3.,4.,5.]:
+            OC.set_AoA(AoA)
+            DLLM.set_OC(OC)
+            self.__run(DLLM)
+            F_list_ref.append(DLLM.get_F_list().copy())
+        DLLM.flush_sink()
+        records = DLLMBufferedSink.load(filename)
+        os.remove(filename)
+        assert(len(records) == 5)
+        for record, F_list in zip(records, F_list_ref):
+            assert(np.array_equal(record['F_list'], F_list))
+            assert('dF_list_dchi' in record)
+            
+    def test_DLLM_default_sink(self):
+        OC,wing_param = self.__init_wing_param()
+        DLLM = DLLMSolver('test_default_sink',wing_param,OC)
+        self.__run(DLLM)
+        for suffix in ['_gamma.dat','_iAoA.dat','_F_list.dat','_dF_list_dchi.dat']:
+            assert(not os.path.exists('test_default_sink'+suffix))
+        record = DLLM.get_sink().get_last_record()
+        assert(np.array_equal(record['F_list'], DLLM.get_F_list()))
+        
+    def test_DLLM_sink_unknown_type(self):
+        OC,wing_param = self.__init_wing_param()
+        DLLM = DLLMSolver('test',wing_param,OC)
+        self.assertRaises(Exception, DLLM.set_sink, 'unknown')
+        
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestDLLMSink)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,130 @@
+# -*-mode: python; py-indent-offset: 4; tab-width: 8; coding: iso-8859-1 -*-
+#  DLLM (non-linear Differentiated Lifting Line Model, open source software)
+# 
+#  Copyright (C) 2013-2015 Airbus Group SAS
+# 
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+# 
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+# 
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+#  https://github.com/matthieu-meaux/DLLM.git
+#
+# @author : Matthieu Meaux
+
+import os
+import unittest
+import numpy as np
+
+from DLLM.DLLMEval.DLLMWrapper import DLLMWrapper
+from DLLM.DLLMEval.DLLMStore import DLLMStore
+from DLLM.DLLMKernel.DLLMSink import DLLMMemorySink
+
+class TestDLLMStore(unittest.TestCase):
+    
+    STORE_FILE = 'test_store.db'
+    
+    def setUp(self):
+        if os.path.exists(self.STORE_FILE):
+            os.remove(self.STORE_FILE)
+            
+    def tearDown(self):
+        if os.path.exists(self.STORE_FILE):
+            os.remove(self.STORE_FILE)
+    
+    def __get_base_config_dict(self):
+        config_dict={}
+        # Operating condition configuration
+        config_dict['test.OC.Mach']=0.8
+        config_dict['test.OC.AoA']=3.5
+        config_dict['test.OC.altitude']=10000.
+        
+        # Parameterisation configuration
+        config_dict['test.param.geom_type']='Broken'
+        config_dict['test.param.n_sect']=20
+        config_dict['test.param.BCfilename']='input_parameters.par'
+        config_dict['test.param.airfoil.type']='simple'
+        config_dict['test.param.airfoil.AoA0']=-2.
+        
+        # DLLM configuration
+        config_dict['test.DLLM.type']='Solver'
+        config_dict['test.DLLM.method']='inhouse'
+        config_dict['test.DLLM.relax_factor']=0.99
+        config_dict['test.DLLM.stop_residual']=1e-9
+        config_dict['test.DLLM.max_iterations']=100
+        config_dict['test.DLLM.sink']='none'
+        
+        # Persistent store, the in memory cache is disabled
+        config_dict['test.store_file']=self.STORE_FILE
+        config_dict['test.cache_size']=0
+        
+        return config_dict
+    
+    def __get_wrapper(self, config_dict):
+        DLLMWrap = DLLMWrapper('test', verbose=0)
+        DLLMWrap.configure(config_dict)
+        DLLMWrap.set_out_format('numpy')
+        DLLMWrap.set_grad_format('numpy')
+        # one record per direct run
+        sink = DLLMMemorySink(max_records=None)
+        DLLMWrap.get_DLLM_solver().set_sink(sink)
+        return DLLMWrap, sink
+    
+    def test_DLLM_store_hit_miss(self):
+        config_dict = self.__get_base_config_dict()
+        DLLMWrap, sink = self.__get_wrapper(config_dict)
+        x0=DLLMWrap.get_x0()
+        F_list, F_list_grad = DLLMWrap.run_and_grad(x0)
+        assert(len(sink.get_records()) == 1)
+        # new wrapper on the same store: hit
+        DLLMWrap, sink = self.__get_wrapper(config_dict)
+        assert(np.array_equal(DLLMWrap.run(x0), F_list))
+        assert(np.array_equal(DLLMWrap.run_grad(x0), F_list_grad))
+        assert(len(sink.get_records()) == 0)
+        # other design vector: miss
+        DLLMWrap.run(x0+0.01)
+        assert(len(sink.get_records()) == 1)
+        
+    def test_DLLM_store_config_change(self):
+        config_dict = self.__get_base_config_dict()
+        DLLMWrap, sink = self.__get_wrapper(config_dict)
+        x0=DLLMWrap.get_x0()
+        F_list = DLLMWrap.run(x0)
+        # physical change of the configuration: miss
+        config_dict['test.OC.Mach']=0.6
+        DLLMWrap, sink = self.__get_wrapper(config_dict)
+        assert(not np.allclose(DLLMWrap.run(x0), F_list))
+        assert(len(sink.get_records()) == 1)
+        # non physical keys do not change the key
+        config_dict['test.OC.Mach']=0.8
+        config_dict['test.cache_size']=5
+        config_dict['test.DLLM.gamma_file_name']='gamma.dat'
+        DLLMWrap, sink = self.__get_wrapper(config_dict)
+        assert(np.array_equal(DLLMWrap.run(x0), F_list))
+        assert(len(sink.get_records()) == 0)
+        
+    def test_DLLM_store_key(self):
+        store = DLLMStore(self.STORE_FILE)
+        config_dict = self.__get_base_config_dict()
+        x0 = np.ones(3)
+        key = store.get_key(config_dict, x0)
+        assert(store.get(key) is None)
+        store.put(key, {'F_list':x0})
+        assert(np.array_equal(store.get(key)['F_list'], x0))
+        config_dict['test.store_file']='other.db'
+        assert(store.get_key(config_dict, x0) == key)
+        assert(store.get_key(config_dict, 2.*x0) != key)
+        store.close()
+        
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestDLLMStore)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,111 @@
+# -*-mode: python; py-indent-offset: 4; tab-width: 8; coding: iso-8859-1 -*-
+#  DLLM (non-linear Differentiated Lifting Line Model, open source software)
+# 
+#  Copyright (C) 2013-2015 Airbus Group SAS
+# 
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+# 
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+# 
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+#  https://github.com/matthieu-meaux/DLLM.git
+#
+# @author : Matthieu Meaux
+
+import unittest
+import numpy as np
+
+from DLLM.DLLMGeom.wing_broken import Wing_Broken
+from DLLM.DLLMKernel.DLLMSolver import DLLMSolver
+from MDOTools.OC.operating_condition import OperatingCondition
+
+class TestDLLMSweep(unittest.TestCase):
+    
+    def __init_wing_param(self, BC_file='input_parameters.par', AoA_id=None):
+        OC=OperatingCondition('cond1')
+        OC.set_Mach(0.6)
+        OC.set_AoA(3.5)
+        OC.set_altitude(10000.)
+        OC.set_T0_deg(15.)
+        OC.set_P0(101325.)
+        OC.set_humidity(0.)
+        OC.compute_atmosphere()
+        
+        wing_param=Wing_Broken('broken_wing',n_sect=20)
+        if AoA_id is not None:
+            wing_param.set_AoA_id(AoA_id)
+        wing_param.import_BC_from_file(BC_file)
+        wing_param.build_linear_airfoil(OC, AoA0=-2.0, set_as_ref=True)
+        wing_param.build_airfoils_from_ref()
+        wing_param.update()
+        
+        return OC,wing_param
+    
+    def __get_solver(self, method=None, grad_active=True):
+        OC,wing_param = self.__init_wing_param()
+        DLLM = DLLMSolver('test',wing_param,OC,grad_active=grad_active)
+        DLLM.set_sink('none')
+        if method is not None:
+            DLLM.set_method(method)
+        return DLLM
+    
+    def __check_sweep(self, method, grad_active=True):
+        AoA_list  = np.array([0.,1.,2.,3.,3.,3.])
+        Mach_list = np.array([0.6,0.6,0.6,0.6,0.65,0.7])
+        DLLM = self.__get_solver(method, grad_active)
+        F_array = DLLM.run_sweep(AoA_list, Mach_list)
+        assert(F_array.shape == (len(AoA_list), len(DLLM.get_F_list_names())))
+        assert(len(DLLM.get_sweep_iterations()) == len(AoA_list))
+        for k in xrange(len(AoA_list)):
+            DLLM = self.__get_solver(method)
+            OC = DLLM.get_OC()
+            OC.set_AoA(AoA_list[k])
+            OC.set_Mach(Mach_list[k])
+            OC.compute_atmosphere()
+            DLLM.set_OC(OC)
+            DLLM.run_direct()
+            DLLM.run_post()
+            F_list = DLLM.get_F_list()
+            assert(np.allclose(F_array[k,:], F_list, rtol=1.e-6, atol=1.e-10))
+    
+    def test_DLLM_sweep_vs_runs(self):
+        self.__check_sweep(None)
+        
+    def test_DLLM_sweep_vs_runs_linear(self):
+        self.__check_sweep('linear')
+        
+    def test_DLLM_sweep_vs_runs_chord_no_grad(self):
+        self.__check_sweep('chord', grad_active=False)
+        
+    def test_DLLM_lu_current(self):
+        # without gradient the chord iterations keep the factorization of an earlier iterate
+        DLLM = self.__get_solver('chord', grad_active=False)
+        DLLM.run_direct()
+        assert(DLLM.get_dpR_dpW_lu() is not None)
+        assert(not DLLM.is_dpR_dpW_lu_current())
+        DLLM = self.__get_solver('chord')
+        DLLM.run_direct()
+        assert(DLLM.is_dpR_dpW_lu_current())
+        OC = DLLM.get_OC()
+        OC.set_AoA(4.)
+        DLLM.set_OC(OC)
+        assert(not DLLM.is_dpR_dpW_lu_current())
+        
+    def test_DLLM_sweep_AoA_design_variable(self):
+        OC,wing_param = self.__init_wing_param(BC_file='input_parameters_AoA.par', AoA_id='AoA1')
+        DLLM = DLLMSolver('test',wing_param,OC)
+        DLLM.set_sink('none')
+        self.assertRaises(Exception, DLLM.run_sweep, [0.,1.])
+        
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestDLLMSweep)
+    unittest.TextTestRunner(verbosity=2).run(suite)
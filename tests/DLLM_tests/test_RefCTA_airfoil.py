@@ -0,0 +1,173 @@
+# -*-mode: python; py-indent-offset: 4; tab-width: 8; coding: iso-8859-1 -*-
+#  DLLM (non-linear Differentiated Lifting Line Model, open source software)
+# 
+#  Copyright (C) 2013-2015 Airbus Group SAS
+# 
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+# 
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+# 
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+#  https://github.com/matthieu-meaux/DLLM.git
+#
+# @author : Matthieu Meaux
+
+import os
+import shutil
+import unittest
+import numpy as np
+
+from DLLM.polarManager.RefCTAAirfoil import RefCTAAirfoil
+from MDOTools.OC.operating_condition import OperatingCondition
+
+class TestRefCTAAirfoil(unittest.TestCase):
+    POLAR_DIR = os.path.join('..','..','Simulation','CTA')
+    Y_DEF_LIST = [0.,1.520, 3.800, 6.080, 9.120, 12.160, 15.200, 18.240, 19.000]
+    # (y_pos, AoA in degrees, Cl, Cdw, Cdvp, Cdf, pcop) of the cubic interpolation of the polars
+    REF_VALUES = [(-5.1, -3.5, -0.0929815942937239, 14.109388748893913, 102.71342709508694, 66.53594914128814, 0.7731897089041971),
+                  (-5.1,  0.0, 0.0942982456140351, 3.008771929824562, 80.62543859649125, 68.69736842105263, 0.0849767441860465),
+                  (-5.1,  2.0, 0.16710526315789473, 20.63947368421053, 96.65789473684211, 65.24912280701756, -0.10905511811023622),
+                  (10.0, -3.5, -0.21268536898122573, 13.944836911531251, 33.96972930842009, 60.82373409415255, 0.6507377021577512),
+                  (10.0,  2.0, 0.6692105263157897, 16.84736842105264, 35.9842105263158, 63.08947368421052, 0.3656114825009831),
+                  ( 0.7, -3.5, 0.06878965141222411, 0.03477575650764311, 118.02582545211241, 74.43345768605887, 1.1285612253624624),
+                  ( 0.7,  2.0, 0.3430263157894736, 21.30921052631579, 136.59078947368423, 68.45131578947368, 0.17082853855005753)]
+    
+    def __get_OC(self):
+        OC=OperatingCondition('cond1')
+        OC.set_Mach(0.79)
+        OC.set_AoA(2.)
+        OC.set_altitude(10000.)
+        OC.set_T0_deg(15.)
+        OC.set_P0(101325.)
+        OC.set_humidity(0.)
+        OC.compute_atmosphere()
+        return OC
+    
+    def __get_airfoil(self, y_pos, file_def_list=None):
+        if file_def_list is None:
+            file_def_list = [os.path.join(self.POLAR_DIR, 'section'+str(i)+'.dat') for i in xrange(len(self.Y_DEF_LIST))]
+        airfoil = RefCTAAirfoil(self.__get_OC())
+        airfoil.set_y_def_list(self.Y_DEF_LIST)
+        airfoil.set_file_def_list(file_def_list)
+        airfoil.init_interpolators()
+        airfoil.set_y_pos(y_pos)
+        airfoil.init_interp_factors()
+        return airfoil
+    
+    def __get_coeffs(self, airfoil, AoA):
+        airfoil.comp_aero_coeffs(AoA, 0.79)
+        coeffs = np.array([airfoil.Cl, airfoil.Cdw, airfoil.Cdvp, airfoil.Cdf, airfoil.pcop])
+        dcoeffs_dAoA = np.array([airfoil.dCl_dAoA, airfoil.dCdw_dAoA, airfoil.dCdvp_dAoA, airfoil.dCdf_dAoA, airfoil.dpcop_dAoA])
+        return coeffs, dcoeffs_dAoA
+        
+    def test_RefCTA_reference_values(self):
+        for ref in self.REF_VALUES:
+            airfoil = self.__get_airfoil(ref[0])
+            coeffs, dcoeffs_dAoA = self.__get_coeffs(airfoil, ref[1]*np.pi/180.)
+            assert(np.allclose(coeffs, ref[2:], rtol=1.e-12, atol=1.e-15))
+            
+    def test_RefCTA_batch(self):
+        y_pos = np.array([-5.1, 0.7, 10., 17.])
+        AoA = np.array([-3.5, 0.3, 2., 4.2])*np.pi/180.
+        airfoil = self.__get_airfoil(y_pos[0])
+        batch_af = airfoil.get_batch_copy([self.__get_airfoil(y) for y in y_pos], 1., 1.)
+        batch_af.comp_aero_coeffs_batch(AoA, 0.79)
+        for k in xrange(len(y_pos)):
+            coeffs, dcoeffs_dAoA = self.__get_coeffs(self.__get_airfoil(y_pos[k]), AoA[k])
+            assert(np.allclose([batch_af.Cl[k], batch_af.Cdw[k], batch_af.Cdvp[k], batch_af.Cdf[k], batch_af.pcop[k]], coeffs,
+                               rtol=1.e-14, atol=1.e-15))
+            assert(np.allclose(batch_af.dCl_dAoA[k], dcoeffs_dAoA[0], rtol=1.e-14, atol=1.e-15))
+            
+    def test_RefCTA_valid_dAoA(self):
+        step = 1.e-7
+        for y_pos in [-5.1, 0.7, 10.]:
+            airfoil = self.__get_airfoil(y_pos)
+            # inside the intervals of the polars, the cubics are not differentiable at the knots
+            for AoA in np.array([-3.3, 0.4, 2.3, 4.6])*np.pi/180.:
+                coeffs, dcoeffs_dAoA = self.__get_coeffs(airfoil, AoA)
+                coeffs_p, d = self.__get_coeffs(airfoil, AoA+step)
+                coeffs_m, d = self.__get_coeffs(airfoil, AoA-step)
+                dcoeffs_dAoA_fd = (coeffs_p-coeffs_m)/(2.*step)
+                assert(np.allclose(dcoeffs_dAoA, dcoeffs_dAoA_fd, rtol=1.e-5, atol=1.e-5))
+                
+    def test_RefCTA_polar_registry_hit(self):
+        RefCTAAirfoil.clear_polar_registry()
+        airfoil = self.__get_airfoil(-5.1)
+        registry = dict(RefCTAAirfoil.POLAR_REGISTRY)
+        assert(len(registry) == len(self.Y_DEF_LIST))
+        airfoil2 = self.__get_airfoil(10.)
+        # the polars are not read again, the registered tables are used
+        for path, entry in RefCTAAirfoil.POLAR_REGISTRY.items():
+            assert(entry is registry[path])
+        tables  = airfoil.get_shared_data()[0]
+        tables2 = airfoil2.get_shared_data()[0]
+        for table, table2 in zip(tables, tables2):
+            assert(np.array_equal(table, table2))
+            
+    def test_RefCTA_polar_registry_invalidation(self):
+        filename = 'test_polar_registry.dat'
+        shutil.copy(os.path.join(self.POLAR_DIR, 'section0.dat'), filename)
+        file_def_list = [filename]+[os.path.join(self.POLAR_DIR, 'section'+str(i)+'.dat') for i in xrange(1,len(self.Y_DEF_LIST))]
+        try:
+            airfoil = self.__get_airfoil(0.7, file_def_list)
+            path  = os.path.abspath(filename)
+            entry = RefCTAAirfoil.POLAR_REGISTRY[path]
+            coeffs, dcoeffs_dAoA = self.__get_coeffs(airfoil, 0.)
+            # all lift coefficients of the polar are doubled
+            fid = open(filename, 'r')
+            lines = fid.readlines()
+            fid.close()
+            index_CL = lines[0].split().index('CL')
+            fid = open(filename, 'w')
+            fid.write(lines[0])
+            for line in lines[1:]:
+                values = line.split()
+                values[index_CL] = str(2.*float(values[index_CL]))
+                fid.write(' '.join(values)+'\n')
+            fid.close()
+            mtime = int(entry[0])+10
+            os.utime(filename, (mtime, mtime))
+            airfoil2 = self.__get_airfoil(0.7, file_def_list)
+            entry2 = RefCTAAirfoil.POLAR_REGISTRY[path]
+            assert(entry2 is not entry)
+            assert(entry2[0] == os.path.getmtime(path))
+            coeffs2, dcoeffs2_dAoA = self.__get_coeffs(airfoil2, 0.)
+            assert(coeffs2[0] != coeffs[0])
+            assert(np.array_equal(coeffs2[1:4], coeffs[1:4]))
+            # an airfoil initialized before keeps its tables
+            assert(np.array_equal(self.__get_coeffs(airfoil, 0.)[0], coeffs))
+        finally:
+            os.remove(filename)
+            
+    def test_RefCTA_shared_tables_read_only(self):
+        RefCTAAirfoil.clear_polar_registry()
+        airfoil  = self.__get_airfoil(-5.1)
+        airfoil2 = self.__get_airfoil(10.)
+        scaled_af = airfoil.get_scaled_copy(Sref=2., Lref=2.)
+        assert(scaled_af.get_shared_data()[0] is airfoil.get_shared_data()[0])
+        for tables in [airfoil.get_shared_data()[0], airfoil2.get_shared_data()[0]]:
+            for table in tables:
+                assert(not table.flags.writeable)
+                self.assertRaises(ValueError, table.fill, 0.)
+        for entry in RefCTAAirfoil.POLAR_REGISTRY.values():
+            for table in entry[1:]:
+                assert(not table.flags.writeable)
+        # the results of the instances are their own
+        airfoil.comp_aero_coeffs(0., 0.79)
+        Cl = airfoil.Cl
+        scaled_af.comp_aero_coeffs(2.*np.pi/180., 0.79)
+        assert(airfoil.Cl == Cl)
+        assert(scaled_af.Cl != Cl)
+        
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestRefCTAAirfoil)
+    unittest.TextTestRunner(verbosity=2).run(suite)